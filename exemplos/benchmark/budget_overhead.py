@@ -0,0 +1,62 @@
+"""
+Custo dos orçamentos de execução (`lox.Budget`): cada programa roda sem
+orçamento e com todos os limites ligados, mas altos o bastante para nunca
+serem atingidos.
+
+    $ python exemplos/benchmark/budget_overhead.py [REPETIÇÕES]
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+import lox
+
+PROGRAMS = {
+    "laço while": """
+var total = 0;
+var i = 0;
+while (i < 300000) { total = total + i; i = i + 1; }
+""",
+    "laço for -O": """
+var total = 0;
+for (var i = 0; i < 300000; i = i + 1) total = total + i;
+""",
+    "recursão": """
+fun fib(n) { if (n < 2) return n; return fib(n - 2) + fib(n - 1); }
+fib(20);
+""",
+    "instâncias": """
+class P { init(x) { this.x = x; } get() { return this.x; } }
+var total = 0;
+for (var i = 0; i < 30000; i = i + 1) total = total + P(i).get();
+""",
+}
+
+BUDGET = lox.Budget(steps=10**9, depth=10**4, instances=10**9, seconds=3600)
+
+
+def best_of(program: lox.CompiledProgram, budget: lox.Budget | None, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            program.run(budget=budget)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'programa':<14} {'sem orçamento':>14} {'com orçamento':>14} {'custo':>8}")
+    for name, src in PROGRAMS.items():
+        options = lox.Options.full() if name.endswith("-O") else None
+        program = lox.compile(src, options)
+        off = best_of(program, None, repeat)
+        on = best_of(program, BUDGET, repeat)
+        print(f"{name:<14} {off * 1e3:11.1f} ms {on * 1e3:11.1f} ms {(on / off - 1) * 100:7.1f}%")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+"""
+Vazão de `lox.eval()` comparada a `lox.compile()` + `run()` para um script
+curto executado muitas vezes com ambientes diferentes.
+
+    $ python exemplos/benchmark/compile_throughput.py [N]
+"""
+
+import sys
+import time
+
+import lox
+
+SCRIPT = """
+var total = 0;
+for (var i = 0; i < 10; i = i + 1) total = total + x * i;
+result = total;
+"""
+
+
+def bench(label: str, n: int, func) -> float:
+    start = time.perf_counter()
+    for i in range(n):
+        func({"x": float(i), "result": None})
+    elapsed = time.perf_counter() - start
+    print(f"{label:<24} {n:>7} execuções  {elapsed:8.3f} s  {n / elapsed:10.0f} exec/s")
+    return elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    program = lox.compile(SCRIPT)
+    optimized = lox.compile(SCRIPT, optimize=lox.Options.full())
+
+    # eval() analisa o código a cada chamada; usamos menos repetições
+    bench("eval()", max(n // 100, 1), lambda env: lox.eval(SCRIPT, env))
+    bench("compile().run()", n, program.run)
+    bench("compile(-O).run()", n, optimized.run)
+
+
+if __name__ == "__main__":
+    main()
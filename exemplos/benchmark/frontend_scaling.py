@@ -0,0 +1,146 @@
+"""
+Escalabilidade do frontend: tempo e pico de memória de cada fase, da análise
+léxica ao `pretty()`, para programas sintéticos de tamanhos crescentes (veja
+`lox.synthetic`).
+
+    $ python exemplos/benchmark/frontend_scaling.py
+    $ python exemplos/benchmark/frontend_scaling.py --sizes 1000,10000,50000 --depth 6
+
+Para cada fase, mostra um gráfico de barras do tempo por tamanho, o custo por
+linha e o expoente k do ajuste tempo ~ linhas^k. Fases com k bem acima de 1
+crescem de forma superlinear. A memória é medida numa segunda passada, com
+tracemalloc, para não distorcer os tempos.
+"""
+
+import argparse
+import gc
+import json
+import math
+import time
+import tracemalloc
+
+from lox.parser import get_parser, lex
+from lox.synthetic import generate
+from lox.transformer import LoxTransformer
+
+# Expoente acima do qual uma fase é marcada como superlinear
+SUPERLINEAR = 1.15
+
+BAR_WIDTH = 40
+
+
+def phases(src: str) -> dict:
+    """
+    Pares (preparação, fase) de cada fase. A preparação roda fora da medição
+    e produz a entrada da fase; fases que modificam a árvore recebem uma
+    árvore nova a cada repetição.
+    """
+
+    def source():
+        return src
+
+    def cst():
+        return get_parser(cst=True).parse(src, start="start")
+
+    def tree():
+        return get_parser().parse(src, start="start")
+
+    def desugared():
+        program = tree()
+        program.desugar_tree()
+        return program
+
+    return {
+        "lex": (source, lambda src: list(lex(src))),
+        "parse (cst)": (source, lambda src: get_parser(cst=True).parse(src, start="start")),
+        "LoxTransformer": (cst, lambda cst: LoxTransformer().transform(cst)),
+        "ast_parser.parse": (source, lambda src: get_parser().parse(src, start="start")),
+        "validate_tree": (tree, lambda tree: tree.validate_tree()),
+        "desugar_tree": (tree, lambda tree: tree.desugar_tree()),
+        "pretty": (desugared, lambda tree: tree.pretty()),
+    }
+
+
+def best_time(setup, func, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        arg = setup()
+        gc.collect()
+        start = time.perf_counter()
+        func(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_memory(setup, func) -> int:
+    arg = setup()
+    tracemalloc.start()
+    try:
+        func(arg)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def exponent(sizes: list[int], times: list[float]) -> float:
+    """
+    Inclinação da reta de mínimos quadrados em escala log-log.
+    """
+    xs = [math.log(n) for n in sizes]
+    ys = [math.log(t) for t in times]
+    mx, my = sum(xs) / len(xs), sum(ys) / len(ys)
+    num = sum((x - mx) * (y - my) for x, y in zip(xs, ys))
+    den = sum((x - mx) ** 2 for x in xs)
+    return num / den if den else float("nan")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sizes", default="1000,2000,4000,8000", help="Linhas de cada programa.")
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--classes", type=int, default=10)
+    parser.add_argument("--expr-length", type=int, default=4)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--json", help="Salva as medições em JSON.")
+    args = parser.parse_args()
+
+    # Constrói os parsers fora das medições
+    get_parser()
+    get_parser(cst=True)
+
+    results: dict[str, list[dict]] = {}
+    sizes = []
+    for size in map(int, args.sizes.split(",")):
+        src = generate(size, args.depth, args.classes, args.expr_length)
+        lines = src.count("\n")
+        sizes.append(lines)
+        print(f"{lines} linhas, {len(src) / 1024:.0f} KiB...", flush=True)
+        for name, (setup, func) in phases(src).items():
+            results.setdefault(name, []).append(
+                {
+                    "lines": lines,
+                    "seconds": best_time(setup, func, args.repeat),
+                    "peak_memory": peak_memory(setup, func),
+                }
+            )
+
+    for name, rows in results.items():
+        times = [row["seconds"] for row in rows]
+        k = exponent(sizes, times)
+        flag = "  SUPERLINEAR" if k > SUPERLINEAR else ""
+        print(f"\n{name}  (k = {k:.2f}){flag}")
+        for row in rows:
+            bar = "#" * max(1, round(BAR_WIDTH * row["seconds"] / max(times)))
+            print(
+                f"{row['lines']:>8} {bar:<{BAR_WIDTH}} {row['seconds'] * 1e3:9.1f} ms "
+                f"{row['seconds'] / row['lines'] * 1e6:7.1f} µs/linha "
+                f"{row['peak_memory'] / 2**20:8.1f} MiB"
+            )
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
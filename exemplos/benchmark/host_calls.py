@@ -0,0 +1,40 @@
+"""
+Custo por chamada de funções Lox chamadas a partir do Python: uma chamada
+por linha com `LoxFunction.__call__` comparada a `LoxFunction.map()`.
+
+    $ python exemplos/benchmark/host_calls.py [N]
+"""
+
+import sys
+import time
+
+import lox
+
+SCRIPT = """
+fun score(x) {
+  var y = x * 2;
+  return y + 1;
+}
+"""
+
+
+def bench(label: str, n: int, func) -> None:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<16} {elapsed:8.3f} s  {elapsed / n * 1e6:6.2f} µs/chamada")
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    ctx = lox.Ctx.from_dict({})
+    lox.eval(SCRIPT, ctx)
+    score = ctx["score"]
+    rows = [float(i) for i in range(n)]
+
+    bench("score(x)", n, lambda: [score(x) for x in rows])
+    bench("score.map(xs)", n, lambda: list(score.map(rows)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""
+Escalabilidade de `lox.parallel_map()` num núcleo numérico que só usa CPU.
+Compara `LoxFunction.map()` num único processo com pools de tamanhos
+crescentes.
+
+    $ python exemplos/benchmark/parallel_map.py [N] [MAX_WORKERS]
+"""
+
+import os
+import sys
+import time
+
+import lox
+
+SCRIPT = """
+fun work(seed) {
+  var acc = 0;
+  for (var i = 0; i < 2000; i = i + 1) {
+    acc = acc + sqrt(i * seed + 1);
+  }
+  return acc;
+}
+"""
+
+
+def bench(label: str, func, baseline: float | None = None) -> float:
+    start = time.perf_counter()
+    func()
+    elapsed = time.perf_counter() - start
+    speedup = "" if baseline is None else f"  {baseline / elapsed:5.2f}x"
+    print(f"{label:<20} {elapsed:8.3f} s{speedup}")
+    return elapsed
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 512
+    max_workers = int(sys.argv[2]) if len(sys.argv) > 2 else os.cpu_count() or 1
+    ctx = lox.Ctx.from_dict({})
+    lox.eval(SCRIPT, ctx, optimize=lox.Options.full())
+    work = ctx["work"]
+    seeds = [float(i) for i in range(n)]
+
+    baseline = bench("work.map(xs)", lambda: list(work.map(seeds)))
+    workers = 1
+    while workers <= max_workers:
+        bench(
+            f"parallel_map({workers})",
+            lambda: lox.parallel_map(work, seeds, workers=workers, chunksize=8),
+            baseline,
+        )
+        workers *= 2
+
+
+if __name__ == "__main__":
+    main()
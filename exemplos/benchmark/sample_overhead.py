@@ -0,0 +1,69 @@
+"""
+Custo do profiler por amostragem (`lox.profiler.SamplingProfiler`): cada
+programa roda sem profiler e com amostras no intervalo padrão. A última
+coluna é a fração do tempo de CPU gasta nas amostras, medida pelo próprio
+profiler e menos sujeita a ruído que a diferença entre os tempos.
+
+    $ python exemplos/benchmark/sample_overhead.py [REPETIÇÕES]
+"""
+
+import contextlib
+import io
+import sys
+import time
+
+import lox
+from lox.profiler import SamplingProfiler
+
+PROGRAMS = {
+    "laço while": """
+var total = 0;
+var i = 0;
+while (i < 300000) { total = total + i; i = i + 1; }
+""",
+    "recursão": """
+fun fib(n) { if (n < 2) return n; return fib(n - 2) + fib(n - 1); }
+fib(20);
+""",
+    "recursão funda": """
+fun down(n) { if (n < 1) return 0; return down(n - 1) + 1; }
+for (var i = 0; i < 300; i = i + 1) down(300);
+""",
+    "instâncias": """
+class P { init(x) { this.x = x; } get() { return this.x; } }
+var total = 0;
+for (var i = 0; i < 30000; i = i + 1) total = total + P(i).get();
+""",
+}
+
+
+def best_of(program: lox.CompiledProgram, sampled: bool, repeat: int) -> tuple[float, float]:
+    best, share = float("inf"), 0.0
+    for _ in range(repeat):
+        profiler = SamplingProfiler() if sampled else contextlib.nullcontext()
+        start = time.perf_counter()
+        with profiler, contextlib.redirect_stdout(io.StringIO()):
+            program.run()
+        best = min(best, time.perf_counter() - start)
+        if sampled:
+            share = max(share, profiler.cost / (profiler.cpu or 1))
+    return best, share
+
+
+def main():
+    sys.setrecursionlimit(10**5)
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    header = f"{'programa':<16} {'sem profiler':>14} {'com amostras':>14} {'custo':>8} {'amostras':>9}"
+    print(header)
+    for name, src in PROGRAMS.items():
+        program = lox.compile(src)
+        off, _ = best_of(program, False, repeat)
+        on, share = best_of(program, True, repeat)
+        print(
+            f"{name:<16} {off * 1e3:11.1f} ms {on * 1e3:11.1f} ms "
+            f"{(on / off - 1) * 100:7.1f}% {share * 100:8.1f}%"
+        )
+
+
+if __name__ == "__main__":
+    main()
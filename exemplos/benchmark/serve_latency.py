@@ -0,0 +1,71 @@
+"""
+Latência de `lox serve` comparada com iniciar um processo por script.
+
+Mede três formas de executar o mesmo script pequeno:
+
+* cold: `python -m lox script.lox`, um processo novo por execução;
+* client: `python -m lox run --server script.lox`, um processo cliente
+  novo por execução, que envia o script ao servidor;
+* run_remote: `lox.server.run_remote()` chamada de um processo Python que
+  já está em execução (ex.: o próprio executor de tarefas).
+
+    $ python exemplos/benchmark/serve_latency.py [N]
+"""
+
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+from lox.server import is_listening, run_remote
+
+SCRIPT = """
+fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+print fib(12);
+"""
+
+
+def report(label: str, samples: list[float]) -> None:
+    cuts = statistics.quantiles(samples, n=100)
+    p50, p99 = cuts[49] * 1e3, cuts[98] * 1e3
+    print(f"{label:<12} p50 {p50:8.2f} ms   p99 {p99:8.2f} ms")
+
+
+def measure(n: int, func) -> list[float]:
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    tmp = tempfile.mkdtemp()
+    script = os.path.join(tmp, "script.lox")
+    path = os.path.join(tmp, "lox.sock")
+    with open(script, "w") as f:
+        f.write(SCRIPT)
+
+    lox = [sys.executable, "-W", "ignore", "-m", "lox"]
+    server = subprocess.Popen([*lox, "serve", "--socket", path, "--workers", "1"])
+    try:
+        while not is_listening(path):
+            time.sleep(0.05)
+
+        def run(*args: str) -> None:
+            subprocess.run([*lox, *args], check=True, stdout=subprocess.DEVNULL)
+
+        report("cold", measure(n, lambda: run(script)))
+        report("client", measure(n, lambda: run("run", "--server", "--socket", path, script)))
+        report("run_remote", measure(n * 10, lambda: run_remote(SCRIPT, path)))
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    main()
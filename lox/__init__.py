@@ -4,23 +4,45 @@ ATENÇÃO: EVITE MODIFICAR ESTE ARQUIVO!
 Carrega os nomes principais do módulo lox.
 """
 
+import copy
+
 from .ast import Expr, Stmt, Value
 from .ctx import Ctx
 from .errors import SemanticError
+from .interpreter import Interpreter
 from .node import Node
+from . import optimizer
+from .optimizer import Options, Report, optimize
+from .parallel import parallel_map
 from .parser import lex, parse, parse_cst, parse_expr
+from .program import CompiledProgram, compile, execute, execute_async
+from .runtime import YIELD_INTERVAL, Budget, BudgetExceeded
+from .timings import Timings, phase
+from .tracing import Tracer
 
 __all__ = [
+    "Budget",
+    "BudgetExceeded",
+    "compile",
+    "CompiledProgram",
     "Ctx",
     "eval",
+    "eval_async",
     "Expr",
+    "Interpreter",
     "lex",
     "Node",
+    "optimize",
+    "Options",
+    "parallel_map",
+    "Report",
     "parse_cst",
     "parse",
     "parse_expr",
     "Stmt",
     "SemanticError",
+    "Timings",
+    "Tracer",
 ]
 
 
@@ -28,36 +50,92 @@ def eval(
     src: str | Node,
     env: Ctx | dict[str, Value] | None = None,
     skip_validation: bool = False,
+    optimize: Options | None = None,
+    budget: Budget | None = None,
+    timings: Timings | None = None,
+    tracer: Tracer | None = None,
 ) -> Value:
     """
     Avalia o código fonte e retorna o valur resultante.
 
     Args:
         src:
-            Código fonte em formato de string ou um nó AST.
+            Código fonte em formato de string ou um nó AST. Com `optimize`,
+            o nó é copiado antes de ser otimizado, como em `lox.compile`.
         env:
             Ambiente onde as variáveis serão avaliadas. Se omitido, um novo
             ambiente vazio será criado. Aceita um dicionário mapeando nomes de
             variáveis para seus valores ou uma instância de `Ctx`.
         skip_validation:
             Se `True`, ignora a validação do código fonte antes da avaliação.
+        optimize:
+            Opções do otimizador (veja `lox.optimizer.Options`). Se omitido,
+            a árvore é avaliada sem otimizações adicionais.
+        budget:
+            Limites de passos, chamadas aninhadas, instâncias e tempo (veja
+            `lox.Budget`). Se algum for excedido, a execução termina com um
+            `BudgetExceeded`.
+        timings:
+            Se fornecido, acumula o tempo de cada fase, da análise léxica à
+            execução (veja `lox.Timings`).
+        tracer:
+            Se fornecido, recebe os eventos da execução: chamadas, linhas,
+            iterações de laços e erros (veja `lox.Tracer`).
+    """
+    if isinstance(src, Node):
+        # O otimizador reescreve a árvore, que pertence ao chamador
+        ast = copy.deepcopy(src) if optimize is not None else src
+    else:
+        ast = parse(src, timings=timings)
+
+    if not skip_validation:
+        with phase(timings, "validate"):
+            ast.validate_tree()
+
+    if optimize is not None:
+        with phase(timings, "optimize"):
+            builtins = env.builtins() if isinstance(env, Ctx) else None
+            optimizer.optimize(ast, optimize, builtins=builtins)
+
+    with phase(timings, "eval"):
+        return execute(ast, env, budget, tracer)
+
+
+async def eval_async(
+    src: str | Node,
+    env: Ctx | dict[str, Value] | None = None,
+    skip_validation: bool = False,
+    optimize: Options | None = None,
+    interval: int = YIELD_INTERVAL,
+    budget: Budget | None = None,
+    timings: Timings | None = None,
+    tracer: Tracer | None = None,
+) -> Value:
     """
-    if env is None:
-        env = Ctx.from_dict({})
-    elif not isinstance(env, Ctx):
-        env = Ctx.from_dict(env)
+    Versão assíncrona de `eval`, para executar programas dentro de um laço
+    de eventos do asyncio.
 
+    O interpretador devolve o controle ao laço a cada `interval` iterações de
+    laços ou chamadas de funções Lox, e funções nativas assíncronas
+    (`async def`) são aguardadas sem bloquear os demais programas. Os outros
+    argumentos são os mesmos de `eval`.
+
+        >>> await lox.eval_async("while (true) {}")  # não bloqueia o laço
+    """
     if isinstance(src, Node):
-        ast = src
+        # O otimizador reescreve a árvore, que pertence ao chamador
+        ast = copy.deepcopy(src) if optimize is not None else src
     else:
-        ast = parse(src)
+        ast = parse(src, timings=timings)
 
     if not skip_validation:
-        ast.validate_tree()
-
-    try:
-        return ast.eval(env)
-    except Exception as e:
-        print(f"Programa terminou com um erro: {e}")
-        print("Variáveis:", env)
-        raise
+        with phase(timings, "validate"):
+            ast.validate_tree()
+
+    if optimize is not None:
+        with phase(timings, "optimize"):
+            builtins = env.builtins() if isinstance(env, Ctx) else None
+            optimizer.optimize(ast, optimize, builtins=builtins)
+
+    with phase(timings, "eval"):
+        return await execute_async(ast, env, interval, budget, tracer)
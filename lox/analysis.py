@@ -0,0 +1,253 @@
+"""
+Análises estáticas sobre a árvore sintática.
+
+As análises deste módulo não modificam a árvore: apenas coletam informações
+que são usadas pelo otimizador (veja `lox.optimizer`).
+"""
+
+from typing import Iterable
+
+from .ast import (
+    And,
+    Assign,
+    BinOp,
+    Block,
+    Call,
+    Class,
+    CountedLoop,
+    Function,
+    If,
+    Literal,
+    Or,
+    Program,
+    Return,
+    Super,
+    This,
+    UnaryOp,
+    Var,
+    VarDef,
+    While,
+)
+from .ctx import BUILTINS
+from .natives import NativeFunction
+from .node import Node
+from .runtime import LoxFunction
+
+
+def pure_natives(builtins: dict | None = None) -> set[str]:
+    """
+    Nomes das funções nativas registradas como puras.
+    """
+    if builtins is None:
+        builtins = BUILTINS
+    return {
+        name
+        for name, value in builtins.items()
+        if isinstance(value, NativeFunction) and value.pure
+    }
+
+
+def global_definitions(program: Program) -> dict[str, int]:
+    """
+    Conta quantas vezes cada nome é definido no escopo global do programa.
+    """
+    counts: dict[str, int] = {}
+    for stmt in program.stmts:
+        if isinstance(stmt, (VarDef, Function, Class)):
+            counts[stmt.name] = counts.get(stmt.name, 0) + 1
+    return counts
+
+
+def assigned_names(tree: Node) -> set[str]:
+    """
+    Retorna os nomes que aparecem como alvo de alguma atribuição na árvore.
+    """
+    return {node.name for node in tree.descendants() if isinstance(node, Assign)}
+
+
+def constant_globals(program: Program) -> set[str]:
+    """
+    Nomes globais definidos uma única vez e nunca reatribuídos.
+
+    O valor destes nomes não muda depois da definição, então podem ser lidos
+    livremente por funções puras.
+    """
+    assigned = assigned_names(program)
+    return {
+        name
+        for name, count in global_definitions(program).items()
+        if count == 1 and name not in assigned
+    }
+
+
+def pure_functions(program: Program, builtins: dict | None = None) -> set[str]:
+    """
+    Retorna o nome das funções globais comprovadamente puras.
+
+    Uma função é pura se não imprime nada, não atribui variáveis não-locais,
+    não lê nem escreve atributos, não declara funções ou classes e só chama
+    outras funções puras ou funções nativas puras. Variáveis livres só podem
+    se referir a globais constantes.
+
+    Funções mutuamente recursivas são tratadas de forma otimista: começamos
+    assumindo que todas as candidatas são puras e removemos as impuras até
+    atingir um ponto fixo.
+
+    A pureza das funções nativas é lida do registro `builtins` (por padrão,
+    `BUILTINS`).
+    """
+    constants = constant_globals(program)
+    defined = global_definitions(program)
+    candidates = {
+        stmt.name: stmt
+        for stmt in program.stmts
+        if isinstance(stmt, Function) and stmt.name in constants
+    }
+    natives = {name for name in pure_natives(builtins) if name not in defined}
+
+    changed = True
+    while changed:
+        changed = False
+        callables = natives | candidates.keys()
+        for name, func in list(candidates.items()):
+            checker = _PurityChecker(callables, constants)
+            if not checker.check_function(func):
+                del candidates[name]
+                changed = True
+    return set(candidates)
+
+
+class _PurityChecker:
+    """
+    Percorre o corpo de uma função acompanhando os escopos léxicos.
+    """
+
+    def __init__(self, callables: set[str], constants: set[str]):
+        self.callables = callables
+        self.constants = constants
+        self.scopes: list[set[str]] = []
+
+    def is_local(self, name: str) -> bool:
+        return any(name in scope for scope in self.scopes)
+
+    def check_function(self, func: Function) -> bool:
+        self.scopes = [set(func.params)]
+        return all(self.check(stmt) for stmt in func.body.stmts)
+
+    def check(self, node: Node) -> bool:
+        match node:
+            case Literal():
+                return True
+            case Var(name=name):
+                return self.is_local(name) or name in self.constants or name in self.callables
+            case BinOp(left=left, right=right) | And(left=left, right=right) | Or(left=left, right=right):
+                return self.check(left) and self.check(right)
+            case UnaryOp(operand=operand):
+                return self.check(operand)
+            case Call(callee=Var(name=name), params=params):
+                if self.is_local(name) or name not in self.callables:
+                    return False
+                return all(self.check(p) for p in params)
+            case Assign(name=name, value=value):
+                return self.check(value) and self.is_local(name)
+            case VarDef(name=name, value=value):
+                ok = self.check(value)
+                self.scopes[-1].add(name)
+                return ok
+            case Block(stmts=stmts):
+                self.scopes.append(set())
+                try:
+                    return all(self.check(stmt) for stmt in stmts)
+                finally:
+                    self.scopes.pop()
+            case If(cond=cond, then_branch=then_branch, else_branch=else_branch):
+                return (
+                    self.check(cond)
+                    and self.check(then_branch)
+                    and (else_branch is None or self.check(else_branch))
+                )
+            case While(cond=cond, body=body):
+                return self.check(cond) and self.check(body)
+            case Return(value=value):
+                return value is None or self.check(value)
+        # Print, Getattr, Setattr, This, Super, Function, Class, chamadas
+        # dinâmicas, etc.
+        return False
+
+
+def free_variables(
+    function: LoxFunction, bound: Iterable[str] = ()
+) -> tuple[set[str], set[str]]:
+    """
+    Variáveis livres de uma função: os nomes que o corpo lê e os nomes que
+    atribui sem que tenham sido declarados dentro dela.
+
+    Nomes em `bound` são tratados como locais (ex.: "this" em métodos).
+    """
+    collector = _FreeVariables()
+    collector.scopes = [set(bound) | set(function.params)]
+    for stmt in function.body:
+        collector.visit(stmt)
+    return collector.read, collector.assigned
+
+
+class _FreeVariables:
+    """
+    Percorre um corpo de função acompanhando os escopos léxicos e coleta os
+    nomes que se referem a escopos externos.
+    """
+
+    def __init__(self):
+        self.scopes: list[set[str]] = []
+        self.read: set[str] = set()
+        self.assigned: set[str] = set()
+
+    def is_local(self, name: str) -> bool:
+        return any(name in scope for scope in self.scopes)
+
+    def use(self, name: str) -> None:
+        if not self.is_local(name):
+            self.read.add(name)
+
+    def visit_scope(self, names: set[str], nodes: list[Node]) -> None:
+        self.scopes.append(names)
+        try:
+            for node in nodes:
+                self.visit(node)
+        finally:
+            self.scopes.pop()
+
+    def visit(self, node: Node) -> None:
+        match node:
+            case Var(name=name):
+                self.use(name)
+            case This():
+                self.use("this")
+            case Super():
+                self.use("super")
+                self.use("this")
+            case Assign(name=name, value=value):
+                self.visit(value)
+                if not self.is_local(name):
+                    self.assigned.add(name)
+            case VarDef(name=name, value=value):
+                if value is not None:
+                    self.visit(value)
+                self.scopes[-1].add(name)
+            case Block(stmts=stmts):
+                self.visit_scope(set(), stmts)
+            case Function(name=name, params=params, body=body):
+                self.scopes[-1].add(name)
+                self.visit_scope(set(params), body.stmts)
+            case Class(name=name, methods=methods, base=base):
+                if base is not None:
+                    self.use(base)
+                self.scopes[-1].add(name)
+                for method in methods:
+                    names = {"this", "super", *method.params}
+                    self.visit_scope(names, method.body.stmts)
+            case CountedLoop(name=name, start=start, bound=bound, body=body):
+                self.visit_scope({name}, [start, bound, body])
+            case _:
+                for child in node.children():
+                    self.visit(child)
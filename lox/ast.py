@@ -1,12 +1,17 @@
+import asyncio
+import inspect
+import operator
+import sys
 from abc import ABC
 from dataclasses import dataclass
 from typing import Callable, Iterable
 from types import FunctionType
 from bytecode import Bytecode, Instr, Compare, Label
 from .ctx import Ctx
-from .runtime import LoxFunction, LoxReturn, LoxClass, LoxError, truthy, show, LoxInstance
+from .runtime import LoxFunction, LoxReturn, LoxClass, LoxError, truthy, show, LoxInstance, MemoizedFunction, Rope, flatten, SCHEDULER, METER, OUTPUT
 from .node import Node, Cursor
 from .errors import SemanticError
+from .natives import NativeFunction, NativeValue
 from . import runtime as ops
 
 KEYWORDS = {
@@ -42,6 +47,15 @@ class Expr(Node, ABC):
     is_expr = True
     is_stmt = False
 
+    async def aeval(self, ctx: Ctx):
+        """
+        Versão assíncrona de `eval`, usada por `lox.eval_async()`.
+
+        Por padrão avalia o nó de forma síncrona. Nós que podem conter
+        pontos de preempção (laços e chamadas) sobrescrevem este método.
+        """
+        return self.eval(ctx)
+
     def emit_instructions(self) -> Iterable[Instr | Label]:
         msg = f"{self.__class__.__name__}.emit_instructions() não implementado"
         raise NotImplementedError(msg)
@@ -58,6 +72,12 @@ class Stmt(Node, ABC):
     is_expr = False
     is_stmt = True
 
+    async def aeval(self, ctx: Ctx):
+        """
+        Versão assíncrona de `eval` (veja `Expr.aeval`).
+        """
+        return self.eval(ctx)
+
     def emit_instructions(self) -> Iterable[Instr | Label]:
         msg = f"{self.__class__.__name__}.emit_instructions() não implementado"
         raise NotImplementedError(msg)
@@ -77,6 +97,10 @@ class Program(Node):
         for stmt in self.stmts:
             stmt.eval(ctx)
 
+    async def aeval(self, ctx: Ctx):
+        for stmt in self.stmts:
+            await stmt.aeval(ctx)
+
 
 #
 # EXPRESSÕES
@@ -111,6 +135,13 @@ class BinOp(Expr):
         right_value = self.right.eval(ctx)
         return self.ops(left_value, right_value)
 
+    async def aeval(self, ctx: Ctx):
+        if runs_sync(self):
+            return self.eval(ctx)
+        left_value = await self.left.aeval(ctx)
+        right_value = await self.right.aeval(ctx)
+        return self.ops(left_value, right_value)
+
     def emit_instructions(self):
         yield from self.left.emit_instructions()
         yield from self.right.emit_instructions()
@@ -172,6 +203,14 @@ class And(Expr):
             return left_value
         return self.right.eval(ctx)
 
+    async def aeval(self, ctx: Ctx):
+        if runs_sync(self):
+            return self.eval(ctx)
+        left_value = await self.left.aeval(ctx)
+        if not truthy(left_value):
+            return left_value
+        return await self.right.aeval(ctx)
+
 @dataclass
 class Or(Expr):
     """Operador lógico 'or' com curto-circuito."""
@@ -185,6 +224,14 @@ class Or(Expr):
             return left_value
         return self.right.eval(ctx)
 
+    async def aeval(self, ctx: Ctx):
+        if runs_sync(self):
+            return self.eval(ctx)
+        left_value = await self.left.aeval(ctx)
+        if truthy(left_value):
+            return left_value
+        return await self.right.aeval(ctx)
+
 @dataclass
 class Call(Expr):
     """
@@ -199,10 +246,15 @@ class Call(Expr):
     def eval(self, ctx: Ctx):
         func = self.callee.eval(ctx)
         args = [p.eval(ctx) for p in self.params]
-        if callable(func):
-            return func(*args)
-        raise TypeError(f"{func!r} não é chamável")
+        return call_value(func, args)
     
+    async def aeval(self, ctx: Ctx):
+        # Usado também pelas chamadas especializadas (NativeCall,
+        # InlinedCall, etc.), que no modo assíncrono viram chamadas comuns.
+        func = await self.callee.aeval(ctx)
+        args = [await p.aeval(ctx) for p in self.params]
+        return await acall_value(func, args)
+
     def emit_instructions(self):
         expr = Var(self.name)
         yield from expr.emit_instructions()
@@ -275,6 +327,13 @@ class Assign(Expr):
         ctx.assign(self.name, result)
         return result
 
+    async def aeval(self, ctx: Ctx):
+        if runs_sync(self):
+            return self.eval(ctx)
+        result = await self.value.aeval(ctx)
+        ctx.assign(self.name, result)
+        return result
+
     def emit_instructions(self):
         yield from self.value.emit_instructions()
         yield Instr("STORE_FAST", self.name)
@@ -295,11 +354,16 @@ class Getattr(Expr):
         value = self.obj.eval(ctx)
         if (
             value is None
-            or type(value) in (bool, float, str)
-            or isinstance(value, (LoxClass, LoxFunction))
+            or type(value) in (bool, float, str, Rope)
+            or isinstance(value, (LoxClass, LoxFunction, NativeValue))
         ):
-            raise LoxError("Somente instâncias têm propriedades.")
+            raise not_an_instance(value, "Somente instâncias têm propriedades.")
         return getattr(value, self.attr)
+
+    async def aeval(self, ctx: Ctx):
+        if runs_sync(self):
+            return self.eval(ctx)
+        return get_attribute(await self.obj.aeval(ctx), self.attr)
     
     def emit_instructions(self):
         yield from self.atom.emit_instructions()
@@ -315,13 +379,27 @@ class Setattr(Expr):
         obj_value = self.obj.eval(ctx)
         if (
             obj_value is None
-            or type(obj_value) in (bool, float, str)
-            or isinstance(obj_value, (LoxClass, LoxFunction))
+            or type(obj_value) in (bool, float, str, Rope)
+            or isinstance(obj_value, (LoxClass, LoxFunction, NativeValue))
         ):
-            raise LoxError("Somente instâncias têm campos")
+            raise not_an_instance(obj_value, "Somente instâncias têm campos")
         result = self.value.eval(ctx)
         setattr(obj_value, self.attr, result)
         return result
+
+    async def aeval(self, ctx: Ctx):
+        if runs_sync(self):
+            return self.eval(ctx)
+        obj_value = await self.obj.aeval(ctx)
+        if (
+            obj_value is None
+            or type(obj_value) in (bool, float, str, Rope)
+            or isinstance(obj_value, (LoxClass, LoxFunction, NativeValue))
+        ):
+            raise not_an_instance(obj_value, "Somente instâncias têm campos")
+        result = await self.value.aeval(ctx)
+        setattr(obj_value, self.attr, result)
+        return result
     
     def emit_instructions(self):
         yield from self.obj.emit_instructions()
@@ -340,7 +418,13 @@ class Print(Stmt):
     #exercício 18, que mostra a impressão de valores conforme Lox
     def eval(self, ctx: Ctx):
         value = self.expr.eval(ctx)
-        print(show(value))
+        write_output(ctx, show(value) + "\n")
+
+    async def aeval(self, ctx: Ctx):
+        if runs_sync(self):
+            return self.eval(ctx)
+        value = await self.expr.aeval(ctx)
+        write_output(ctx, show(value) + "\n")
 
     def emit_instructions(self):
         yield Instr("LOAD_GLOBAL", "print")
@@ -356,6 +440,11 @@ class Return(Stmt):
         result = None if self.value is None else self.value.eval(ctx)
         raise LoxReturn(result)
 
+    async def aeval(self, ctx: Ctx):
+        if runs_sync(self):
+            return self.eval(ctx)
+        raise LoxReturn(await self.value.aeval(ctx))
+
     #Exercício 26, de garantir que return só apareça em funções
     def validate_self(self, cursor: Cursor):
         if not cursor.is_scoped_to(Function):
@@ -383,6 +472,11 @@ class VarDef(Stmt):
     def eval(self, ctx: Ctx):
         ctx.var_def(self.name, self.value.eval(ctx))
 
+    async def aeval(self, ctx: Ctx):
+        if runs_sync(self):
+            return self.eval(ctx)
+        ctx.var_def(self.name, await self.value.aeval(ctx))
+
     #pedido no exercício 19, de validações
     def validate_self(self, cursor: Cursor):
         if self.name in KEYWORDS:
@@ -413,6 +507,14 @@ class If(Stmt):
         elif self.else_branch is not None:
             self.else_branch.eval(ctx)
 
+    async def aeval(self, ctx: Ctx):
+        if runs_sync(self):
+            return self.eval(ctx)
+        if truthy(await self.cond.aeval(ctx)):
+            await self.then_branch.aeval(ctx)
+        elif self.else_branch is not None:
+            await self.else_branch.aeval(ctx)
+
     def emit_instructions(self):
         """
           start
@@ -448,8 +550,21 @@ class While(Stmt):
     body: Stmt
 
     def eval(self, ctx: Ctx):
+        meter = METER.get()
         while truthy(self.cond.eval(ctx)):
             self.body.eval(ctx)
+            if meter is not None:
+                meter.step()
+
+    async def aeval(self, ctx: Ctx):
+        scheduler = SCHEDULER.get()
+        meter = METER.get()
+        while truthy(await self.cond.aeval(ctx)):
+            await self.body.aeval(ctx)
+            if meter is not None:
+                meter.step()
+            if scheduler is not None and scheduler.tick():
+                await asyncio.sleep(0)
 
     def emit_instructions(self):
         """
@@ -489,6 +604,16 @@ class Block(Node):
         finally:
             ctx.pop()
 
+    async def aeval(self, ctx: Ctx):
+        if runs_sync(self):
+            return self.eval(ctx)
+        ctx = ctx.push({})
+        try:
+            for stmt in self.stmts:
+                await stmt.aeval(ctx)
+        finally:
+            ctx.pop()
+
     def validate_self(self, cursor: Cursor):
         names: list[str] = [s.name for s in self.stmts if isinstance(s, VarDef)]
         seen: set[str] = set()
@@ -506,13 +631,26 @@ class Function(Stmt):
     params: list[str]
     body: Block
 
+    # Tamanho do cache LRU quando o otimizador marca a função como pura e
+    # memoizável (veja lox.optimizer). None desabilita a memoização.
+    memo_size = None
+
     def eval(self, ctx: Ctx):
-        func = LoxFunction(
-            name=self.name,
-            params=self.params,
-            body=self.body.stmts,
-            ctx=ctx,
-        )
+        if self.memo_size is None:
+            func = LoxFunction(
+                name=self.name,
+                params=self.params,
+                body=self.body.stmts,
+                ctx=ctx,
+            )
+        else:
+            func = MemoizedFunction(
+                name=self.name,
+                params=self.params,
+                body=self.body.stmts,
+                ctx=ctx,
+                maxsize=self.memo_size,
+            )
         ctx.var_def(self.name, func)
         return func
 
@@ -628,11 +766,640 @@ class UnaryOp(Expr):
 
     def eval(self, ctx: Ctx):
         return self.op(self.operand.eval(ctx))
+
+    async def aeval(self, ctx: Ctx):
+        if runs_sync(self):
+            return self.eval(ctx)
+        return self.op(await self.operand.aeval(ctx))
     
     def emit_instructions(self):
         yield from self.var.emit_instructions()
         yield Instr(self.operations[self.op])
 
+def without_cache(node: Node) -> dict:
+    """
+    Estado de um nó especulativo para o pickle, sem o cache de especialização.
+
+    O cache guarda valores da execução corrente (classes, funções nativas) e
+    é reconstruído na primeira execução da cópia.
+    """
+    state = node.__dict__.copy()
+    state.pop("cache", None)
+    return state
+
+
+#
+# NÓS PRODUZIDOS PELO OTIMIZADOR
+#
+# Estes nós nunca são criados pelo parser. O otimizador (lox.optimizer)
+# substitui nós genéricos por versões especializadas que preservam a
+# semântica original.
+#
+@dataclass
+class InlinedCall(Call):
+    """
+    Chamada a uma função pequena cujo corpo é um único `return`.
+
+    Em vez de executar `LoxFunction.call`, avalia a expressão do `return`
+    diretamente num escopo com os parâmetros. A guarda verifica a identidade
+    do corpo da função chamada; se falhar, realiza uma chamada comum.
+    """
+
+    callee: Expr
+    params: list[Expr]
+
+    @classmethod
+    def from_function(cls, call: Call, function: "Function") -> "InlinedCall":
+        node = cls(call.callee, call.params)
+        node.body = function.body.stmts
+        node.names = function.params
+        node.expr = inline_expr(function)
+        return node
+
+    def eval(self, ctx: Ctx):
+        func = self.callee.eval(ctx)
+        args = [p.eval(ctx) for p in self.params]
+        if type(func) is LoxFunction and func.body is self.body:
+            if self.names:
+                return eval_inlined(self.expr, func.ctx.push(dict(zip(self.names, args))))
+            return eval_inlined(self.expr, func.ctx)
+        return call_value(func, args)
+
+
+@dataclass
+class InlinedMethodCall(Call):
+    """
+    Chamada especulativa a um método pequeno, ex.: `zoo.ant()`.
+
+    A guarda verifica se o objeto é uma instância cuja classe resolve o
+    método para o corpo esperado. O último par (classe, método) validado fica
+    num cache no próprio nó. Se a guarda falhar, o método é buscado e chamado
+    normalmente.
+
+    O cache é uma única tupla, substituída de uma vez, para que execuções
+    concorrentes do mesmo programa nunca combinem a classe de uma execução
+    com o método de outra.
+    """
+
+    callee: Getattr
+    params: list[Expr]
+
+    # Último par (classe, método) validado. Não faz parte da árvore
+    # sintática e não é serializado (veja `without_cache`).
+    cache = (None, None)
+
+    @classmethod
+    def from_method(cls, call: Call, method: "Function") -> "InlinedMethodCall":
+        node = cls(call.callee, call.params)  # type: ignore[arg-type]
+        node.body = method.body.stmts
+        node.names = method.params
+        node.expr = inline_expr(method)
+        return node
+
+    def eval(self, ctx: Ctx):
+        obj = self.callee.obj.eval(ctx)
+        attr = self.callee.attr
+        if type(obj) is LoxInstance and attr not in obj.__dict__:
+            cls = obj._LoxInstance__cls
+            cached_class, method = self.cache
+            if cls is not cached_class:
+                method = self._lookup(cls, attr)
+            if method is not None:
+                env = {"this": obj}
+                if self.names:
+                    args = [p.eval(ctx) for p in self.params]
+                    env.update(zip(self.names, args))
+                return eval_inlined(self.expr, method.ctx.push(env))
+
+        func = get_attribute(obj, attr)
+        args = [p.eval(ctx) for p in self.params]
+        return call_value(func, args)
+
+    def _lookup(self, cls: LoxClass, attr: str) -> LoxFunction | None:
+        try:
+            method = cls.get_method(attr)
+        except LoxError:
+            return None
+        if type(method) is not LoxFunction or method.body is not self.body:
+            return None
+        self.cache = (cls, method)
+        return method
+
+    def __getstate__(self):
+        return without_cache(self)
+
+
+@dataclass
+class SubstitutedCall(Expr):
+    """
+    Chamada a uma função global cujo corpo foi substituído no ponto de
+    chamada, ex.: `sq(3)` -> `3 * 3`.
+
+    A expressão é avaliada diretamente, mas ainda conta como uma chamada no
+    orçamento da execução. A chamada original fica em `call`, fora da árvore
+    sintática, e é usada pelas execuções com tracer (veja `lox.tracing`).
+    """
+
+    expr: Expr
+
+    @classmethod
+    def from_call(cls, call: Call, expr: Expr) -> "SubstitutedCall":
+        node = cls(expr)
+        node.call = call
+        return node
+
+    def eval(self, ctx: Ctx):
+        return eval_inlined(self.expr, ctx)
+
+    async def aeval(self, ctx: Ctx):
+        if runs_sync(self):
+            return self.eval(ctx)
+        meter = METER.get()
+        if meter is None:
+            return await self.expr.aeval(ctx)
+        meter.enter()
+        try:
+            return await self.expr.aeval(ctx)
+        finally:
+            meter.depth -= 1
+
+    def eval_call(self, ctx: Ctx):
+        """
+        Avalia a chamada original, sem a substituição.
+        """
+        return self.call.eval(ctx)
+
+    async def aeval_call(self, ctx: Ctx):
+        return await self.call.aeval(ctx)
+
+
+def eval_inlined(expr: Expr, ctx: Ctx) -> Value:
+    """
+    Avalia o corpo de uma chamada expandida pelo otimizador, que conta no
+    orçamento da execução como uma chamada comum (veja `Meter.enter`).
+    """
+    meter = METER.get()
+    if meter is None:
+        return expr.eval(ctx)
+    meter.enter()
+    try:
+        return expr.eval(ctx)
+    finally:
+        meter.depth -= 1
+
+
+@dataclass
+class NativeCall(Call):
+    """
+    Chamada a uma função nativa, ex.: `sqrt(x)`.
+
+    O nó guarda a última `NativeFunction` chamada e o tipo esperado de cada
+    argumento. Se o valor chamado for a mesma função, os argumentos são
+    conferidos com testes de tipo simples e a função Python é chamada
+    diretamente, sem passar por `call_value`. Caso contrário, o nó se
+    especializa para a nova função ou realiza uma chamada comum.
+
+    As subclasses `NativeCall0`, `NativeCall1` e `NativeCall2` evitam criar a
+    lista de argumentos nas chamadas mais comuns.
+    """
+
+    callee: Expr
+    params: list[Expr]
+
+    # Especialização atual: (NativeFunction, função Python, tipos). Fica fora
+    # da árvore sintática e é substituída de uma vez, como o cache de
+    # `InlinedMethodCall`.
+    cache = (None, None, ())
+
+    def __getstate__(self):
+        return without_cache(self)
+
+    @classmethod
+    def from_call(cls, call: Call) -> "NativeCall":
+        node_class = NATIVE_CALL_CLASSES.get(len(call.params), NativeCall)
+        return node_class(call.callee, call.params)
+
+    def specialize(self, func: Value) -> tuple | None:
+        if type(func) is not NativeFunction or not func.accepts(len(self.params)):
+            return None
+        cache = self.cache = (func, func.function, func.signature(len(self.params)))
+        return cache
+
+    def eval(self, ctx: Ctx):
+        func = self.callee.eval(ctx)
+        args = [p.eval(ctx) for p in self.params]
+        native, function, types = self.cache
+        if func is not native:
+            cache = self.specialize(func)
+            if cache is None:
+                return call_value(func, args)
+            native, function, types = cache
+        for i, expected in enumerate(types):
+            if type(args[i]) is not expected:
+                args[i] = native.check_arg(i, flatten(args[i]))
+        return function(*args)
+
+
+@dataclass
+class NativeCall0(NativeCall):
+    callee: Expr
+    params: list[Expr]
+
+    def eval(self, ctx: Ctx):
+        func = self.callee.eval(ctx)
+        native, function, _ = self.cache
+        if func is not native:
+            cache = self.specialize(func)
+            if cache is None:
+                return call_value(func, [])
+            function = cache[1]
+        return function()
+
+
+@dataclass
+class NativeCall1(NativeCall):
+    callee: Expr
+    params: list[Expr]
+
+    def eval(self, ctx: Ctx):
+        func = self.callee.eval(ctx)
+        arg = self.params[0].eval(ctx)
+        native, function, types = self.cache
+        if func is not native:
+            cache = self.specialize(func)
+            if cache is None:
+                return call_value(func, [arg])
+            native, function, types = cache
+        if type(arg) is not types[0]:
+            arg = native.check_arg(0, flatten(arg))
+        return function(arg)
+
+
+@dataclass
+class NativeCall2(NativeCall):
+    callee: Expr
+    params: list[Expr]
+
+    def eval(self, ctx: Ctx):
+        func = self.callee.eval(ctx)
+        first = self.params[0].eval(ctx)
+        second = self.params[1].eval(ctx)
+        native, function, types = self.cache
+        if func is not native:
+            cache = self.specialize(func)
+            if cache is None:
+                return call_value(func, [first, second])
+            native, function, types = cache
+        if type(first) is not types[0]:
+            first = native.check_arg(0, flatten(first))
+        if type(second) is not types[1]:
+            second = native.check_arg(1, flatten(second))
+        return function(first, second)
+
+
+NATIVE_CALL_CLASSES = {0: NativeCall0, 1: NativeCall1, 2: NativeCall2}
+
+
+@dataclass
+class CountedLoop(Stmt):
+    """
+    Laço `for` canônico com contador numérico.
+
+    Ex.: for (var i = 0; i < n; i = i + 1) body
+
+    O contador é mantido como um float do Python e copiado para o escopo do
+    laço a cada iteração, de modo que o corpo continua lendo `i` normalmente.
+    O otimizador só produz este nó se o corpo e o limite não atribuem o
+    contador nem o capturam em funções ou classes, e se o corpo não é uma
+    declaração, já que ele executa no mesmo escopo a cada iteração.
+    """
+
+    name: str
+    start: Expr
+    op: Callable[[Value, Value], Value]
+    bound: Expr
+    step: float
+    body: Stmt
+
+    NATIVE_OPS = {
+        ops.lt: operator.lt,
+        ops.le: operator.le,
+        ops.gt: operator.gt,
+        ops.ge: operator.ge,
+    }
+
+    def eval(self, ctx: Ctx):
+        scope: dict[str, Value] = {}
+        ctx = ctx.push(scope)
+        i = self.start.eval(ctx)
+        scope[self.name] = i
+
+        name, bound, step, body = self.name, self.bound, self.step, self.body
+        compare = self.NATIVE_OPS[self.op]
+        meter = METER.get()
+        while True:
+            limit = bound.eval(ctx)
+            if type(i) is not float or type(limit) is not float:
+                # Reproduz o erro de tipos da comparação original
+                if not truthy(self.op(i, limit)):
+                    break
+            elif not compare(i, limit):
+                break
+            body.eval(ctx)
+            i += step
+            scope[name] = i
+            if meter is not None:
+                meter.step()
+
+    async def aeval(self, ctx: Ctx):
+        scope: dict[str, Value] = {}
+        ctx = ctx.push(scope)
+        i = await self.start.aeval(ctx)
+        scope[self.name] = i
+
+        name, bound, step, body = self.name, self.bound, self.step, self.body
+        compare = self.NATIVE_OPS[self.op]
+        scheduler = SCHEDULER.get()
+        meter = METER.get()
+        while True:
+            limit = await bound.aeval(ctx)
+            if type(i) is not float or type(limit) is not float:
+                if not truthy(self.op(i, limit)):
+                    break
+            elif not compare(i, limit):
+                break
+            await body.aeval(ctx)
+            i += step
+            scope[name] = i
+            if meter is not None:
+                meter.step()
+            if scheduler is not None and scheduler.tick():
+                await asyncio.sleep(0)
+
+
+@dataclass
+class CompareTest(Expr):
+    """
+    Comparação usada como condição de desvio.
+
+    Retorna diretamente um bool do Python. Quando os dois operandos são
+    números, compara-os com o operador nativo; caso contrário, delega ao
+    operador do Lox, que produz as mesmas mensagens de erro.
+    """
+
+    left: Expr
+    right: Expr
+    ops: Callable[[Value, Value], Value]
+
+    NATIVE_OPS = {
+        **CountedLoop.NATIVE_OPS,
+        ops.eq: operator.eq,
+        ops.ne: operator.ne,
+    }
+
+    def __post_init__(self):
+        self.native = self.NATIVE_OPS[self.ops]
+
+    def eval(self, ctx: Ctx):
+        left = self.left.eval(ctx)
+        right = self.right.eval(ctx)
+        if type(left) is float and type(right) is float:
+            return self.native(left, right)
+        return self.ops(left, right)
+
+    async def aeval(self, ctx: Ctx):
+        if runs_sync(self):
+            return self.eval(ctx)
+        left = await self.left.aeval(ctx)
+        right = await self.right.aeval(ctx)
+        if type(left) is float and type(right) is float:
+            return self.native(left, right)
+        return self.ops(left, right)
+
+
+@dataclass
+class AndTest(Expr):
+    """Conjunção de duas condições com curto-circuito."""
+
+    left: Expr
+    right: Expr
+
+    def eval(self, ctx: Ctx):
+        return self.left.eval(ctx) and self.right.eval(ctx)
+
+    async def aeval(self, ctx: Ctx):
+        return await self.left.aeval(ctx) and await self.right.aeval(ctx)
+
+
+@dataclass
+class OrTest(Expr):
+    """Disjunção de duas condições com curto-circuito."""
+
+    left: Expr
+    right: Expr
+
+    def eval(self, ctx: Ctx):
+        return self.left.eval(ctx) or self.right.eval(ctx)
+
+    async def aeval(self, ctx: Ctx):
+        return await self.left.aeval(ctx) or await self.right.aeval(ctx)
+
+
+@dataclass
+class NotTest(Expr):
+    """Negação de uma condição."""
+
+    operand: Expr
+
+    def eval(self, ctx: Ctx):
+        return not self.operand.eval(ctx)
+
+    async def aeval(self, ctx: Ctx):
+        return not await self.operand.aeval(ctx)
+
+
+@dataclass
+class TruthyTest(Expr):
+    """Converte o valor de uma expressão qualquer para bool."""
+
+    expr: Expr
+
+    def eval(self, ctx: Ctx):
+        value = self.expr.eval(ctx)
+        return value is not None and value is not False
+
+    async def aeval(self, ctx: Ctx):
+        value = await self.expr.aeval(ctx)
+        return value is not None and value is not False
+
+
+@dataclass
+class BranchIf(If):
+    """
+    `If` cuja condição é uma das condições de desvio acima, que já
+    produzem um bool do Python.
+    """
+
+    cond: Expr
+    then_branch: Stmt
+    else_branch: Stmt | None = None
+
+    def eval(self, ctx: Ctx):
+        if self.cond.eval(ctx):
+            self.then_branch.eval(ctx)
+        elif self.else_branch is not None:
+            self.else_branch.eval(ctx)
+
+    async def aeval(self, ctx: Ctx):
+        if runs_sync(self):
+            return self.eval(ctx)
+        if await self.cond.aeval(ctx):
+            await self.then_branch.aeval(ctx)
+        elif self.else_branch is not None:
+            await self.else_branch.aeval(ctx)
+
+
+@dataclass
+class BranchWhile(While):
+    """
+    `While` cuja condição é uma das condições de desvio acima, que já
+    produzem um bool do Python.
+    """
+
+    cond: Expr
+    body: Stmt
+
+    def eval(self, ctx: Ctx):
+        cond = self.cond
+        body = self.body
+        meter = METER.get()
+        while cond.eval(ctx):
+            body.eval(ctx)
+            if meter is not None:
+                meter.step()
+
+    async def aeval(self, ctx: Ctx):
+        scheduler = SCHEDULER.get()
+        meter = METER.get()
+        while await self.cond.aeval(ctx):
+            await self.body.aeval(ctx)
+            if meter is not None:
+                meter.step()
+            if scheduler is not None and scheduler.tick():
+                await asyncio.sleep(0)
+
+
+def inline_expr(function: "Function") -> Expr:
+    """
+    Expressão equivalente ao corpo de uma função com um único `return`.
+    """
+    match function.body.stmts:
+        case []:
+            return Literal(None)
+        case [Return(value=None)]:
+            return Literal(None)
+        case [Return(value=value)]:
+            return value
+    raise ValueError(f"função {function.name} não consiste de um único return")
+
+
+def call_value(func: Value, args: list[Value]) -> Value:
+    """
+    Chama uma função Lox, classe ou função nativa.
+
+    Funções nativas sempre recebem strings comuns do Python, nunca ropes.
+    """
+    if isinstance(func, (LoxFunction, LoxClass)):
+        return func(*args)
+    if type(func) is NativeFunction:
+        types = func.signatures.get(len(args))
+        if types is None:
+            types = func.signature(len(args))
+        i = 0
+        for expected in types:
+            if type(args[i]) is not expected:
+                args[i] = func.check_arg(i, flatten(args[i]))
+            i += 1
+        return func.function(*args)
+    if callable(func):
+        return func(*[flatten(arg) for arg in args])
+    raise TypeError(f"{func!r} não é chamável")
+
+
+async def acall_value(func: Value, args: list[Value]) -> Value:
+    """
+    Versão assíncrona de `call_value`.
+
+    Funções e classes Lox executam o corpo com `aeval`, funções nativas
+    assíncronas são aguardadas, assim como os awaitables retornados por
+    funções Python comuns.
+    """
+    if isinstance(func, (LoxFunction, LoxClass)):
+        return await func.acall(args)
+    if type(func) is NativeFunction and func.coroutine is not None:
+        args = [flatten(arg) for arg in args]
+        func.check(args)
+        return await func.coroutine(*args)
+    result = call_value(func, args)
+    if inspect.isawaitable(result):
+        result = await result
+    return result
+
+
+def runs_sync(node: Node) -> bool:
+    """
+    Verifica se o nó não contém pontos de preempção (laços ou chamadas).
+
+    Nós assim são avaliados por `aeval` com o `eval` síncrono. O resultado
+    fica guardado no próprio nó.
+    """
+    try:
+        return node.__dict__["_runs_sync"]
+    except KeyError:
+        pass
+    sync = not any(isinstance(n, (Call, While, CountedLoop)) for n in node.descendants())
+    node.__dict__["_runs_sync"] = sync
+    return sync
+
+
+def write_output(ctx: Ctx, text: str) -> None:
+    """
+    Escreve a saída de um `print` no buffer da execução corrente ou, fora de
+    `execute`, diretamente no fluxo de saída do contexto.
+    """
+    output = OUTPUT.get()
+    if output is not None:
+        output.write(text)
+    else:
+        (ctx.stdout() or sys.stdout).write(text)
+
+
+def get_attribute(value: Value, attr: str) -> Value:
+    """
+    Acesso a atributo com a mesma semântica de `Getattr.eval`.
+    """
+    if (
+        value is None
+        or type(value) in (bool, float, str, Rope)
+        or isinstance(value, (LoxClass, LoxFunction, NativeValue))
+    ):
+        raise not_an_instance(value, "Somente instâncias têm propriedades.")
+    return getattr(value, attr)
+
+
+def not_an_instance(value: Value, msg: str) -> LoxError:
+    """
+    Erro para acesso a atributos de valores que não são instâncias.
+
+    Valores nativos (arrays, listas e maps) recebem uma dica sobre as funções
+    que os manipulam.
+    """
+    if isinstance(value, NativeValue):
+        hint = f"{value.type_name} é um valor nativo; use as funções {value.prefix}_*."
+        return LoxError(f"{msg.removesuffix('.')}: {hint}")
+    return LoxError(msg)
+
+
 def is_return_instr(obj: Instr | Label) -> bool:
     if isinstance(obj, Label):
         return False
@@ -0,0 +1,328 @@
+"""
+Execução reprodutível dos benchmarks de `exemplos/benchmark`.
+
+Os programas de benchmark medem o próprio tempo com `clock()` e imprimem
+números avulsos. `lox bench` executa cada um várias vezes, cada repetição
+num processo Python novo, e resume os tempos e a memória:
+
+    $ lox bench                                   # exemplos/benchmark/*.lox
+    $ lox bench exemplos/benchmark/fib.lox -n 10 --warmup 2
+    $ lox bench --json novo.json --compare antigo.json
+    $ lox bench --engine ast --engine opt         # compara dois motores
+
+Em cada processo, o programa é compilado, executado `warmup` vezes sem
+medição e então uma vez com medição. O tempo medido inclui apenas a
+execução; a saída do programa é descartada. A memória é o pico do conjunto
+residente do processo (ru_maxrss), que inclui o interpretador Python.
+
+Comparações usam a mediana dos tempos. Uma diferença maior que o limite
+(`--threshold`, em porcentagem) é uma regressão ou uma melhora, e
+`lox bench` termina com status 1 se houver alguma regressão.
+"""
+
+import asyncio
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+from contextlib import redirect_stdout
+from dataclasses import asdict, dataclass, field
+from pathlib import Path
+from time import perf_counter_ns
+
+from . import program
+from .errors import LoxError
+from .optimizer import Options
+
+# Diretório padrão dos benchmarks, relativo ao diretório atual
+BENCHMARK_DIR = Path("exemplos") / "benchmark"
+
+# Formas de executar um programa. Veja `run_engine`.
+ENGINES = {
+    "ast": "interpretador da árvore sintática, sem otimizações",
+    "opt": "interpretador da árvore sintática, com todas as otimizações (-O)",
+    "async": "execução assíncrona de lox.eval_async, sem otimizações",
+}
+
+DEFAULT_REPEAT = 5
+DEFAULT_WARMUP = 1
+
+# Diferença relativa entre medianas considerada significativa, em porcentagem
+DEFAULT_THRESHOLD = 5.0
+
+HEADER = (
+    f"{'benchmark':<18} {'motor':<6} {'mediana':>13} {'média':>13} "
+    f"{'desvio':>12} {'memória':>12}"
+)
+
+
+@dataclass
+class Result:
+    """
+    Medições de um benchmark num motor. Tempos em segundos e memória em bytes.
+    """
+
+    name: str
+    engine: str
+    times: list[float] = field(default_factory=list)
+    peak_memory: int = 0
+
+    @property
+    def mean(self) -> float:
+        return statistics.fmean(self.times)
+
+    @property
+    def median(self) -> float:
+        return statistics.median(self.times)
+
+    @property
+    def stdev(self) -> float:
+        return statistics.stdev(self.times) if len(self.times) > 1 else 0.0
+
+    def to_json(self) -> dict:
+        data = asdict(self)
+        data.update(mean=self.mean, median=self.median, stdev=self.stdev)
+        return data
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Result":
+        return cls(data["name"], data["engine"], data["times"], data["peak_memory"])
+
+
+@dataclass
+class Comparison:
+    """
+    Comparação das medianas de um benchmark entre duas execuções.
+    """
+
+    base: Result
+    new: Result
+    threshold: float = DEFAULT_THRESHOLD
+
+    @property
+    def change(self) -> float:
+        """
+        Variação relativa da mediana, em porcentagem.
+        """
+        return (self.new.median / self.base.median - 1) * 100
+
+    @property
+    def verdict(self) -> str:
+        if self.change > self.threshold:
+            return "regressão"
+        if self.change < -self.threshold:
+            return "melhora"
+        return "igual"
+
+
+def find_benchmarks(paths: list[str]) -> list[Path]:
+    """
+    Arquivos .lox dados na linha de comando. Diretórios são substituídos
+    pelos arquivos .lox que contêm. Sem argumentos, usa `BENCHMARK_DIR`.
+    """
+    files = []
+    for path in map(Path, paths or [BENCHMARK_DIR]):
+        if path.is_dir():
+            files.extend(sorted(path.glob("*.lox")))
+        elif path.exists():
+            files.append(path)
+        else:
+            raise LoxError(f"Arquivo {path} não encontrado.")
+    if not files:
+        raise LoxError("Nenhum benchmark encontrado.")
+    return files
+
+
+def measure(path: Path, engine: str, warmup: int = DEFAULT_WARMUP) -> tuple[float, int]:
+    """
+    Executa o benchmark num processo novo e retorna o tempo da execução
+    medida e o pico de memória do processo.
+    """
+    root = str(Path(__file__).parent.parent)
+    pythonpath = os.environ.get("PYTHONPATH")
+    env = {**os.environ, "PYTHONPATH": root + os.pathsep + pythonpath if pythonpath else root}
+    command = [sys.executable, "-m", "lox.bench", engine, str(warmup), str(path)]
+    done = subprocess.run(command, capture_output=True, text=True, env=env)
+    if done.returncode != 0:
+        error = done.stderr.strip().splitlines()[-1:] or [f"status {done.returncode}"]
+        raise LoxError(f"Benchmark {path} falhou no motor {engine}: {error[0]}")
+    data = json.loads(done.stdout)
+    return data["seconds"], data["peak_memory"]
+
+
+def bench(
+    paths: list[Path],
+    engines: list[str],
+    repeat: int = DEFAULT_REPEAT,
+    warmup: int = DEFAULT_WARMUP,
+    verbose: bool = False,
+) -> list[Result]:
+    """
+    Mede cada benchmark em cada motor, com `repeat` processos por par.
+
+    Se `verbose` for verdadeiro, imprime cada resultado assim que termina.
+    """
+    results = []
+    for path in paths:
+        for engine in engines:
+            result = Result(path.stem, engine)
+            for _ in range(repeat):
+                seconds, memory = measure(path, engine, warmup)
+                result.times.append(seconds)
+                result.peak_memory = max(result.peak_memory, memory)
+            if verbose:
+                print(format_result(result), flush=True)
+            results.append(result)
+    return results
+
+
+def compare(
+    base: list[Result],
+    new: list[Result],
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[Comparison]:
+    """
+    Compara os resultados com o mesmo nome e motor nas duas listas.
+    """
+    index = {(result.name, result.engine): result for result in base}
+    return [
+        Comparison(index[key], result, threshold)
+        for result in new
+        if (key := (result.name, result.engine)) in index
+    ]
+
+
+def compare_engines(
+    results: list[Result],
+    base: str,
+    new: str,
+    threshold: float = DEFAULT_THRESHOLD,
+) -> list[Comparison]:
+    """
+    Compara, para cada benchmark, o motor `new` com o motor `base`.
+    """
+    index = {result.name: result for result in results if result.engine == base}
+    return [
+        Comparison(index[result.name], result, threshold)
+        for result in results
+        if result.engine == new and result.name in index
+    ]
+
+
+def save(path: str, results: list[Result], repeat: int, warmup: int) -> None:
+    data = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": repeat,
+        "warmup": warmup,
+        "results": [result.to_json() for result in results],
+    }
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(data, file, indent=2)
+        file.write("\n")
+
+
+def load(path: str) -> list[Result]:
+    try:
+        with open(path, encoding="utf-8") as file:
+            data = json.load(file)
+    except FileNotFoundError:
+        raise LoxError(f"Arquivo {path} não encontrado.")
+    return [Result.from_json(item) for item in data["results"]]
+
+
+def format_result(result: Result) -> str:
+    return (
+        f"{result.name:<18} {result.engine:<6} "
+        f"{result.median * 1e3:10.1f} ms {result.mean * 1e3:10.1f} ms "
+        f"{result.stdev * 1e3:9.1f} ms {result.peak_memory / 2**20:8.1f} MiB"
+    )
+
+
+def format_comparisons(comparisons: list[Comparison]) -> str:
+    out = [f"{'benchmark':<18} {'motor':<13} {'antes':>13} {'depois':>13} {'variação':>9}"]
+    for item in comparisons:
+        engine = item.new.engine
+        if item.base.engine != engine:
+            engine = f"{item.base.engine}→{engine}"
+        out.append(
+            f"{item.new.name:<18} {engine:<13} "
+            f"{item.base.median * 1e3:10.1f} ms {item.new.median * 1e3:10.1f} ms "
+            f"{item.change:+8.1f}%  {item.verdict}"
+        )
+    return "\n".join(out)
+
+
+def main(args) -> int:
+    """
+    Executa `lox bench` com os argumentos de `cli.make_bench_argparser` e
+    retorna o status de saída.
+    """
+    engines = args.engine or ["ast"]
+    paths = find_benchmarks(args.paths)
+    print(HEADER)
+    results = bench(paths, engines, args.repeat, args.warmup, verbose=True)
+    if args.json:
+        save(args.json, results, args.repeat, args.warmup)
+
+    comparisons = []
+    if args.compare:
+        comparisons = compare(load(args.compare), results, args.threshold)
+    elif len(engines) > 1:
+        for engine in engines[1:]:
+            comparisons += compare_engines(results, engines[0], engine, args.threshold)
+    if comparisons:
+        print()
+        print(format_comparisons(comparisons))
+    return int(any(item.verdict == "regressão" for item in comparisons))
+
+
+def run_engine(engine: str, source: str, warmup: int) -> float:
+    """
+    Executa o programa `warmup` vezes e depois mais uma, medida. Retorna o
+    tempo da última execução em segundos.
+    """
+    compiled = program.compile(source, Options.full() if engine == "opt" else None)
+
+    def run():
+        if engine == "async":
+            asyncio.run(compiled.run_async())
+        else:
+            compiled.run()
+
+    with redirect_stdout(io.StringIO()):
+        for _ in range(warmup):
+            run()
+        start = perf_counter_ns()
+        run()
+        return (perf_counter_ns() - start) / 1e9
+
+
+def peak_memory() -> int:
+    """
+    Pico do conjunto residente do processo, em bytes.
+    """
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+def worker(argv: list[str]) -> None:
+    """
+    Processo filho de `measure`: executa um benchmark e imprime o resultado
+    em JSON.
+    """
+    engine, warmup, path = argv
+    if engine not in ENGINES:
+        raise LoxError(f"Motor desconhecido: {engine}")
+    source = Path(path).read_text(encoding="utf-8")
+    seconds = run_engine(engine, source, int(warmup))
+    print(json.dumps({"seconds": seconds, "peak_memory": peak_memory()}))
+
+
+if __name__ == "__main__":
+    worker(sys.argv[1:])
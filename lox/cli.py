@@ -13,13 +13,25 @@ padrão do Python e não requer instalação de dependências externas.
 """
 
 import argparse
+import sys
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
 
 from lark import Token
 
+from . import bench
 from . import eval as lox_eval
-from .ctx import Ctx
+from .ctx import BUILTINS, Ctx
+from .errors import LoxError
+from .memstats import MemoryStats
+from .optimizer import Options, Report, memo_stats, optimize
 from .parser import lex, parse, parse_cst, parse_expr
+from .profiler import SAMPLE_INTERVAL, Profiler, SamplingProfiler
+from .runtime import Budget, BudgetExceeded
 from .runtime import show_repr as lox_repr
+from .server import DEFAULT_SOCKET, DEFAULT_TIMEOUT, run_remote, serve
+from .timings import Timings, phase
 
 
 def make_argparser():
@@ -58,23 +70,235 @@ def make_argparser():
         action="store_true",
         help="Mostra o código fonte do arquivo de entrada.",
     )
+    parser.add_argument(
+        "-O",
+        "--optimize",
+        action="store_true",
+        help="Habilita as otimizações da árvore sintática.",
+    )
+    parser.add_argument(
+        "--opt-report",
+        action="store_true",
+        help="Mostra as transformações realizadas pelo otimizador.",
+    )
+    parser.add_argument(
+        "--memoize",
+        action="store_true",
+        help="Memoiza funções puras e mostra estatísticas dos caches ao final.",
+    )
+    parser.add_argument(
+        "--memo-size",
+        type=int,
+        default=128,
+        help="Número máximo de entradas no cache de cada função memoizada.",
+    )
+    parser.add_argument(
+        "--intern",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Interna strings de até N caracteres produzidas durante a execução.",
+    )
+    parser.add_argument(
+        "--max-steps",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Interrompe o script após N iterações de laços e chamadas de funções.",
+    )
+    parser.add_argument(
+        "--max-depth",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Limita a profundidade de chamadas de funções aninhadas.",
+    )
+    parser.add_argument(
+        "--max-instances",
+        type=int,
+        default=None,
+        metavar="N",
+        help="Limita o número de instâncias de classes criadas.",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=None,
+        metavar="SEGUNDOS",
+        help="Interrompe o script após o tempo dado.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Mede o custo de cada função e linha e mostra uma tabela ao final.",
+    )
+    parser.add_argument(
+        "--sample-profile",
+        action="store_true",
+        help="Amostra a pilha de funções Lox periodicamente, com custo baixo, "
+        "e mostra uma tabela ao final.",
+    )
+    parser.add_argument(
+        "--sample-interval",
+        type=float,
+        default=SAMPLE_INTERVAL * 1000,
+        metavar="MS",
+        help="Intervalo entre amostras de --sample-profile, em milissegundos de CPU.",
+    )
+    parser.add_argument(
+        "--profile-out",
+        default=None,
+        metavar="ARQUIVO",
+        help="Arquivo de pilhas colapsadas gerado por --profile ou --sample-profile "
+        "(padrão: nome do script com extensão .collapsed).",
+    )
+    parser.add_argument(
+        "--timings",
+        action="store_true",
+        help="Mostra o tempo de cada fase, da leitura do arquivo à execução.",
+    )
+    parser.add_argument(
+        "--mem-stats",
+        action="store_true",
+        help="Conta as alocações e os objetos vivos de cada tipo do interpretador "
+        "e mostra as linhas que mais alocam ao final.",
+    )
+    parser.add_argument(
+        "--line-buffered",
+        action="store_true",
+        help="Escreve cada linha impressa imediatamente. É o padrão quando a "
+        "saída é um terminal.",
+    )
+    parser.add_argument(
+        "--server",
+        action="store_true",
+        help="Executa o script num servidor `lox serve`, se houver um escutando.",
+    )
+    parser.add_argument(
+        "--socket",
+        default=DEFAULT_SOCKET,
+        help="Socket do servidor usado por --server.",
+    )
+    return parser
+
+
+def make_serve_argparser():
+    parser = argparse.ArgumentParser(
+        prog="lox serve",
+        description="Executa scripts Lox recebidos por um socket Unix.",
+    )
+    parser.add_argument(
+        "--socket",
+        default=DEFAULT_SOCKET,
+        help="Caminho do socket Unix.",
+    )
+    parser.add_argument(
+        "-w",
+        "--workers",
+        type=int,
+        default=None,
+        help="Número de processos do pool (padrão: número de CPUs).",
+    )
+    parser.add_argument(
+        "--timeout",
+        type=float,
+        default=DEFAULT_TIMEOUT,
+        help="Tempo máximo de execução de cada script, em segundos.",
+    )
     return parser
 
 
-def main():
+def make_bench_argparser():
+    parser = argparse.ArgumentParser(
+        prog="lox bench",
+        description="Executa benchmarks em processos isolados e resume os tempos.",
+    )
+    parser.add_argument(
+        "paths",
+        nargs="*",
+        metavar="ARQUIVO",
+        help=f"Arquivos .lox ou diretórios (padrão: {bench.BENCHMARK_DIR}).",
+    )
+    parser.add_argument(
+        "-n",
+        "--repeat",
+        type=int,
+        default=bench.DEFAULT_REPEAT,
+        help="Número de repetições, cada uma num processo novo.",
+    )
+    parser.add_argument(
+        "--warmup",
+        type=int,
+        default=bench.DEFAULT_WARMUP,
+        help="Execuções não medidas em cada processo antes da execução medida.",
+    )
+    parser.add_argument(
+        "--engine",
+        action="append",
+        choices=bench.ENGINES,
+        help="Motor de execução (padrão: ast). Com mais de um motor, compara "
+        "os demais com o primeiro.",
+    )
+    parser.add_argument(
+        "--json",
+        metavar="ARQUIVO",
+        help="Salva os resultados em JSON.",
+    )
+    parser.add_argument(
+        "--compare",
+        metavar="ARQUIVO",
+        help="Compara os resultados com os de um JSON salvo por --json.",
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=bench.DEFAULT_THRESHOLD,
+        metavar="PORCENTAGEM",
+        help="Variação da mediana acima da qual há uma regressão ou melhora.",
+    )
+    return parser
+
+
+def main(argv: list[str] | None = None):
     """
     Função principal que cria a interface de linha de comando (CLI) para o compilador Lox.
+
+    Aceita os subcomandos `lox serve`, `lox bench` e `lox run ARQUIVO`, sendo
+    este último equivalente a `lox ARQUIVO`.
     """
+    if argv is None:
+        argv = sys.argv[1:]
+    if argv[:1] == ["serve"]:
+        args = make_serve_argparser().parse_args(argv[1:])
+        try:
+            return serve(args.socket, args.workers, args.timeout)
+        except LoxError as e:
+            print(e, file=sys.stderr)
+            exit(1)
+    if argv[:1] == ["bench"]:
+        args = make_bench_argparser().parse_args(argv[1:])
+        try:
+            status = bench.main(args)
+        except LoxError as e:
+            print(e, file=sys.stderr)
+            exit(1)
+        if status:
+            exit(status)
+        return
+    if argv[:1] == ["run"]:
+        argv = argv[1:]
+
     parser = make_argparser()
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
 
     # Inicia o repl, se requisitado
     if args.file == "repl":
         return repl()
 
     # Lê arquivo de entrada
+    timings = Timings() if args.timings else None
     try:
-        with open(args.file, "r") as f:
+        with phase(timings, "read"), open(args.file, "r") as f:
             source = f.read()
     except FileNotFoundError:
         print(f"Arquivo {args.file} não encontrado.")
@@ -90,16 +314,148 @@ def main():
         print_color("=" * line_len, "blue")
         print()
 
+    if args.server and not (args.ast or args.cst or args.lex):
+        run_on_server(source, args)
+
     if not args.ast and not args.cst and not args.lex:
+        options = make_options(args)
+        builtins = BUILTINS.copy()
+        builtins.line_buffering = args.line_buffered or sys.stdout.isatty()
+        builtins.intern_max_length = args.intern
+        ctx = Ctx.from_dict({}, builtins)
         try:
-            lox_eval(source)
+            with memory_stats(args, source):
+                report = Report()
+                ast = parse(source, report, timings)
+                if options is not None:
+                    with phase(timings, "optimize"):
+                        optimize(ast, options, report)
+                if args.opt_report:
+                    print(report, file=sys.stderr)
+                with profiling(args, source):
+                    budget = make_budget(args)
+                    lox_eval(ast, ctx, skip_validation=True, budget=budget, timings=timings)
+        except BudgetExceeded as e:
+            if args.pm:
+                on_error(e, args.pm)
+            # A mensagem já foi impressa por `execute`
+            exit(1)
         except Exception as e:
             on_error(e, args.pm)
+        finally:
+            if args.memoize:
+                print_memo_stats(ctx)
+            if timings is not None:
+                print(timings, file=sys.stderr)
 
     else:
         debug_source(source, args)
 
 
+def run_on_server(source: str, args):
+    """
+    Executa o script no servidor e termina o processo com o status dele.
+
+    Retorna sem fazer nada se não houver servidor escutando ou se alguma
+    opção pedida só funciona localmente, e o script é executado no próprio
+    processo.
+    """
+    if args.memoize or args.opt_report or args.pm or args.intern:
+        return
+    if args.profile or args.sample_profile or args.timings or args.mem_stats:
+        return
+    if any(limit is not None for limit in (args.max_steps, args.max_depth, args.max_instances)):
+        return
+    response = run_remote(source, args.socket, optimize=args.optimize, timeout=args.timeout)
+    if response is None:
+        return
+    sys.stdout.write(response.stdout)
+    sys.stderr.write(response.stderr)
+    exit(response.status)
+
+
+def make_options(args) -> Options | None:
+    """
+    Cria as opções do otimizador a partir dos argumentos da linha de comando.
+
+    Os profilers atribuem o tempo às chamadas de funções Lox, por isso a
+    expansão de chamadas fica desligada com --profile e --sample-profile.
+    """
+    if not (args.optimize or args.memoize or args.opt_report):
+        return None
+    if args.optimize:
+        inline = not (args.profile or args.sample_profile)
+        return Options.full(memoize=args.memoize, memo_size=args.memo_size, inline=inline)
+    return Options(memoize=args.memoize, memo_size=args.memo_size)
+
+
+@contextmanager
+def profiling(args, source: str) -> Iterator[None]:
+    """
+    Executa o bloco sob o `Profiler` ou o `SamplingProfiler`, se --profile ou
+    --sample-profile foi pedido.
+
+    A tabela vai para a saída de erro e as pilhas colapsadas para o arquivo
+    de --profile-out, mesmo se o programa terminar com um erro.
+    """
+    if args.profile:
+        profiler = Profiler()
+    elif args.sample_profile:
+        profiler = SamplingProfiler(args.sample_interval / 1000)
+    else:
+        yield
+        return
+
+    try:
+        with profiler:
+            yield
+    finally:
+        path = args.profile_out or Path(args.file).stem + ".collapsed"
+        profiler.write_collapsed(path)
+        print(profiler.report(source), file=sys.stderr)
+        print(f"Pilhas colapsadas salvas em {path}", file=sys.stderr)
+
+
+@contextmanager
+def memory_stats(args, source: str) -> Iterator[None]:
+    """
+    Executa o bloco sob `MemoryStats`, se --mem-stats foi pedido, e mostra
+    o relatório na saída de erro, mesmo se o programa terminar com um erro.
+    """
+    if not args.mem_stats:
+        yield
+        return
+
+    stats = MemoryStats()
+    try:
+        with stats:
+            yield
+    finally:
+        print(stats.report(source), file=sys.stderr)
+
+
+def make_budget(args) -> Budget | None:
+    """
+    Cria o orçamento de execução a partir dos argumentos da linha de comando.
+    """
+    limits = (args.max_steps, args.max_depth, args.max_instances, args.timeout)
+    if all(limit is None for limit in limits):
+        return None
+    return Budget(*limits)
+
+
+def print_memo_stats(ctx: Ctx):
+    """
+    Imprime as estatísticas de cache das funções memoizadas na saída de erro.
+    """
+    for name, info in memo_stats(ctx).items():
+        print(
+            f"{name}: hits={info.hits} misses={info.misses} "
+            f"evictions={info.evictions} size={info.currsize}/{info.maxsize}",
+            file=sys.stderr,
+        )
+
+
 def debug_source(source: str, args):
     """
     Mostra informações de depuração sobre o código Lox passado como argumento.
@@ -154,7 +510,9 @@ def repl():
             return parse(src)
 
     print("Iniciando REPL do Lox. Digite 'exit' para sair.")
-    ctx = Ctx.from_dict({})
+    builtins = BUILTINS.copy()
+    builtins.line_buffering = True
+    ctx = Ctx.from_dict({}, builtins)
     while True:
         source = ask()
         if source.strip().lower() == "exit":
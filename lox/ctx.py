@@ -1,30 +1,124 @@
 import math
 import time
 from dataclasses import field, dataclass
-from typing import TYPE_CHECKING, Iterator, Optional, TypeVar, cast
+from typing import TYPE_CHECKING, Callable, Iterator, Optional, TextIO, TypeVar, cast
+
+from .natives import ARRAY_BUILTINS, COLLECTION_BUILTINS, NativeFunction
 
 T = TypeVar("T")
 ScopeDict = dict[str, "Value"]
 
+# Tamanho padrão do buffer de saída dos comandos `print`, em caracteres
+OUTPUT_BUFFER_SIZE = 8192
+
+def flush() -> None:
+    """
+    Escreve a saída bufferizada da execução corrente (veja
+    `lox.runtime.Output`).
+    """
+    from .runtime import OUTPUT  # import tardio: runtime depende deste módulo
+
+    output = OUTPUT.get()
+    if output is not None:
+        output.flush()
+
 def read_number(msg: str) -> float:
+    # A pergunta deve aparecer depois do que o programa já imprimiu
+    flush()
     try:
         return float(input(msg))
     except ValueError:
         print("Digite um número válido!")
         return read_number(msg)
 
+def is_even(n: float) -> bool:
+    return n % 2 == 0.0
+
 class _Builtins(dict):
+    """
+    Registro das funções nativas disponíveis para os programas.
+
+    O registro global `BUILTINS` é apenas um modelo: cada contexto global
+    criado por `Ctx()` ou `Ctx.from_dict()` recebe uma cópia própria, de modo
+    que programas executados em paralelo nunca compartilham o registro. Para
+    acrescentar funções a um único interpretador, use `Interpreter.register`
+    ou crie uma cópia com `BUILTINS.copy()`, registre as funções nela e
+    passe-a para `Ctx.from_dict(env, builtins=...)`.
+
+    O registro fica no escopo mais externo e também guarda o fluxo de saída
+    dos comandos `print` e as opções do seu buffer (veja `Ctx.stdout` e
+    `lox.runtime.Output`), a política de internação de strings e os caches
+    da conversão de valores em texto (veja `lox.runtime.REGISTRY`).
+    """
+
+    # Fluxo de saída do `print`. None usa o sys.stdout do momento da escrita.
+    stdout: TextIO | None = None
+
+    # Tamanho do buffer de saída, em caracteres, e se cada linha é escrita
+    # imediatamente
+    buffer_size: int = OUTPUT_BUFFER_SIZE
+    line_buffering: bool = False
+
+    # Strings produzidas por concatenação com até este tamanho são internadas,
+    # de modo que `eq` as compare por identidade. Desabilitado por padrão, já
+    # que internar tem um custo em cada concatenação.
+    intern_max_length: int = 0
+
     # Algumas funções prontas que podem ser usadas direto nos programas
     BUILTINS: dict[str, "Value"] = {
-        "sqrt": math.sqrt,
-        "clock": time.time,
-        "max": max,
-        "read_number": read_number,
-        "is_even": lambda n: n % 2 == 0.0,
+        "sqrt": NativeFunction(math.sqrt, "sqrt", types=(float,), pure=True),
+        "clock": NativeFunction(time.time, "clock", arity=0),
+        "max": NativeFunction(max, "max", arity=(2, None), types=(float,), pure=True),
+        "read_number": NativeFunction(read_number, types=(str,)),
+        "is_even": NativeFunction(is_even, types=(float,), pure=True),
+        "flush": NativeFunction(flush, arity=0),
+        **ARRAY_BUILTINS,
+        **COLLECTION_BUILTINS,
     }
 
-    def __init__(self):
-        super().__init__(self.BUILTINS)
+    def __init__(self, entries: dict[str, "Value"] | None = None):
+        super().__init__(self.BUILTINS if entries is None else entries)
+        # Conversões de subclasses dos tipos de `lox.runtime.SHOW` já
+        # resolvidas e textos de floats inteiros já mostrados
+        self.show_functions: dict[type, Callable[["Value"], str]] = {}
+        self.integral_floats: dict[float, str] = {}
+
+    def copy(self) -> "_Builtins":
+        new = type(self)(self)
+        new.stdout = self.stdout
+        new.buffer_size = self.buffer_size
+        new.line_buffering = self.line_buffering
+        new.intern_max_length = self.intern_max_length
+        return new
+
+    def register(
+        self,
+        name: str | None = None,
+        *,
+        arity: int | tuple[int, int | None] | None = None,
+        types: tuple[type | None, ...] = (),
+        pure: bool = False,
+    ) -> Callable[[Callable], Callable]:
+        """
+        Decorador que registra uma função Python como função nativa.
+
+        Os argumentos são os mesmos de `NativeFunction`. A função decorada é
+        retornada sem modificações.
+        """
+
+        def decorator(function: Callable) -> Callable:
+            native = NativeFunction(function, name, arity=arity, types=types, pure=pure)
+            self[native.name] = native
+            return function
+
+        return decorator
+
+    def __reduce__(self):
+        # O registro global é serializado por referência, de modo que as
+        # funções nativas continuam idênticas às do processo que o recebe.
+        if self is BUILTINS:
+            return "BUILTINS"
+        return (type(self), (dict(self),))
 
     def __repr__(self) -> str:
         return "BUILTINS"
@@ -41,11 +135,19 @@ class Ctx:
     Pode ter um "pai", formando uma cadeia de escopos.
     """
     scope: ScopeDict = field(default_factory=dict)
-    parent: Optional["Ctx"] = field(default_factory=lambda: Ctx(BUILTINS, None))
+    parent: Optional["Ctx"] = field(default_factory=lambda: Ctx(BUILTINS.copy(), None))
 
     @classmethod
-    def from_dict(cls, env: ScopeDict) -> "Ctx":
-        return cls(env, Ctx(BUILTINS, None))
+    def from_dict(cls, env: ScopeDict, builtins: _Builtins | None = None) -> "Ctx":
+        """
+        Cria um contexto global com as variáveis dadas.
+
+        O escopo mais externo contém as funções nativas de `builtins`, ou uma
+        cópia do registro global `BUILTINS` se omitido.
+        """
+        if builtins is None:
+            builtins = BUILTINS.copy()
+        return cls(env, Ctx(builtins, None))
 
     def __getitem__(self, name: str) -> "Value":
         if name in self.scope:
@@ -130,6 +232,24 @@ class Ctx:
         """
         return Ctx(tos, self)
 
+    def stdout(self) -> TextIO | None:
+        """
+        Fluxo de saída dos comandos `print` executados neste contexto.
+
+        É lido do registro de funções nativas no escopo mais externo. None
+        indica o sys.stdout corrente.
+        """
+        return getattr(self.builtins(), "stdout", None)
+
+    def builtins(self) -> ScopeDict:
+        """
+        Escopo mais externo, que normalmente é um registro de funções nativas.
+        """
+        ctx = self
+        while ctx.parent is not None:
+            ctx = ctx.parent
+        return ctx.scope
+
     def is_global(self) -> bool:
         return self.parent is not None and self.parent.parent is None
 
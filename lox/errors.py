@@ -21,6 +21,12 @@ class SemanticError(Exception):
         self.token = token
 
 
+class LoxError(Exception):
+    """
+    Exceção para erros de execução Lox.
+    """
+
+
 class ForceReturn(Exception):
     """
     Exceção que serve para forçar uma função a retornar durante a avaliação
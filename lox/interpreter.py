@@ -0,0 +1,191 @@
+"""
+Interpretadores independentes.
+
+Um `Interpreter` reúne o estado que um programa Lox pode modificar ou
+observar: o registro de funções nativas, o fluxo de saída dos comandos
+`print`, a política de internação de strings, os caches da conversão de
+valores em texto e um cache de programas compilados. Interpretadores
+diferentes não compartilham nada mutável e podem ser usados em threads
+diferentes ao mesmo tempo:
+
+    >>> out = io.StringIO()
+    >>> interp = lox.Interpreter(stdout=out)
+    >>> @interp.register(types=(str,))
+    ... def shout(text):
+    ...     return text.upper()
+    >>> interp.eval('print shout("oi");')
+    >>> out.getvalue()
+    'OI\\n'
+
+`lox.eval()` continua funcionando como antes: cada chamada cria um contexto
+com uma cópia própria das funções nativas e escreve no sys.stdout.
+"""
+
+import threading
+from collections import OrderedDict
+from dataclasses import astuple
+from typing import Callable, TextIO
+
+from .ast import Value
+from .ctx import BUILTINS, OUTPUT_BUFFER_SIZE, Ctx, _Builtins
+from .node import Node
+from .optimizer import Options
+from .program import CompiledProgram, compile
+from .runtime import YIELD_INTERVAL, Budget
+from .timings import Timings
+from .tracing import Tracer
+
+# Número de programas compilados guardados por interpretador
+PROGRAM_CACHE_SIZE = 64
+
+
+class Interpreter:
+    """
+    Estado de um interpretador Lox.
+
+    Args:
+        builtins:
+            Registro de funções nativas usado como modelo. O interpretador
+            trabalha sobre uma cópia. Por padrão, copia `BUILTINS`.
+        stdout:
+            Fluxo de saída dos comandos `print` e das mensagens de erro. Se
+            omitido, usa o sys.stdout do momento da escrita.
+        buffer_size:
+            Número de caracteres acumulados pelos comandos `print` antes de
+            escrever em `stdout`. A saída também é escrita ao final de cada
+            execução, antes de mensagens de erro e pela função `flush()`.
+        line_buffering:
+            Se `True`, cada linha é escrita imediatamente, para uso
+            interativo.
+        cache_size:
+            Número de programas compilados guardados por `compile()`.
+        intern_max_length:
+            Strings produzidas por concatenação com até este tamanho são
+            internadas. Por padrão, nenhuma string é internada.
+    """
+
+    def __init__(
+        self,
+        builtins: _Builtins | None = None,
+        stdout: TextIO | None = None,
+        cache_size: int = PROGRAM_CACHE_SIZE,
+        buffer_size: int = OUTPUT_BUFFER_SIZE,
+        line_buffering: bool = False,
+        intern_max_length: int = 0,
+    ):
+        self.builtins = (BUILTINS if builtins is None else builtins).copy()
+        self.builtins.stdout = stdout
+        self.builtins.buffer_size = buffer_size
+        self.builtins.line_buffering = line_buffering
+        self.builtins.intern_max_length = intern_max_length
+        self.cache_size = cache_size
+        self.programs: OrderedDict[tuple, CompiledProgram] = OrderedDict()
+        self.lock = threading.Lock()
+
+    @property
+    def stdout(self) -> TextIO | None:
+        return self.builtins.stdout
+
+    def register(
+        self,
+        name: str | None = None,
+        *,
+        arity: int | tuple[int, int | None] | None = None,
+        types: tuple[type | None, ...] = (),
+        pure: bool = False,
+    ) -> Callable[[Callable], Callable]:
+        """
+        Decorador que registra uma função nativa neste interpretador.
+
+        Veja `_Builtins.register`. Descarta os programas compilados, pois o
+        otimizador decide quais funções memoizar a partir das nativas puras.
+        """
+        register = self.builtins.register(name, arity=arity, types=types, pure=pure)
+
+        def decorator(function: Callable) -> Callable:
+            register(function)
+            with self.lock:
+                self.programs.clear()
+            return function
+
+        return decorator
+
+    def globals(self, env: dict[str, Value] | None = None) -> Ctx:
+        """
+        Cria um contexto global ligado a este interpretador.
+        """
+        return Ctx.from_dict({} if env is None else env, builtins=self.builtins)
+
+    def compile(
+        self,
+        src: str | Node,
+        optimize: Options | None = None,
+        skip_validation: bool = False,
+        timings: Timings | None = None,
+    ) -> CompiledProgram:
+        """
+        Compila o código fonte, reaproveitando programas já compilados a
+        partir do mesmo texto e das mesmas opções.
+
+        Programas reaproveitados não registram tempos de compilação em
+        `timings`. A pureza das funções nativas é lida do registro deste
+        interpretador.
+        """
+        if not isinstance(src, str):
+            return compile(src, optimize, skip_validation, timings, self.builtins)
+
+        key = (src, None if optimize is None else astuple(optimize), skip_validation)
+        with self.lock:
+            program = self.programs.get(key)
+            if program is not None:
+                self.programs.move_to_end(key)
+                return program
+
+        program = compile(src, optimize, skip_validation, timings, self.builtins)
+        with self.lock:
+            self.programs[key] = program
+            if len(self.programs) > self.cache_size:
+                self.programs.popitem(last=False)
+        return program
+
+    def eval(
+        self,
+        src: str | Node | CompiledProgram,
+        env: Ctx | dict[str, Value] | None = None,
+        skip_validation: bool = False,
+        optimize: Options | None = None,
+        budget: Budget | None = None,
+        timings: Timings | None = None,
+        tracer: Tracer | None = None,
+    ) -> Value:
+        """
+        Avalia o código fonte neste interpretador.
+
+        Aceita os mesmos argumentos que `lox.eval()`. Se `env` for um `Ctx`,
+        ele deve ter sido criado por `globals()`.
+        """
+        if not isinstance(src, CompiledProgram):
+            src = self.compile(src, optimize, skip_validation, timings)
+        if not isinstance(env, Ctx):
+            env = self.globals(env)
+        return src.run(env, budget, timings, tracer)
+
+    async def eval_async(
+        self,
+        src: str | Node | CompiledProgram,
+        env: Ctx | dict[str, Value] | None = None,
+        skip_validation: bool = False,
+        optimize: Options | None = None,
+        interval: int = YIELD_INTERVAL,
+        budget: Budget | None = None,
+        timings: Timings | None = None,
+        tracer: Tracer | None = None,
+    ) -> Value:
+        """
+        Versão assíncrona de `eval` (veja `lox.eval_async()`).
+        """
+        if not isinstance(src, CompiledProgram):
+            src = self.compile(src, optimize, skip_validation, timings)
+        if not isinstance(env, Ctx):
+            env = self.globals(env)
+        return await src.run_async(env, interval, budget, timings, tracer)
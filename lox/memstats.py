@@ -0,0 +1,198 @@
+"""
+Estatísticas de memória de programas Lox.
+
+`MemoryStats` conta as alocações e o número máximo de objetos vivos de cada
+tipo do interpretador (escopos `Ctx`, funções `LoxFunction`, inclusive os
+métodos ligados criados por `bind()`, instâncias, classes e nós da árvore
+sintática) e atribui cada alocação à linha do código Lox em execução:
+
+    >>> with MemoryStats() as stats:
+    ...     lox.eval(src)
+    >>> print(stats.report(src))
+
+Ao mesmo tempo, o `tracemalloc` registra o pico de memória do processo e,
+ao final, os locais em `lox/` com mais memória ainda alocada.
+
+As contagens usam ganchos `__init__` e `__del__` instalados nas classes
+durante a medição e removidos ao final; fora dela, não há custo algum. Com
+os ganchos e o tracemalloc, a execução fica várias vezes mais lenta.
+"""
+
+import sys
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+
+from .ctx import Ctx
+from .node import Node
+from .profiler import eval_codes
+from .runtime import LoxClass, LoxFunction, LoxInstance
+
+# Classes acompanhadas, junto com todas as suas subclasses, que são contadas
+# com o próprio nome
+TRACKED = (Ctx, LoxFunction, LoxInstance, LoxClass, Node)
+
+# Diretório do pacote, usado para filtrar os registros do tracemalloc
+LOX_DIR = Path(__file__).parent
+
+# Linha atribuída a alocações feitas fora da execução de um nó (ex.: nós
+# criados durante a análise sintática)
+OUTSIDE = 0
+
+
+class MemoryStats:
+    """
+    Conta alocações e objetos vivos por tipo e por linha do código Lox.
+
+    Os contadores são atualizados pelos ganchos das classes em `TRACKED`:
+
+    - `allocations`: objetos criados durante a medição, por tipo;
+    - `live` e `peak`: objetos criados durante a medição e ainda vivos, no
+      momento e no máximo, por tipo;
+    - `lines`: objetos criados, por (linha, tipo).
+    """
+
+    def __init__(self, frames: int = 1):
+        self.frames = frames
+        self.allocations: Counter[str] = Counter()
+        self.live: Counter[str] = Counter()
+        self.peak: Counter[str] = Counter()
+        self.lines: Counter[tuple[int, str]] = Counter()
+        self.tracked: set[int] = set()
+        self.saved: list[tuple[type, str, object]] = []
+        self.peak_memory = 0
+        self.snapshot: tracemalloc.Snapshot | None = None
+
+    def __enter__(self) -> "MemoryStats":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self.node_codes = frozenset(eval_codes())
+        for cls in tracked_classes():
+            if "__init__" in cls.__dict__:
+                self.install(cls, "__init__", self.init_hook(cls.__init__))
+        for cls in TRACKED:
+            self.install(cls, "__del__", self.del_hook())
+        tracemalloc.start(self.frames)
+        tracemalloc.reset_peak()
+
+    def stop(self) -> None:
+        if tracemalloc.is_tracing():
+            self.peak_memory = tracemalloc.get_traced_memory()[1]
+            self.snapshot = tracemalloc.take_snapshot().filter_traces(
+                [
+                    tracemalloc.Filter(True, str(LOX_DIR / "*")),
+                    tracemalloc.Filter(False, __file__),
+                ]
+            )
+            tracemalloc.stop()
+        while self.saved:
+            cls, name, original = self.saved.pop()
+            if original is None:
+                delattr(cls, name)
+            else:
+                setattr(cls, name, original)
+
+    def install(self, cls: type, name: str, hook) -> None:
+        self.saved.append((cls, name, cls.__dict__.get(name)))
+        setattr(cls, name, hook)
+
+    def init_hook(self, init):
+        """
+        Envolve o `__init__` de uma classe. Como um `__init__` pode chamar o
+        da superclasse, só conta o objeto o gancho que o tipo do objeto
+        resolve como seu `__init__`.
+        """
+        stats = self
+
+        def __init__(obj, /, *args, **kwargs):
+            init(obj, *args, **kwargs)
+            cls = type(obj)
+            if cls.__init__ is not __init__:
+                return
+            name = cls.__name__
+            stats.allocations[name] += 1
+            stats.live[name] += 1
+            if stats.live[name] > stats.peak[name]:
+                stats.peak[name] = stats.live[name]
+            stats.lines[stats.current_line(), name] += 1
+            stats.tracked.add(id(obj))
+
+        return __init__
+
+    def del_hook(self):
+        stats = self
+
+        def __del__(obj):
+            try:
+                stats.tracked.remove(id(obj))
+            except KeyError:
+                return
+            stats.live[type(obj).__name__] -= 1
+
+        return __del__
+
+    def current_line(self) -> int:
+        """
+        Linha do nó mais interno em avaliação, ou `OUTSIDE`.
+        """
+        frame = sys._getframe(2)
+        node_codes = self.node_codes
+        while frame is not None:
+            if frame.f_code in node_codes:
+                return frame.f_locals["self"].line or OUTSIDE
+            frame = frame.f_back
+        return OUTSIDE
+
+    def report(self, source: str | None = None, limit: int = 10) -> str:
+        """
+        Tabelas de tipos, linhas Lox com mais alocações e locais em `lox/`
+        com mais memória alocada ao final.
+        """
+        out = [f"Pico de memória: {self.peak_memory / 2**20:.1f} MiB", ""]
+        out.append(f"{'alocações':>10} {'pico vivos':>11} {'vivos':>8}  tipo")
+        for name, count in self.allocations.most_common(limit):
+            out.append(f"{count:>10} {self.peak[name]:>11} {self.live[name]:>8}  {name}")
+
+        by_line: Counter[int] = Counter()
+        for (line, _), count in self.lines.items():
+            by_line[line] += count
+        source_lines = source.splitlines() if source is not None else []
+        out.append("")
+        out.append(f"{'alocações':>10}  linha")
+        for line, count in by_line.most_common(limit):
+            types = Counter({name: n for (at, name), n in self.lines.items() if at == line})
+            detail = ", ".join(f"{name} {n}" for name, n in types.most_common(3))
+            if line == OUTSIDE:
+                out.append(f"{count:>10}  {'-':>5} fora da execução ({detail})")
+                continue
+            text = ""
+            if 0 < line <= len(source_lines):
+                text = "  " + source_lines[line - 1].strip()
+            out.append(f"{count:>10}  {line:>5} ({detail}){text}")
+
+        if self.snapshot is not None:
+            out.append("")
+            out.append(f"{'memória':>10} {'blocos':>8}  local em lox/ (alocada ao final)")
+            for stat in self.snapshot.statistics("lineno")[:limit]:
+                frame = stat.traceback[0]
+                path = Path(frame.filename).relative_to(LOX_DIR.parent)
+                out.append(f"{stat.size / 1024:>6.1f} KiB {stat.count:>8}  {path}:{frame.lineno}")
+        return "\n".join(out)
+
+
+def tracked_classes() -> list[type]:
+    """
+    Classes em `TRACKED` e todas as suas subclasses.
+    """
+    pending, seen = list(TRACKED), []
+    while pending:
+        cls = pending.pop()
+        if cls not in seen:
+            seen.append(cls)
+            pending.extend(cls.__subclasses__())
+    return seen
@@ -0,0 +1,582 @@
+"""
+Funções e tipos nativos expostos ao Lox por meio de `BUILTINS`.
+
+Funções nativas são registradas como `NativeFunction`, que guarda a aridade,
+o tipo esperado de cada argumento e se a função é pura. Estes metadados são
+usados para validar as chamadas, pela análise de pureza do otimizador e pelo
+nó `NativeCall`, que chama a função Python diretamente.
+
+O Lox não possui coleções. Os tipos deste módulo guardam coleções em
+estruturas do Python e oferecem operações em lote que executam fora do laço
+do interpretador. Cada tipo é manipulado por funções com um prefixo comum
+(`array_get`, `list_push`, `map_set`, etc.).
+"""
+
+import inspect
+import operator
+from array import array as _array
+from itertools import repeat
+from types import BuiltinFunctionType, FunctionType
+from typing import Callable, Iterator
+
+from .errors import LoxError
+
+
+class NativeFunction:
+    """
+    Função Python chamável pelo código Lox.
+
+    Args:
+        function:
+            A função Python. Pode ser uma função assíncrona (`async def`),
+            que só pode ser chamada por programas executados com
+            `lox.eval_async()`.
+        name:
+            Nome da função no Lox. Por padrão, usa o nome da função Python sem
+            o "_" final.
+        arity:
+            Número de argumentos ou par (mínimo, máximo). O máximo pode ser
+            `None` para funções variádicas. Se omitido, é deduzido da
+            assinatura da função.
+        types:
+            Tipo esperado de cada argumento (`float`, `str`, `bool`, `Array`,
+            etc.) ou `None` para aceitar qualquer valor. O último tipo vale
+            para os argumentos excedentes de funções variádicas.
+        pure:
+            Indica que a função não tem efeitos colaterais e que o resultado
+            depende somente dos argumentos.
+    """
+
+    __slots__ = (
+        "function",
+        "coroutine",
+        "name",
+        "min_args",
+        "max_args",
+        "types",
+        "pure",
+        "signatures",
+    )
+
+    def __init__(
+        self,
+        function: Callable,
+        name: str | None = None,
+        arity: int | tuple[int, int | None] | None = None,
+        types: tuple[type | None, ...] = (),
+        pure: bool = False,
+    ):
+        self.name = name or function.__name__.removesuffix("_")
+        if arity is None:
+            arity = _signature_arity(function)
+        if inspect.iscoroutinefunction(function):
+            # O caminho síncrono (call_value, NativeCall) chama `function`
+            # sem testes adicionais; funções assíncronas recebem um substituto
+            # que explica o erro.
+            self.coroutine = function
+            self.function = _requires_async(self.name)
+        else:
+            self.coroutine = None
+            self.function = function
+        if isinstance(arity, int):
+            arity = (arity, arity)
+        self.min_args, self.max_args = arity
+        self.types = tuple(types)
+        self.pure = pure
+        self.signatures: dict[int, tuple[type | None, ...]] = {}
+
+    def accepts(self, n: int) -> bool:
+        """
+        Verifica se a função aceita `n` argumentos.
+        """
+        return self.min_args <= n and (self.max_args is None or n <= self.max_args)
+
+    def arg_type(self, i: int) -> type | None:
+        """
+        Tipo esperado do i-ésimo argumento.
+        """
+        if not self.types:
+            return None
+        return self.types[min(i, len(self.types) - 1)]
+
+    def signature(self, n: int) -> tuple[type | None, ...]:
+        """
+        Tipos esperados numa chamada com `n` argumentos.
+
+        Levanta um LoxError se a função não aceitar `n` argumentos.
+        """
+        try:
+            return self.signatures[n]
+        except KeyError:
+            pass
+        if not self.accepts(n):
+            if self.min_args == self.max_args:
+                expected = str(self.min_args)
+            elif self.max_args is None:
+                expected = f"at least {self.min_args}"
+            else:
+                expected = f"{self.min_args} to {self.max_args}"
+            raise LoxError(f"Expected {expected} arguments but got {n}.")
+        types = self.signatures[n] = tuple(self.arg_type(i) for i in range(n))
+        return types
+
+    def check_arg(self, i: int, value):
+        expected = self.arg_type(i)
+        if expected is not None and type(value) is not expected:
+            kind = TYPE_NAMES.get(expected, expected.__name__)
+            raise LoxError(f"{self.name}: argumento {i + 1} deve ser {kind}.")
+        return value
+
+    def check(self, args: tuple | list):
+        """
+        Valida o número e o tipo dos argumentos.
+        """
+        for i, expected in enumerate(self.signature(len(args))):
+            if type(args[i]) is not expected:
+                self.check_arg(i, args[i])
+
+    def __call__(self, *args):
+        self.check(args)
+        return self.function(*args)
+
+    def __reduce__(self):
+        # Funções do registro global são serializadas pelo nome e recuperadas
+        # do registro ao desserializar. As demais levam a função Python, que
+        # precisa ser acessível pelo módulo (lambdas não são).
+        from .ctx import BUILTINS  # import tardio: ctx depende deste módulo
+
+        if BUILTINS.get(self.name) is self:
+            return (_builtin, (self.name,))
+        arity = (self.min_args, self.max_args)
+        function = self.coroutine or self.function
+        return (NativeFunction, (function, self.name, arity, self.types, self.pure))
+
+    def __str__(self) -> str:
+        return "<native fn>"
+
+    def __repr__(self) -> str:
+        return f"<native fn {self.name}>"
+
+
+def _requires_async(name: str) -> Callable:
+    def function(*args):
+        raise LoxError(f"{name}: função assíncrona; execute o programa com lox.eval_async().")
+
+    return function
+
+
+def _builtin(name: str) -> NativeFunction:
+    from .ctx import BUILTINS
+
+    return BUILTINS[name]
+
+
+def _signature_arity(function: Callable) -> tuple[int, int | None]:
+    try:
+        params = inspect.signature(function).parameters.values()
+    except ValueError:
+        raise TypeError(f"não foi possível deduzir a aridade de {function!r}") from None
+    positional = [
+        p for p in params if p.kind in (p.POSITIONAL_ONLY, p.POSITIONAL_OR_KEYWORD)
+    ]
+    required = sum(1 for p in positional if p.default is p.empty)
+    if any(p.kind is p.VAR_POSITIONAL for p in params):
+        return required, None
+    return required, len(positional)
+
+
+def native(
+    name: str | None = None,
+    *,
+    arity: int | tuple[int, int | None] | None = None,
+    types: tuple[type | None, ...] = (),
+    pure: bool = False,
+) -> Callable[[Callable], NativeFunction]:
+    """
+    Decorador que converte uma função Python em `NativeFunction`.
+    """
+
+    def decorator(function: Callable) -> NativeFunction:
+        return NativeFunction(function, name, arity=arity, types=types, pure=pure)
+
+    return decorator
+
+
+class NativeValue:
+    """
+    Classe base dos valores nativos.
+    """
+
+    __slots__ = ()
+
+    # Nome do tipo e prefixo das funções que o manipulam
+    type_name = "native"
+    prefix = "native"
+
+
+class Array(NativeValue):
+    """
+    Vetor de números de tamanho fixo armazenado de forma contígua.
+
+    Usa um `array('d')` do Python, que guarda os floats sem criar um objeto
+    para cada elemento.
+    """
+
+    __slots__ = ("data",)
+    type_name = "array"
+    prefix = "array"
+
+    def __init__(self, data: _array):
+        self.data = data
+
+    def __len__(self) -> int:
+        return len(self.data)
+
+    def __repr__(self) -> str:
+        return f"Array({self.data.tolist()!r})"
+
+
+class List(NativeValue):
+    """
+    Lista de valores Lox que cresce sob demanda.
+    """
+
+    __slots__ = ("items",)
+    type_name = "list"
+    prefix = "list"
+
+    def __init__(self, items: list):
+        self.items = items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __repr__(self) -> str:
+        return f"List({self.items!r})"
+
+
+class Map(NativeValue):
+    """
+    Dicionário que associa valores Lox a valores Lox.
+
+    As chaves seguem a igualdade do Lox: `1` e `true` são chaves distintas,
+    apesar de serem iguais para o Python (veja `map_key`).
+    """
+
+    __slots__ = ("items",)
+    type_name = "map"
+    prefix = "map"
+
+    def __init__(self, items: dict):
+        self.items = items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __repr__(self) -> str:
+        return f"Map({self.items!r})"
+
+    def keys(self) -> Iterator:
+        """
+        Itera sobre as chaves na forma vista pelo código Lox.
+        """
+        for key in self.items:
+            yield key[1] if type(key) is tuple else key
+
+
+# Nomes dos tipos usados nas mensagens de erro
+TYPE_NAMES = {
+    float: "um número",
+    str: "uma string",
+    bool: "um booleano",
+    Array: "um array",
+    List: "uma lista",
+    Map: "um map",
+}
+
+
+def map_key(value):
+    """
+    Converte um valor Lox numa chave de dicionário.
+
+    Booleanos viram tuplas para não colidirem com os números 0 e 1. Funções e
+    classes não podem ser usadas como chaves, nem arrays, listas e maps, que
+    são comparados pelo conteúdo e podem mudar depois de inseridos.
+    """
+    if value is True or value is False:
+        return (bool, value)
+    if isinstance(value, (Array, List, Map)):
+        raise LoxError("Coleções não podem ser usadas como chaves.")
+    try:
+        hash(value)
+    except TypeError:
+        raise LoxError("Valor não pode ser usado como chave.") from None
+    return value
+
+
+def _check_size(size: float, func: str) -> int:
+    if not size.is_integer() or size < 0:
+        raise LoxError(f"{func} requer um tamanho inteiro não-negativo.")
+    return int(size)
+
+
+def _check_index(data: _array | list, index: float, func: str) -> int:
+    if not index.is_integer() or not 0 <= index < len(data):
+        raise LoxError(f"{func}: índice fora dos limites.")
+    return int(index)
+
+
+def _check_same_size(a: _array, b: _array, func: str):
+    if len(a) != len(b):
+        raise LoxError(f"{func} requer arrays de mesmo tamanho.")
+
+
+def _check_callable(func, name: str):
+    if not callable(func) or isinstance(func, NativeValue):
+        raise LoxError(f"{name} requer uma função.")
+    return func
+
+
+#
+# Arrays
+#
+@native(types=(float, float))
+def array(size: float, value: float = 0.0) -> Array:
+    """
+    Cria um array com `size` elementos iguais a `value`.
+    """
+    return Array(_array("d", [value]) * _check_size(size, "array"))
+
+
+@native(types=(Array,))
+def array_len(arr: Array) -> float:
+    return float(len(arr.data))
+
+
+@native(types=(Array, float))
+def array_get(arr: Array, index: float) -> float:
+    data = arr.data
+    return data[_check_index(data, index, "array_get")]
+
+
+@native(types=(Array, float, float))
+def array_set(arr: Array, index: float, value: float) -> float:
+    data = arr.data
+    data[_check_index(data, index, "array_set")] = value
+    return value
+
+
+@native(types=(Array, float))
+def array_fill(arr: Array, value: float) -> Array:
+    """
+    Atribui `value` a todos os elementos do array.
+    """
+    arr.data[:] = _array("d", [value]) * len(arr.data)
+    return arr
+
+
+@native(types=(Array,))
+def array_sum(arr: Array) -> float:
+    return float(sum(arr.data))
+
+
+@native(types=(Array, Array))
+def array_dot(a: Array, b: Array) -> float:
+    """
+    Produto escalar entre dois arrays do mesmo tamanho.
+    """
+    _check_same_size(a.data, b.data, "array_dot")
+    return float(sum(map(operator.mul, a.data, b.data)))
+
+
+@native(types=(Array, float))
+def array_scale(arr: Array, factor: float) -> Array:
+    """
+    Multiplica todos os elementos do array por `factor`.
+    """
+    arr.data[:] = _array("d", map(operator.mul, arr.data, repeat(factor)))
+    return arr
+
+
+@native(types=(Array, Array))
+def array_add(dst: Array, src: Array) -> Array:
+    """
+    Soma os elementos de `src` aos elementos correspondentes de `dst`.
+    """
+    _check_same_size(dst.data, src.data, "array_add")
+    dst.data[:] = _array("d", map(operator.add, dst.data, src.data))
+    return dst
+
+
+@native(types=(Array, None))
+def array_map(arr: Array, func) -> Array:
+    """
+    Substitui cada elemento pelo resultado de `func` aplicada a ele.
+
+    Somente funções nativas são aceitas, já que o objetivo é não voltar ao
+    interpretador para cada elemento. Os resultados são verificados antes de
+    alterar o array, pois `array("d", ...)` converteria booleanos e inteiros
+    em números silenciosamente.
+    """
+    if type(func) is NativeFunction and func.accepts(1) and func.arg_type(0) in (None, float):
+        func = func.function
+    elif not isinstance(func, (FunctionType, BuiltinFunctionType)):
+        raise LoxError("array_map requer uma função nativa.")
+    results = list(map(func, arr.data))
+    if not all(type(x) is float for x in results):
+        raise LoxError("array_map: a função deve retornar números.")
+    arr.data[:] = _array("d", results)
+    return arr
+
+
+ARRAY_BUILTINS = {
+    "array": array,
+    "array_len": array_len,
+    "array_get": array_get,
+    "array_set": array_set,
+    "array_fill": array_fill,
+    "array_sum": array_sum,
+    "array_dot": array_dot,
+    "array_scale": array_scale,
+    "array_add": array_add,
+    "array_map": array_map,
+}
+
+
+#
+# Listas e maps
+#
+@native()
+def list_(*items) -> List:
+    """
+    Cria uma lista com os argumentos dados.
+    """
+    return List(list(items))
+
+
+@native(types=(List,))
+def list_len(lst: List) -> float:
+    return float(len(lst.items))
+
+
+@native(types=(List, float))
+def list_get(lst: List, index: float):
+    items = lst.items
+    return items[_check_index(items, index, "list_get")]
+
+
+@native(types=(List, float, None))
+def list_set(lst: List, index: float, value):
+    items = lst.items
+    items[_check_index(items, index, "list_set")] = value
+    return value
+
+
+@native(types=(List, None))
+def list_push(lst: List, value) -> List:
+    lst.items.append(value)
+    return lst
+
+
+@native(types=(List,))
+def list_pop(lst: List):
+    """
+    Remove e retorna o último elemento da lista.
+    """
+    if not lst.items:
+        raise LoxError("list_pop: lista vazia.")
+    return lst.items.pop()
+
+
+@native(types=(List, None))
+def list_map(lst: List, func) -> List:
+    """
+    Cria uma nova lista aplicando `func` a cada elemento.
+    """
+    return List(list(map(_check_callable(func, "list_map"), lst.items)))
+
+
+@native(types=(List, None))
+def list_each(lst: List, func) -> None:
+    """
+    Chama `func` para cada elemento da lista.
+    """
+    func = _check_callable(func, "list_each")
+    for item in lst.items:
+        func(item)
+
+
+@native()
+def map_(*pairs) -> Map:
+    """
+    Cria um map a partir de pares chave, valor alternados.
+    """
+    if len(pairs) % 2:
+        raise LoxError("map requer pares chave, valor.")
+    return Map({map_key(k): v for k, v in zip(pairs[::2], pairs[1::2])})
+
+
+@native(types=(Map,))
+def map_len(mapping: Map) -> float:
+    return float(len(mapping.items))
+
+
+@native(types=(Map, None, None))
+def map_get(mapping: Map, key, default=None):
+    """
+    Retorna o valor associado à chave ou `default` se ela não existir.
+    """
+    return mapping.items.get(map_key(key), default)
+
+
+@native(types=(Map, None, None))
+def map_set(mapping: Map, key, value):
+    mapping.items[map_key(key)] = value
+    return value
+
+
+@native(types=(Map, None))
+def map_has(mapping: Map, key) -> bool:
+    return map_key(key) in mapping.items
+
+
+@native(types=(Map, None))
+def map_delete(mapping: Map, key) -> bool:
+    """
+    Remove a chave do map e informa se ela existia.
+    """
+    key = map_key(key)
+    if key in mapping.items:
+        del mapping.items[key]
+        return True
+    return False
+
+
+@native(types=(Map,))
+def map_keys(mapping: Map) -> List:
+    return List(list(mapping.keys()))
+
+
+@native(types=(Map,))
+def map_values(mapping: Map) -> List:
+    return List(list(mapping.items.values()))
+
+
+COLLECTION_BUILTINS = {
+    "list": list_,
+    "list_len": list_len,
+    "list_get": list_get,
+    "list_set": list_set,
+    "list_push": list_push,
+    "list_pop": list_pop,
+    "list_map": list_map,
+    "list_each": list_each,
+    "map": map_,
+    "map_len": map_len,
+    "map_get": map_get,
+    "map_set": map_set,
+    "map_has": map_has,
+    "map_delete": map_delete,
+    "map_keys": map_keys,
+    "map_values": map_values,
+}
@@ -38,6 +38,11 @@ class Node(ABC):
     criar subclasses que implementem os métodos abstratos definidos aqui.
     """
 
+    # Linha do código fonte onde o nó começa, preenchida pelo `LoxTransformer`
+    # e preservada pelo otimizador. Não é anotada, portanto não faz parte dos
+    # campos percorridos por `visit`, `children`, etc., nem das comparações.
+    line = None
+
     def eval(self, ctx):
         name = type(self).__name__
         raise NotImplementedError(f"Método eval não implementado para {name}!")
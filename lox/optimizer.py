@@ -0,0 +1,774 @@
+"""
+Otimizações sobre a árvore sintática.
+
+O otimizador recebe uma árvore já validada e "desaçucarada" e aplica uma
+sequência de passes que reescrevem a árvore in-place. Cada pass registra o
+que fez num `Report`, que pode ser impresso para depuração.
+
+    >>> tree = parse(src)
+    >>> report = optimize(tree, Options(memoize=True))
+    >>> print(report)
+"""
+
+import copy
+from dataclasses import dataclass, field
+
+from .analysis import constant_globals, pure_functions
+from .ast import (
+    And,
+    AndTest,
+    Assign,
+    BinOp,
+    Block,
+    BranchIf,
+    BranchWhile,
+    Call,
+    Class,
+    CompareTest,
+    CountedLoop,
+    Expr,
+    Function,
+    Getattr,
+    If,
+    InlinedCall,
+    InlinedMethodCall,
+    Literal,
+    NativeCall,
+    NotTest,
+    Or,
+    OrTest,
+    Program,
+    Return,
+    SubstitutedCall,
+    TruthyTest,
+    UnaryOp,
+    Var,
+    VarDef,
+    While,
+    inline_expr,
+)
+from . import runtime as ops
+from .ctx import Ctx
+from .node import Node
+from .runtime import CacheInfo, MemoizedFunction
+
+
+@dataclass
+class Options:
+    """
+    Opções do otimizador.
+
+    Attributes:
+        dead_code:
+            Remove comandos inalcançáveis, desvios com condição constante,
+            expressões sem efeitos colaterais e variáveis locais não usadas.
+        memoize:
+            Memoiza funções globais comprovadamente puras.
+        memo_size:
+            Número máximo de entradas no cache LRU de cada função memoizada.
+        inline:
+            Expande chamadas a funções e métodos pequenos com um único return.
+        inline_max_size:
+            Número máximo de nós na expressão retornada por uma função para
+            que ela seja expandida.
+        inline_max_growth:
+            Número máximo de nós que a substituição textual de corpos pode
+            acrescentar ao programa inteiro.
+        counted_loops:
+            Executa laços `for` canônicos com um contador nativo.
+        fused_branches:
+            Avalia condições de `if` e `while` diretamente como bool, sem
+            produzir valores Lox intermediários.
+        native_calls:
+            Chama funções nativas diretamente, sem empacotar os argumentos
+            (veja `NativeCall`).
+    """
+
+    dead_code: bool = True
+    memoize: bool = False
+    memo_size: int = 128
+    inline: bool = False
+    inline_max_size: int = 16
+    inline_max_growth: int = 1000
+    counted_loops: bool = False
+    fused_branches: bool = False
+    native_calls: bool = False
+
+    def __post_init__(self):
+        if self.memo_size < 1:
+            raise ValueError("memo_size deve ser positivo")
+
+    @classmethod
+    def full(cls, **kwargs) -> "Options":
+        """
+        Habilita todas as otimizações que não alteram o comportamento
+        observável do programa. A memoização continua opcional.
+        """
+        kwargs.setdefault("inline", True)
+        kwargs.setdefault("counted_loops", True)
+        kwargs.setdefault("fused_branches", True)
+        kwargs.setdefault("native_calls", True)
+        return cls(**kwargs)
+
+
+@dataclass
+class Report:
+    """
+    Registro das transformações realizadas pelo otimizador.
+    """
+
+    entries: list[tuple[str, str]] = field(default_factory=list)
+
+    def add(self, pass_name: str, msg: str) -> None:
+        self.entries.append((pass_name, msg))
+
+    def __str__(self) -> str:
+        if not self.entries:
+            return "nenhuma otimização aplicada"
+        return "\n".join(f"[{name}] {msg}" for name, msg in self.entries)
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+
+def optimize(
+    tree: Node,
+    options: Options | None = None,
+    report: Report | None = None,
+    builtins: dict | None = None,
+) -> Report:
+    """
+    Aplica os passes de otimização habilitados em `options` na árvore.
+
+    A árvore é modificada in-place. Retorna um relatório com as
+    transformações realizadas. Se `report` for passado, as transformações são
+    acrescentadas a ele. A pureza das funções nativas é lida do registro
+    `builtins` (por padrão, `BUILTINS`).
+    """
+    if options is None:
+        options = Options()
+    if report is None:
+        report = Report()
+
+    if options.dead_code:
+        eliminate_dead_code(tree, report)
+
+    if options.memoize and isinstance(tree, Program):
+        memoize_pure_functions(tree, options.memo_size, report, builtins)
+
+    if options.inline and isinstance(tree, Program):
+        Inliner(tree, options, report).run()
+
+    if options.counted_loops:
+        CountedLoops(report).rewrite(tree)
+
+    if options.fused_branches:
+        FusedBranches(report).rewrite(tree)
+
+    if options.native_calls:
+        NativeCalls(tree, report).rewrite(tree)
+
+    return report
+
+
+class Rewriter:
+    """
+    Percorre a árvore em pós-ordem e substitui cada nó pelo resultado de
+    `rewrite_node`.
+
+    Listas de filhos são modificadas in-place, pois objetos como
+    `LoxFunction` guardam referências para a lista de comandos do corpo.
+    """
+
+    def rewrite(self, node: Node) -> Node:
+        self.rewrite_children(node)
+        new = self.rewrite_node(node)
+        if new is not node and new.line is None:
+            new.line = node.line
+        return new
+
+    def rewrite_children(self, node: Node) -> None:
+        for name in node.__annotations__:
+            value = getattr(node, name)
+            if isinstance(value, Node):
+                setattr(node, name, self.rewrite(value))
+            elif isinstance(value, list):
+                value[:] = [
+                    self.rewrite(item) if isinstance(item, Node) else item
+                    for item in value
+                ]
+
+    def rewrite_node(self, node: Node) -> Node:
+        return node
+
+
+def eliminate_dead_code(tree: Node, report: Report | None = None) -> Report:
+    """
+    Remove código morto da árvore.
+
+    Este pass é executado por `lox.parse` logo após `desugar_tree()`.
+    """
+    if report is None:
+        report = Report()
+    DeadCode(report).rewrite(tree)
+    return report
+
+
+def memoize_pure_functions(
+    program: Program,
+    maxsize: int,
+    report: Report,
+    builtins: dict | None = None,
+) -> None:
+    """
+    Marca as funções globais puras para execução com cache LRU.
+    """
+    pure = pure_functions(program, builtins)
+    for stmt in program.stmts:
+        if isinstance(stmt, Function) and stmt.name in pure:
+            stmt.memo_size = maxsize
+            report.add("memoize", f"função {stmt.name} é pura (cache de {maxsize} entradas)")
+
+
+def memo_stats(ctx: Ctx) -> dict[str, CacheInfo]:
+    """
+    Retorna as estatísticas de cache das funções memoizadas visíveis em ctx.
+    """
+    stats: dict[str, CacheInfo] = {}
+    for scope in ctx.iter_scopes(reverse=True):
+        for name, value in scope.items():
+            if isinstance(value, MemoizedFunction):
+                stats[name] = value.cache_info()
+    return stats
+
+
+#
+# Expansão de funções (inlining)
+#
+class Inliner(Rewriter):
+    """
+    Expande chamadas a funções pequenas, não-recursivas, cujo corpo é um
+    único `return`.
+
+    Chamadas `f(x)` a funções globais constantes, definidas antes do ponto de
+    chamada e não sombreadas, são substituídas pela expressão retornada quando
+    a ordem de avaliação dos argumentos é preservada (veja `SubstitutedCall`). Nos demais casos, a
+    chamada vira um `InlinedCall` ou `InlinedMethodCall`, que avaliam o corpo
+    diretamente atrás de uma guarda de identidade ou de classe.
+    """
+
+    def __init__(self, program: Program, options: Options, report: Report):
+        self.program = program
+        self.options = options
+        self.report = report
+        self.growth = 0
+        self.scopes: list[set[str]] = []
+        self.stmt_index = 0
+
+        functions: dict[str, list[Function]] = {}
+        methods: dict[str, list[Function]] = {}
+        method_ids: set[int] = set()
+        for node in program.descendants():
+            if isinstance(node, Class):
+                for method in node.methods:
+                    methods.setdefault(method.name, []).append(method)
+                    method_ids.add(id(method))
+            elif isinstance(node, Function) and id(node) not in method_ids:
+                functions.setdefault(node.name, []).append(node)
+
+        self.functions = {
+            name: fns[0]
+            for name, fns in functions.items()
+            if len(fns) == 1 and self._is_small(fns[0])
+        }
+        self.methods = {
+            name: fns[0]
+            for name, fns in methods.items()
+            if len(fns) == 1 and name != "init" and self._is_small(fns[0])
+        }
+        self._remove_recursive()
+
+        constants = constant_globals(program)
+        self.globals = {
+            stmt.name: i
+            for i, stmt in enumerate(program.stmts)
+            if isinstance(stmt, Function)
+            and stmt.name in constants
+            and self.functions.get(stmt.name) is stmt
+        }
+
+    def run(self) -> None:
+        self.expanded: list[tuple[InlinedCall | InlinedMethodCall, Function]] = []
+        for i, stmt in enumerate(self.program.stmts):
+            self.stmt_index = i
+            self.program.stmts[i] = self.rewrite(stmt)
+
+        # O corpo das funções expandidas também pode ter sido reescrito depois
+        # que o nó foi criado.
+        for node, fn in self.expanded:
+            node.expr = inline_expr(fn)
+
+    def _is_small(self, fn: Function) -> bool:
+        try:
+            expr = inline_expr(fn)
+        except ValueError:
+            return False
+        return node_count(expr) <= self.options.inline_max_size
+
+    def _remove_recursive(self) -> None:
+        """
+        Remove candidatos que participam de ciclos no grafo de chamadas.
+        """
+        graph: dict[tuple[str, str], set[tuple[str, str]]] = {}
+        for kind, table in (("fn", self.functions), ("method", self.methods)):
+            for name, fn in table.items():
+                edges = graph[kind, name] = set()
+                for node in inline_expr(fn).descendants():
+                    if isinstance(node, Call) and isinstance(node.callee, Var):
+                        edges.add(("fn", node.callee.name))
+                    elif isinstance(node, Call) and isinstance(node.callee, Getattr):
+                        edges.add(("method", node.callee.attr))
+
+        def reaches_self(start):
+            pending, seen = list(graph[start]), set()
+            while pending:
+                key = pending.pop()
+                if key == start:
+                    return True
+                if key in seen or key not in graph:
+                    continue
+                seen.add(key)
+                pending.extend(graph[key])
+            return False
+
+        for key in [k for k in graph if reaches_self(k)]:
+            kind, name = key
+            (self.functions if kind == "fn" else self.methods).pop(name)
+
+    def is_shadowed(self, name: str) -> bool:
+        return any(name in scope for scope in self.scopes)
+
+    def rewrite(self, node: Node) -> Node:
+        match node:
+            case Function(params=params, body=body):
+                scope = set(params) | declared_names(body.stmts)
+            case Block(stmts=stmts):
+                scope = declared_names(stmts)
+            case _:
+                return super().rewrite(node)
+        self.scopes.append(scope)
+        try:
+            return super().rewrite(node)
+        finally:
+            self.scopes.pop()
+
+    def rewrite_node(self, node: Node) -> Node:
+        if type(node) is not Call:
+            return node
+
+        match node.callee:
+            case Var(name=name) if name in self.functions:
+                fn = self.functions[name]
+                if len(fn.params) != len(node.params):
+                    return node
+                substituted = self._substitute(node, fn)
+                if substituted is not None:
+                    return substituted
+                self.report.add("inline", f"chamada a {name} expandida com guarda")
+                inlined = InlinedCall.from_function(node, fn)
+                self.expanded.append((inlined, fn))
+                return inlined
+
+            case Getattr(attr=attr) if attr in self.methods:
+                method = self.methods[attr]
+                if len(method.params) != len(node.params):
+                    return node
+                self.report.add("inline", f"chamada ao método {attr} expandida com guarda")
+                inlined = InlinedMethodCall.from_method(node, method)
+                self.expanded.append((inlined, method))
+                return inlined
+
+        return node
+
+    def _substitute(self, call: Call, fn: Function) -> Expr | None:
+        """
+        Substitui a chamada pela expressão retornada, trocando cada parâmetro
+        pelo argumento correspondente. Retorna None se não for seguro.
+        """
+        name = fn.name
+        if (
+            self.globals.get(name, self.stmt_index) >= self.stmt_index
+            or self.is_shadowed(name)
+        ):
+            return None
+
+        expr = inline_expr(fn)
+        events = evaluation_order(expr)
+        if events is None or any(e not in fn.params for e in events if e is not None):
+            return None
+
+        # Cada parâmetro deve ser avaliado exatamente uma vez, na ordem de
+        # declaração, antes de qualquer operação que possa falhar. Argumentos
+        # literais podem ser avaliados em qualquer ordem.
+        trivial = all(isinstance(arg, Literal) for arg in call.params)
+        if not trivial:
+            used = [e for e in events if e is not None]
+            if used != fn.params:
+                return None
+            last = max((i for i, e in enumerate(events) if e is not None), default=-1)
+            if None in events[:last]:
+                return None
+
+        size = node_count(expr)
+        if self.growth + size > self.options.inline_max_growth:
+            return None
+        self.growth += size
+
+        args = dict(zip(fn.params, call.params))
+        result = substitute_params(copy.deepcopy(expr), args)
+        self.report.add("inline", f"corpo de {name} substituído no ponto de chamada")
+        return SubstitutedCall.from_call(call, result)
+
+
+def node_count(node: Node) -> int:
+    """
+    Número de nós na subárvore.
+    """
+    return sum(1 for _ in node.descendants())
+
+
+def declared_names(stmts: list) -> set[str]:
+    """
+    Nomes declarados diretamente numa lista de comandos.
+    """
+    return {s.name for s in stmts if isinstance(s, (VarDef, Function, Class))}
+
+
+def evaluation_order(expr: Expr) -> list[str | None] | None:
+    """
+    Gera a sequência de eventos de avaliação de uma expressão simples: o nome
+    de cada variável lida ou None para cada operação aplicada.
+
+    Retorna None se a expressão contiver nós que não são literais, variáveis,
+    operadores aritméticos/de comparação ou outras chamadas substituídas.
+    """
+    events: list[str | None] = []
+
+    def visit(node) -> bool:
+        match node:
+            case Literal():
+                return True
+            case Var(name=name):
+                events.append(name)
+                return True
+            case BinOp(left=left, right=right):
+                ok = visit(left) and visit(right)
+                events.append(None)
+                return ok
+            case UnaryOp(operand=operand):
+                ok = visit(operand)
+                events.append(None)
+                return ok
+            case SubstitutedCall(expr=expr):
+                # A chamada pode falhar por exceder o orçamento
+                ok = visit(expr)
+                events.append(None)
+                return ok
+        return False
+
+    return events if visit(expr) else None
+
+
+def substitute_params(expr: Expr, args: dict[str, Expr]) -> Expr:
+    """
+    Troca as variáveis de `args` por cópias das expressões correspondentes.
+    """
+
+    class Substitute(Rewriter):
+        def rewrite_node(self, node):
+            if isinstance(node, Var) and node.name in args:
+                return copy.deepcopy(args[node.name])
+            return node
+
+    return Substitute().rewrite(expr)
+
+
+#
+# Laços com contador
+#
+class CountedLoops(Rewriter):
+    """
+    Reconhece o formato produzido por `LoxTransformer.for_cmd` para laços
+    canônicos e o substitui por um `CountedLoop`:
+
+        Block([VarDef(i, start), While(i < n, Block([body, i = i + step]))])
+
+    O comparador pode ser <, <=, > ou >= e o passo deve ser um número literal
+    somado ou subtraído do contador. Nem o corpo nem o limite, reavaliado a
+    cada iteração, podem atribuir o contador.
+
+    O `CountedLoop` executa o corpo direto no escopo do laço, por isso o corpo
+    não pode ser uma declaração, como em `{ var i = 0; while (i < n) { var x
+    = i; i = i + 1; } }`, onde `x` teria um escopo novo a cada iteração.
+    """
+
+    def __init__(self, report: Report):
+        self.report = report
+
+    def rewrite_node(self, node: Node) -> Node:
+        match node:
+            case Block(
+                stmts=[
+                    VarDef(name=name, value=start),
+                    While(
+                        cond=BinOp(left=Var(name=cond_name), right=bound, ops=op),
+                        body=Block(stmts=[body, Assign(name=incr_name, value=incr)]),
+                    ),
+                ]
+            ) if (
+                name == cond_name == incr_name
+                and op in CountedLoop.NATIVE_OPS
+                and (step := counter_step(name, incr)) is not None
+                and not isinstance(body, (VarDef, Function, Class))
+                and not assigns_or_captures(body, name)
+                and not assigns_or_captures(bound, name)
+            ):
+                self.report.add("counted-loop", f"laço com contador {name}")
+                return CountedLoop(name, start, op, bound, step, body)
+        return node
+
+
+def counter_step(name: str, incr: Expr) -> float | None:
+    """
+    Retorna o passo de um incremento `i = i + k` ou `i = i - k`, onde `k` é um
+    número literal.
+    """
+    match incr:
+        case BinOp(left=Var(name=var), right=Literal(value=float(step)), ops=op) if var == name:
+            if op is ops.add:
+                return step
+            if op is ops.sub:
+                return -step
+        case BinOp(left=Literal(value=float(step)), right=Var(name=var), ops=ops.add) if var == name:
+            return step
+    return None
+
+
+def assigns_or_captures(body: Node, name: str) -> bool:
+    """
+    Verifica se o nó atribui a variável ou a usa dentro de uma função ou
+    classe aninhada.
+    """
+    for node in body.descendants():
+        if isinstance(node, Assign) and node.name == name:
+            return True
+        if isinstance(node, (Function, Class)):
+            for desc in node.descendants():
+                if isinstance(desc, Var) and desc.name == name:
+                    return True
+    return False
+
+
+#
+# Condições de desvio
+#
+class FusedBranches(Rewriter):
+    """
+    Reescreve as condições de `if` e `while` como condições de desvio, que
+    calculam diretamente a decisão de salto sem chamar `truthy()`.
+    """
+
+    def __init__(self, report: Report):
+        self.report = report
+
+    def rewrite_node(self, node: Node) -> Node:
+        if type(node) is If:
+            self.report.add("branch", "condição de if fundida")
+            return BranchIf(to_test(node.cond), node.then_branch, node.else_branch)
+        if type(node) is While:
+            self.report.add("branch", "condição de while fundida")
+            return BranchWhile(to_test(node.cond), node.body)
+        return node
+
+
+def to_test(expr: Expr) -> Expr:
+    """
+    Converte uma expressão numa condição que avalia para um bool do Python
+    com o mesmo valor de `truthy(expr.eval(ctx))`.
+    """
+    match expr:
+        case BinOp(left=left, right=right, ops=op) if op in CompareTest.NATIVE_OPS:
+            return CompareTest(left, right, op)
+        case And(left=left, right=right):
+            return AndTest(to_test(left), to_test(right))
+        case Or(left=left, right=right):
+            return OrTest(to_test(left), to_test(right))
+        case UnaryOp(op=ops.not_, operand=operand):
+            return NotTest(to_test(operand))
+        case Literal(value=value):
+            return Literal(ops.truthy(value))
+    return TruthyTest(expr)
+
+
+#
+# Chamadas a funções nativas
+#
+class NativeCalls(Rewriter):
+    """
+    Substitui chamadas a variáveis livres, como `sqrt(x)`, por `NativeCall`.
+
+    Uma variável é livre se o programa não declara nenhuma variável, função,
+    classe ou parâmetro com o mesmo nome. Ela se refere a uma função nativa
+    ou a um valor do ambiente passado pelo usuário; no segundo caso, a guarda
+    de `NativeCall` recorre a uma chamada comum.
+    """
+
+    def __init__(self, tree: Node, report: Report):
+        self.report = report
+        self.bound = bound_names(tree)
+
+    def rewrite_node(self, node: Node) -> Node:
+        match node:
+            case Call(callee=Var(name=name)) if type(node) is Call and name not in self.bound:
+                self.report.add("native", f"chamada nativa {name}")
+                return NativeCall.from_call(node)
+        return node
+
+
+def bound_names(tree: Node) -> set[str]:
+    """
+    Todos os nomes declarados em algum escopo da árvore, inclusive parâmetros.
+    """
+    names: set[str] = set()
+    for node in tree.descendants():
+        if isinstance(node, (VarDef, Function, Class)):
+            names.add(node.name)
+        if isinstance(node, Function):
+            names.update(node.params)
+    return names
+
+
+#
+# Eliminação de código morto
+#
+class DeadCode(Rewriter):
+    """
+    Remove comandos que não afetam a execução do programa:
+
+    * comandos após um `return` no mesmo bloco;
+    * desvios `if`/`while` com condição constante;
+    * expressões usadas como comando sem efeitos colaterais, como o
+      `Literal(None)` gerado para laços `for` sem incremento;
+    * variáveis locais nunca usadas cujo inicializador é constante.
+    """
+
+    def __init__(self, report: Report):
+        self.report = report
+        self.removed: set[int] = set()
+
+    def removed_stmt(self) -> Block:
+        """
+        Bloco vazio que marca um comando removido. Ele é descartado quando
+        aparece numa lista de comandos.
+        """
+        block = Block([])
+        self.removed.add(id(block))
+        return block
+
+    def rewrite_node(self, node: Node) -> Node:
+        match node:
+            case If(cond=Literal(value=value)):
+                self.report.add("dead-code", f"if com condição constante {ops.show(value)}")
+                branch = node.then_branch if ops.truthy(value) else node.else_branch
+                return self.removed_stmt() if branch is None else branch
+            case While(cond=Literal(value=value)) if not ops.truthy(value):
+                self.report.add("dead-code", f"while com condição constante {ops.show(value)}")
+                return self.removed_stmt()
+            case Block(stmts=stmts):
+                self.simplify(stmts, local=True)
+            case Program(stmts=stmts):
+                self.simplify(stmts, local=False)
+        return node
+
+    def simplify(self, stmts: list, local: bool) -> None:
+        result = []
+        for i, stmt in enumerate(stmts):
+            if id(stmt) in self.removed:
+                continue
+            if isinstance(stmt, Expr) and is_trivial(stmt):
+                self.report.add("dead-code", f"expressão sem efeitos {describe(stmt)}")
+                continue
+            result.append(stmt)
+            if always_returns(stmt) and i + 1 < len(stmts):
+                n = len(stmts) - i - 1
+                self.report.add("dead-code", f"{n} comando(s) inalcançável(is) após return")
+                break
+
+        if local:
+            for stmt in list(result):
+                if (
+                    isinstance(stmt, VarDef)
+                    and is_trivial(stmt.value)
+                    and not uses_name(result, stmt)
+                ):
+                    self.report.add("dead-code", f"variável local {stmt.name} não usada")
+                    result.remove(stmt)
+
+        stmts[:] = result
+
+
+def is_trivial(expr: Node) -> bool:
+    """
+    Verifica se a avaliação da expressão não tem efeitos colaterais e nunca
+    falha.
+    """
+    match expr:
+        case Literal():
+            return True
+        case And(left=left, right=right) | Or(left=left, right=right):
+            return is_trivial(left) and is_trivial(right)
+        case UnaryOp(op=ops.not_, operand=operand):
+            return is_trivial(operand)
+        case BinOp(left=left, right=right, ops=ops.eq | ops.ne):
+            return is_trivial(left) and is_trivial(right)
+    return False
+
+
+def always_returns(stmt: Node) -> bool:
+    """
+    Verifica se a execução do comando sempre termina num `return`.
+    """
+    match stmt:
+        case Return():
+            return True
+        case Block(stmts=stmts):
+            return any(always_returns(s) for s in stmts)
+        case If(then_branch=then_branch, else_branch=else_branch):
+            return (
+                else_branch is not None
+                and always_returns(then_branch)
+                and always_returns(else_branch)
+            )
+    return False
+
+
+def uses_name(stmts: list, vardef: VarDef) -> bool:
+    """
+    Verifica se algum comando, além da declaração, lê ou atribui a variável.
+    """
+    for stmt in stmts:
+        if stmt is vardef:
+            continue
+        for node in stmt.descendants():
+            if isinstance(node, (Var, Assign)) and node.name == vardef.name:
+                return True
+    return False
+
+
+def describe(node: Node) -> str:
+    """
+    Descrição curta de um nó para o relatório do otimizador.
+    """
+    if isinstance(node, Literal):
+        return ops.show_repr(node.value)
+    return type(node).__name__
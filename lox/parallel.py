@@ -0,0 +1,176 @@
+"""
+Execução de funções Lox em vários processos.
+
+`parallel_map()` aplica uma função Lox a uma sequência de valores usando um
+pool de processos. A função é serializada uma única vez e enviada a cada
+processo na inicialização; os argumentos seguem em blocos e os resultados
+voltam na ordem original.
+
+    >>> ctx = lox.Ctx.from_dict({})
+    >>> lox.eval("fun square(x) { return x * x; }", ctx)
+    >>> lox.parallel_map(ctx["square"], [1.0, 2.0, 3.0], workers=2)
+    [1.0, 4.0, 9.0]
+
+Cada processo recebe uma cópia da função, então ela não pode depender de
+estado mutável compartilhado: funções que capturam instâncias, coleções
+nativas ou que atribuem variáveis externas são rejeitadas (veja
+`snapshot()`).
+"""
+
+import copy
+import os
+import pickle
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from itertools import islice
+from typing import Iterable, Iterator
+
+from .analysis import free_variables
+from .ast import Value
+from .ctx import Ctx
+from .errors import LoxError
+from .natives import NativeFunction
+from .runtime import LoxClass, LoxFunction, Rope
+
+# Valores que podem ser copiados para outro processo sem mudar o
+# significado do programa.
+IMMUTABLE_TYPES = (float, str, bool, type(None), NativeFunction)
+
+# Número de valores enviados a um processo de cada vez
+CHUNK_SIZE = 64
+
+
+def parallel_map(
+    function: LoxFunction,
+    values: Iterable[Value],
+    workers: int | None = None,
+    chunksize: int = CHUNK_SIZE,
+) -> list[Value]:
+    """
+    Aplica uma função Lox de um argumento a cada valor, em paralelo.
+
+    Args:
+        function:
+            Função Lox de um argumento. Veja `snapshot()` para as restrições.
+        values:
+            Argumentos. São consumidos à medida que os processos ficam
+            livres, com no máximo dois blocos pendentes por processo.
+        workers:
+            Número de processos. Por padrão, o número de CPUs.
+        chunksize:
+            Número de valores enviados a um processo de cada vez.
+    """
+    if not isinstance(function, LoxFunction):
+        raise LoxError(f"parallel_map requer uma função Lox, não {function}.")
+    if len(function.params) != 1:
+        n = len(function.params)
+        raise LoxError(f"Expected 1 arguments but function takes {n}.")
+    if chunksize < 1:
+        raise ValueError("chunksize deve ser positivo")
+
+    try:
+        payload = pickle.dumps(snapshot(function))
+    except (pickle.PicklingError, AttributeError, TypeError) as e:
+        raise LoxError(f"{function}: não pode ser enviada a outro processo ({e}).") from e
+
+    workers = workers or os.cpu_count() or 1
+    results: list[Value] = []
+    with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=(payload,)) as pool:
+        pending: deque[Future] = deque()
+        for chunk in _chunks(values, chunksize):
+            pending.append(pool.submit(_map_chunk, chunk))
+            if len(pending) >= 2 * workers:
+                results.extend(pending.popleft().result())
+        while pending:
+            results.extend(pending.popleft().result())
+    return results
+
+
+def snapshot(function: LoxFunction) -> LoxFunction:
+    """
+    Cópia da função cujo contexto guarda somente as variáveis que ela lê.
+
+    Funções e classes capturadas são copiadas da mesma forma, preservando
+    recursões e ciclos. O resultado não referencia o escopo global original
+    e pode ser serializado com `pickle`.
+
+    Levanta um LoxError se a função atribui variáveis externas ou captura
+    valores mutáveis (instâncias, coleções nativas, etc.).
+    """
+    return _Snapshot().function(function)
+
+
+class _Snapshot:
+    """
+    Copia funções e classes, guardando as cópias já criadas para que
+    referências cíclicas apontem para a mesma cópia.
+    """
+
+    def __init__(self):
+        self.copies: dict[int, LoxFunction | LoxClass] = {}
+
+    def function(self, function: LoxFunction, bound: Iterable[str] = ()) -> LoxFunction:
+        if id(function) in self.copies:
+            return self.copies[id(function)]  # type: ignore[return-value]
+
+        # copy.copy passa por __getstate__: cópias de MemoizedFunction
+        # começam com o cache vazio.
+        clone = self.copies[id(function)] = copy.copy(function)
+
+        read, assigned = free_variables(function, bound)
+        if assigned:
+            raise LoxError(f"{function}: atribui a variável externa '{min(assigned)}'.")
+
+        scopes = list(function.ctx.iter_scopes())
+        builtins = scopes[-1]
+        scope: dict[str, Value] = {}
+        for name in sorted(read):
+            owner = next((s for s in scopes if name in s), builtins)
+            if owner is not builtins:
+                scope[name] = self.value(function, name, owner[name])
+        clone.ctx = Ctx(scope, Ctx(builtins, None))
+        return clone
+
+    def cls(self, cls: LoxClass) -> LoxClass:
+        if id(cls) in self.copies:
+            return self.copies[id(cls)]  # type: ignore[return-value]
+
+        clone = self.copies[id(cls)] = LoxClass(cls.name, {})
+        if cls.base is not None:
+            clone.base = self.cls(cls.base)
+        for name, method in cls.methods.items():
+            clone.methods[name] = self.function(method, bound=("this",))
+        return clone
+
+    def value(self, function: LoxFunction, name: str, value: Value) -> Value:
+        if isinstance(value, Rope):
+            return value.flatten()
+        if isinstance(value, IMMUTABLE_TYPES):
+            return value
+        if isinstance(value, LoxFunction):
+            return self.function(value)
+        if isinstance(value, LoxClass):
+            return self.cls(value)
+        raise LoxError(f"{function}: captura o valor mutável '{name}'.")
+
+
+def _chunks(values: Iterable[Value], size: int) -> Iterator[list[Value]]:
+    iterator = iter(values)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+#
+# Código executado nos processos do pool
+#
+_worker_function: LoxFunction | None = None
+
+
+def _init_worker(payload: bytes) -> None:
+    global _worker_function
+    _worker_function = pickle.loads(payload)
+
+
+def _map_chunk(chunk: list[Value]) -> list[Value]:
+    assert _worker_function is not None
+    return list(_worker_function.map(chunk))
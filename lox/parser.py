@@ -5,32 +5,57 @@ Define a gramática da Linguagem e funções para realizar a análise sintática
 análise léxica, etc.
 """
 
+from functools import cache
 from pathlib import Path
+from time import perf_counter_ns
 from typing import Iterator
 
 from lark import Lark, Token, Tree
+from lark.lexer import LexerThread
 
 from .ast import Expr, Program
+from .optimizer import Report, eliminate_dead_code
+from .timings import Timings
 from .transformer import LoxTransformer
 
 DIR = Path(__file__).parent
 GRAMMAR_PATH = DIR / "grammar.lark"
 
 
-ast_parser = Lark(
-    GRAMMAR_PATH.open(),
-    transformer=LoxTransformer(),
-    parser="lalr",
-    start=["start", "expr"],
-)
-cst_parser = Lark(
-    GRAMMAR_PATH.open(),
-    parser="lalr",
-    start=["start", "expr"],
-)
-
+@cache
+def get_parser(cst: bool = False) -> Lark:
+    """
+    Constrói o parser na primeira vez em que é usado.
 
-def parse(src: str) -> Program:
+    Construir as tabelas LALR é a parte mais cara de importar o `lox`.
+    Processos que não analisam código (ex.: o cliente de `lox run --server`)
+    não pagam esse custo. Os parsers continuam acessíveis como
+    `lox.parser.ast_parser` e `lox.parser.cst_parser`.
+    """
+    with GRAMMAR_PATH.open() as grammar:
+        if cst:
+            return Lark(grammar, parser="lalr", start=["start", "expr"])
+        return Lark(
+            grammar,
+            transformer=LoxTransformer(),
+            parser="lalr",
+            start=["start", "expr"],
+        )
+
+
+def __getattr__(name: str) -> Lark:
+    if name == "ast_parser":
+        return get_parser()
+    if name == "cst_parser":
+        return get_parser(cst=True)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def parse(
+    src: str,
+    report: Report | None = None,
+    timings: Timings | None = None,
+) -> Program:
     """
     Função que recebe um código fonte e retorna a árvore sintática.
 
@@ -41,14 +66,72 @@ def parse(src: str) -> Program:
     Args:
         src (str):
             Código fonte a ser analisado.
+        report (Report):
+            Se fornecido, registra o código morto removido da árvore.
+        timings (Timings):
+            Se fornecido, acumula o tempo de cada fase (veja `lox.timings`).
     """
-    tree = ast_parser.parse(src, start="start")
+    if timings is not None:
+        return parse_timed(src, report, timings)
+    tree = get_parser().parse(src, start="start")
     assert isinstance(tree, Program), f"Esperava um Program, mas recebi {type(tree)}"
     tree.validate_tree()
     tree.desugar_tree()
+    eliminate_dead_code(tree, report)
     return tree
 
 
+def parse_timed(src: str, report: Report | None, timings: Timings) -> Program:
+    """
+    Versão de `parse` que mede cada fase.
+
+    A árvore do Lark é produzida pelo parser sem transformador e convertida
+    depois, para separar o LALR da transformação.
+    """
+    frontend = get_parser(cst=True).parser
+    lexer = TimedLexer(frontend.lexer)
+    with timings.phase("parse"):
+        cst = frontend.parser.parse(LexerThread(lexer, src), "start")
+    timings.parse -= lexer.elapsed
+    timings.lex += lexer.elapsed
+
+    with timings.phase("transform"):
+        tree = LoxTransformer().transform(cst)
+        del cst
+    assert isinstance(tree, Program), f"Esperava um Program, mas recebi {type(tree)}"
+    with timings.phase("validate"):
+        tree.validate_tree()
+    with timings.phase("desugar"):
+        tree.desugar_tree()
+    with timings.phase("optimize"):
+        eliminate_dead_code(tree, report)
+    return tree
+
+
+class TimedLexer:
+    """
+    Envolve o lexer do Lark e acumula em `elapsed` o tempo gasto produzindo
+    tokens, em nanossegundos.
+    """
+
+    def __init__(self, lexer):
+        self.lexer = lexer
+        self.elapsed = 0
+
+    def make_lexer_state(self, text: str):
+        return self.lexer.make_lexer_state(text)
+
+    def lex(self, lexer_state, parser_state) -> Iterator[Token]:
+        tokens = self.lexer.lex(lexer_state, parser_state)
+        while True:
+            start = perf_counter_ns()
+            token = next(tokens, None)
+            self.elapsed += perf_counter_ns() - start
+            if token is None:
+                return
+            yield token
+
+
 def parse_expr(src: str) -> Expr:
     """
     Função que recebe um código fonte e retorna a árvore sintática
@@ -70,7 +153,7 @@ def parse_expr(src: str) -> Expr:
         >>> parse_expr("1 + 2 * 3").eval(Ctx())
         7
     """
-    tree = ast_parser.parse(src, start="expr")
+    tree = get_parser().parse(src, start="expr")
     assert isinstance(tree, Expr), f"Esperava um Expr, mas recebi {type(tree)}"
     tree.validate_tree()
     tree.desugar_tree()
@@ -92,11 +175,11 @@ def parse_cst(src: str, expr: bool = False) -> Tree:
             Se True, analisa o código como se fosse apenas uma expressão.
     """
     start = "expr" if expr else "start"
-    return cst_parser.parse(src, start=start)
+    return get_parser(cst=True).parse(src, start=start)
 
 
 def lex(src: str) -> Iterator[Token]:
     """
     Retorna um iterador sobre os tokens do código fonte.
     """
-    return ast_parser.lex(src)
+    return get_parser().lex(src)
@@ -0,0 +1,378 @@
+"""
+Profilers de programas Lox.
+
+O cProfile mostra apenas os métodos do interpretador (`Node.eval`,
+`LoxFunction.call`, ...). O `Profiler` acompanha as mesmas chamadas com
+`sys.setprofile`, mas atribui o tempo às funções Lox e às linhas do código
+fonte onde os nós começam (veja `Node.line`):
+
+    >>> with Profiler() as profiler:
+    ...     lox.eval(src)
+    >>> print(profiler.report(src))
+    >>> profiler.write_collapsed("perfil.collapsed")
+
+O arquivo gerado por `write_collapsed` está no formato de pilhas colapsadas
+aceito por ferramentas de flame graph (flamegraph.pl, speedscope, etc.).
+
+Todos os eventos de chamada do Python passam pelo profiler, o que torna a
+execução várias vezes mais lenta e distorce laços curtos. Apenas a thread que
+chamou `start()` é acompanhada.
+
+O `SamplingProfiler` tem a mesma interface, mas apenas inspeciona a pilha do
+Python periodicamente, a partir de um sinal de temporizador. O custo é
+pequeno e o resultado é estatístico: contagens de amostras por pilha de
+funções Lox, com a linha em execução em cada nível.
+"""
+
+import signal
+import sys
+from collections import Counter
+from dataclasses import dataclass
+from time import perf_counter_ns, process_time_ns
+from typing import Iterable
+
+from .ast import Block, Program
+from .node import Node
+from .runtime import LoxFunction, LoxInstance
+
+# Nome da "função" que representa o código fora de funções
+SCRIPT = "<script>"
+
+# Intervalo padrão entre amostras do `SamplingProfiler`, em segundos de CPU
+SAMPLE_INTERVAL = 0.001
+
+# Fração máxima do tempo de CPU gasta pelo `SamplingProfiler` percorrendo
+# pilhas. Amostras de pilhas muito fundas fazem o profiler pular os sinais
+# seguintes até que o custo volte a esse limite.
+SAMPLE_OVERHEAD = 0.02
+
+# Campos dos registros da pilha do profiler
+FUNC, LINE, STACK, START, CHILDREN, KIND = range(6)
+
+# Tipos de registro: nó na mesma linha do pai, nó numa linha nova, chamada
+NODE, NEW_LINE, CALL = range(3)
+
+# Nós que agrupam comandos de várias linhas. Eles herdam a linha do pai, para
+# que o tempo inclusivo de uma linha não inclua as linhas seguintes.
+CONTAINERS = (Program, Block)
+
+
+@dataclass
+class Stats:
+    """
+    Custos acumulados de uma função ou linha. Tempos em nanossegundos.
+
+    Para funções, `calls` conta as chamadas; para linhas, o número de vezes
+    em que a execução entrou na linha vinda de outra.
+    """
+
+    calls: int = 0
+    evals: int = 0
+    inclusive: int = 0
+    exclusive: int = 0
+
+
+class Profiler:
+    """
+    Mede chamadas, avaliações de nós e tempos inclusivos e exclusivos por
+    função Lox e por linha.
+
+    Em funções recursivas, o tempo inclusivo é contado apenas na chamada
+    mais externa, como no cProfile.
+    """
+
+    def __init__(self):
+        self.functions: dict[str, Stats] = {}
+        self.lines: dict[int, Stats] = {}
+        self.line_functions: dict[int, str] = {}
+        self.stacks: Counter[tuple[str, ...]] = Counter()
+        self.records: list[list] = []
+        self.active: Counter = Counter()
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self.node_codes = frozenset(eval_codes())
+        self.call_code = LoxFunction.call.__code__
+        self.records = [[SCRIPT, None, (SCRIPT,), perf_counter_ns(), 0, CALL]]
+        self.stats(SCRIPT).calls += 1
+        self.active[SCRIPT] += 1
+        sys.setprofile(self.dispatch)
+
+    def stop(self) -> None:
+        sys.setprofile(None)
+        while self.records:
+            self.leave()
+
+    def dispatch(self, frame, event: str, arg) -> None:
+        if event == "call":
+            code = frame.f_code
+            if code in self.node_codes:
+                self.enter_node(frame.f_locals["self"])
+            elif code is self.call_code:
+                self.enter_function(frame.f_locals["self"])
+        elif event == "return":
+            code = frame.f_code
+            if (code in self.node_codes or code is self.call_code) and len(self.records) > 1:
+                self.leave()
+
+    def stats(self, function: str) -> Stats:
+        try:
+            return self.functions[function]
+        except KeyError:
+            stats = self.functions[function] = Stats()
+            return stats
+
+    def enter_node(self, node: Node) -> None:
+        parent = self.records[-1]
+        function = parent[FUNC]
+        line = parent[LINE] if type(node) in CONTAINERS else node.line or parent[LINE]
+        self.stats(function).evals += 1
+        kind = NODE
+        if line is not None:
+            try:
+                stats = self.lines[line]
+            except KeyError:
+                stats = self.lines[line] = Stats()
+                self.line_functions[line] = function
+            stats.evals += 1
+            if line != parent[LINE] or parent[KIND] == CALL:
+                kind = NEW_LINE
+                stats.calls += 1
+                self.active[line] += 1
+        self.records.append([function, line, parent[STACK], perf_counter_ns(), 0, kind])
+
+    def enter_function(self, function: LoxFunction) -> None:
+        parent = self.records[-1]
+        name = function_name(function)
+        self.stats(name).calls += 1
+        self.active[name] += 1
+        stack = parent[STACK] + (name,)
+        self.records.append([name, parent[LINE], stack, perf_counter_ns(), 0, CALL])
+
+    def leave(self) -> None:
+        now = perf_counter_ns()
+        record = self.records.pop()
+        elapsed = now - record[START]
+        own = elapsed - record[CHILDREN]
+        if self.records:
+            self.records[-1][CHILDREN] += elapsed
+
+        function, line, kind = record[FUNC], record[LINE], record[KIND]
+        self.stats(function).exclusive += own
+        self.stacks[record[STACK]] += own
+        if line is not None:
+            self.lines[line].exclusive += own
+
+        if kind == CALL:
+            self.active[function] -= 1
+            if not self.active[function]:
+                self.stats(function).inclusive += elapsed
+        elif kind == NEW_LINE:
+            self.active[line] -= 1
+            if not self.active[line]:
+                self.lines[line].inclusive += elapsed
+
+    def report(self, source: str | None = None, limit: int = 20) -> str:
+        """
+        Tabelas de funções e linhas, ordenadas pelo tempo exclusivo.
+
+        Se o código fonte for passado, mostra o texto de cada linha.
+        """
+        source_lines = source.splitlines() if source is not None else []
+        header = f"{'chamadas':>9} {'avaliações':>11} {'inclusivo':>11} {'exclusivo':>11}"
+
+        out = [f"{header}  função"]
+        functions = sorted(self.functions.items(), key=lambda item: -item[1].exclusive)
+        for name, stats in functions[:limit]:
+            out.append(f"{format_stats(stats)}  {name}")
+
+        out.append("")
+        out.append(f"{header}  linha")
+        lines = sorted(self.lines.items(), key=lambda item: -item[1].exclusive)
+        for line, stats in lines[:limit]:
+            text = ""
+            if 0 < line <= len(source_lines):
+                text = "  " + source_lines[line - 1].strip()
+            out.append(f"{format_stats(stats)}  {line:>5} ({self.line_functions[line]}){text}")
+        return "\n".join(out)
+
+    def collapsed(self) -> Iterable[str]:
+        """
+        Linhas no formato de pilhas colapsadas: funções separadas por `;` e
+        o tempo exclusivo em microssegundos.
+        """
+        for stack, ns in sorted(self.stacks.items()):
+            if ns >= 1000:
+                yield f"{';'.join(stack)} {ns // 1000}"
+
+    def write_collapsed(self, path: str) -> None:
+        with open(path, "w", encoding="utf-8") as file:
+            for line in self.collapsed():
+                file.write(line + "\n")
+
+
+class SamplingProfiler:
+    """
+    Profiler estatístico baseado em SIGPROF.
+
+    A cada `interval` segundos de CPU, o tratador do sinal percorre a pilha do
+    Python e a traduz para uma pilha de funções Lox: cada quadro de
+    `LoxFunction.call` vira um nível e o nó mais interno avaliado dentro dele
+    dá a linha. Amostras tiradas fora da execução de um programa Lox são
+    descartadas.
+
+    O custo de uma amostra cresce com a profundidade da pilha. Depois de uma
+    amostra cara, os sinais seguintes são apenas contados, até que o tempo
+    gasto nas amostras volte a `SAMPLE_OVERHEAD` do total, e entram como peso
+    da próxima amostra. Assim `samples` conta sinais, não amostras, e continua
+    proporcional ao tempo de CPU.
+
+    Sinais só são tratados na thread principal, portanto o profiler deve ser
+    iniciado nela e só acompanha o código executado por ela.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL):
+        self.interval = interval
+        self.samples: Counter[tuple[tuple[str, int | None], ...]] = Counter()
+        self.previous = None
+        self.cost = 0
+        self.cpu = 0
+        self.pending = 0
+        self.resume = 0
+
+    def __enter__(self) -> "SamplingProfiler":
+        self.start()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+
+    def start(self) -> None:
+        self.node_codes = frozenset(eval_codes())
+        self.call_code = LoxFunction.call.__code__
+        self.previous = signal.signal(signal.SIGPROF, self.sample)
+        self.cpu -= process_time_ns()
+        signal.setitimer(signal.ITIMER_PROF, self.interval, self.interval)
+
+    def stop(self) -> None:
+        signal.setitimer(signal.ITIMER_PROF, 0)
+        self.cpu += process_time_ns()
+        signal.signal(signal.SIGPROF, self.previous or signal.SIG_DFL)
+
+    def sample(self, signum, frame) -> None:
+        start = perf_counter_ns()
+        self.pending += 1
+        if start < self.resume:
+            return
+
+        node_codes, call_code = self.node_codes, self.call_code
+        stack = []
+        line = None
+        inside = False
+        while frame is not None:
+            code = frame.f_code
+            if code is call_code:
+                stack.append((function_name(frame.f_locals["self"]), line))
+                line = None
+                inside = True
+            elif line is None and code in node_codes:
+                line = frame.f_locals["self"].line
+                inside = True
+            frame = frame.f_back
+        if inside:
+            stack.append((SCRIPT, line))
+            stack.reverse()
+            self.samples[tuple(stack)] += self.pending
+        self.pending = 0
+        cost = perf_counter_ns() - start
+        self.cost += cost
+        self.resume = start + int(cost / SAMPLE_OVERHEAD)
+
+    @property
+    def total(self) -> int:
+        return sum(self.samples.values())
+
+    def report(self, source: str | None = None, limit: int = 20) -> str:
+        """
+        Sinais próprios e totais por função e sinais por linha.
+        """
+        own: Counter[str] = Counter()
+        total: Counter[str] = Counter()
+        lines: Counter[tuple[str, int]] = Counter()
+        for stack, count in self.samples.items():
+            name, line = stack[-1]
+            own[name] += count
+            if line is not None:
+                lines[name, line] += count
+            for name in {name for name, _ in stack}:
+                total[name] += count
+
+        n = self.total or 1
+        source_lines = source.splitlines() if source is not None else []
+        out = [
+            f"{self.total} sinais a cada {self.interval * 1000:g} ms de CPU; "
+            f"custo das amostras: {self.cost / 1e6:.1f} ms "
+            f"({self.cost / (self.cpu or 1):.1%} do tempo de CPU)",
+            "",
+        ]
+        out.append(f"{'próprios':>9} {'%':>6} {'totais':>9} {'%':>6}  função")
+        for name, count in own.most_common(limit):
+            out.append(
+                f"{count:>9} {count / n:>6.1%} {total[name]:>9} {total[name] / n:>6.1%}  {name}"
+            )
+        out.append("")
+        out.append(f"{'sinais':>9} {'%':>6}  linha")
+        for (name, line), count in lines.most_common(limit):
+            text = ""
+            if 0 < line <= len(source_lines):
+                text = "  " + source_lines[line - 1].strip()
+            out.append(f"{count:>9} {count / n:>6.1%}  {line:>5} ({name}){text}")
+        return "\n".join(out)
+
+    def collapsed(self) -> Iterable[str]:
+        """
+        Linhas no formato de pilhas colapsadas, com quadros `função:linha` e o
+        número de sinais.
+        """
+        for stack, count in sorted(self.samples.items(), key=lambda item: str(item[0])):
+            frames = (name if line is None else f"{name}:{line}" for name, line in stack)
+            yield f"{';'.join(frames)} {count}"
+
+    write_collapsed = Profiler.write_collapsed
+
+
+def eval_codes() -> Iterable:
+    """
+    Objetos de código de todos os métodos `eval` dos nós.
+    """
+    pending = [Node]
+    while pending:
+        cls = pending.pop()
+        pending.extend(cls.__subclasses__())
+        method = cls.__dict__.get("eval")
+        if method is not None and hasattr(method, "__code__"):
+            yield method.__code__
+
+
+def function_name(function: LoxFunction) -> str:
+    """
+    Nome da função, com o nome da classe no caso de métodos.
+    """
+    this = function.ctx.scope.get("this")
+    if type(this) is LoxInstance:
+        return f"{this._LoxInstance__cls.name}.{function.name}"
+    return function.name
+
+
+def format_stats(stats: Stats) -> str:
+    return (
+        f"{stats.calls:>9} {stats.evals:>11} "
+        f"{stats.inclusive / 1e6:>8.2f} ms {stats.exclusive / 1e6:>8.2f} ms"
+    )
+
@@ -0,0 +1,225 @@
+"""
+Programas compilados.
+
+`lox.compile()` faz de uma só vez o trabalho que `lox.eval()` repete a cada
+chamada: análise sintática, validação e otimização. O resultado pode ser
+executado várias vezes, inclusive em várias threads ao mesmo tempo, cada
+execução com o seu próprio contexto.
+
+    >>> program = lox.compile("print x + 1;")
+    >>> program.run({"x": 1})
+    2
+    >>> program.run({"x": 41})
+    42
+"""
+
+import copy
+from dataclasses import dataclass, field
+
+from . import optimizer
+from .ast import Value
+from .ctx import Ctx, _Builtins
+from .node import Node
+from .optimizer import Options, Report
+from .parser import parse
+from .runtime import METER, OUTPUT, REGISTRY, SCHEDULER, YIELD_INTERVAL, Budget, Output, Scheduler
+from .timings import Timings, phase
+from .tracing import Tracer, instrument, tracing
+
+
+@dataclass(frozen=True)
+class CompiledProgram:
+    """
+    Árvore sintática validada e otimizada, pronta para ser executada.
+
+    A árvore pertence ao programa e não é modificada pelas execuções. Os
+    únicos estados alterados durante a execução são os caches de
+    especialização de nós como `NativeCall`, que são protegidos por guardas
+    e substituídos atomicamente.
+    """
+
+    tree: Node
+    options: Options | None = None
+    report: Report = field(default_factory=Report, compare=False)
+
+    def run(
+        self,
+        env: Ctx | dict[str, Value] | None = None,
+        budget: Budget | None = None,
+        timings: Timings | None = None,
+        tracer: Tracer | None = None,
+    ) -> Value:
+        """
+        Executa o programa no ambiente dado e retorna o valor resultante.
+
+        Aceita os mesmos ambientes, orçamentos, medições e tracers que
+        `lox.eval()`.
+        """
+        with phase(timings, "eval"):
+            return execute(self.tree, env, budget, tracer)
+
+    async def run_async(
+        self,
+        env: Ctx | dict[str, Value] | None = None,
+        interval: int = YIELD_INTERVAL,
+        budget: Budget | None = None,
+        timings: Timings | None = None,
+        tracer: Tracer | None = None,
+    ) -> Value:
+        """
+        Executa o programa sem bloquear o laço de eventos (veja
+        `execute_async`).
+        """
+        with phase(timings, "eval"):
+            return await execute_async(self.tree, env, interval, budget, tracer)
+
+
+def compile(
+    src: str | Node,
+    optimize: Options | None = None,
+    skip_validation: bool = False,
+    timings: Timings | None = None,
+    builtins: dict | None = None,
+) -> CompiledProgram:
+    """
+    Compila o código fonte num programa que pode ser executado várias vezes.
+
+    Args:
+        src:
+            Código fonte em formato de string ou um nó AST. Nós são copiados,
+            de modo que a árvore original não é modificada.
+        optimize:
+            Opções do otimizador (veja `lox.optimizer.Options`).
+        skip_validation:
+            Se `True`, ignora a validação do código fonte.
+        timings:
+            Se fornecido, acumula o tempo de cada fase da compilação (veja
+            `lox.Timings`).
+        builtins:
+            Registro de funções nativas consultado pelo otimizador para
+            decidir quais delas são puras. Por padrão, usa `BUILTINS`.
+    """
+    report = Report()
+    if isinstance(src, Node):
+        tree = copy.deepcopy(src)
+    else:
+        tree = parse(src, report, timings)
+
+    if not skip_validation:
+        with phase(timings, "validate"):
+            tree.validate_tree()
+
+    if optimize is not None:
+        with phase(timings, "optimize"):
+            optimizer.optimize(tree, optimize, report, builtins)
+
+    return CompiledProgram(tree, optimize, report)
+
+
+def execute(
+    tree: Node,
+    env: Ctx | dict[str, Value] | None = None,
+    budget: Budget | None = None,
+    tracer: Tracer | None = None,
+) -> Value:
+    """
+    Avalia uma árvore já preparada num novo contexto ou no contexto dado.
+
+    Se houver um orçamento, a execução é interrompida com `BudgetExceeded`
+    quando algum dos limites for ultrapassado. Se houver um tracer, ele
+    recebe os eventos da execução (veja `lox.tracing`).
+
+    A saída dos comandos `print` é bufferizada (veja `lox.runtime.Output`) e
+    escrita ao final da execução ou antes da mensagem de erro.
+    """
+    env = global_ctx(env)
+    output = start_output(env)
+    if tracer is not None:
+        tree = instrument(tree)
+    with tracing(tracer, budget) as meter:
+        token = METER.set(meter)
+        output_token = OUTPUT.set(output)
+        registry_token = REGISTRY.set(registry(env))
+        try:
+            return tree.eval(env)
+        except Exception as e:
+            output.flush()
+            report_error(e, env)
+            raise
+        finally:
+            output.flush()
+            REGISTRY.reset(registry_token)
+            OUTPUT.reset(output_token)
+            METER.reset(token)
+
+
+async def execute_async(
+    tree: Node,
+    env: Ctx | dict[str, Value] | None = None,
+    interval: int = YIELD_INTERVAL,
+    budget: Budget | None = None,
+    tracer: Tracer | None = None,
+) -> Value:
+    """
+    Versão assíncrona de `execute`.
+
+    A árvore é avaliada com `aeval`, que devolve o controle ao laço de eventos
+    a cada `interval` iterações de laços ou chamadas de funções Lox, e
+    aguarda as funções nativas assíncronas. Cada execução tem o seu próprio
+    contador, de modo que vários programas podem rodar concorrentemente.
+    """
+    env = global_ctx(env)
+    output = start_output(env)
+    if tracer is not None:
+        tree = instrument(tree)
+    with tracing(tracer, budget) as meter:
+        token = SCHEDULER.set(Scheduler(interval, output))
+        meter_token = METER.set(meter)
+        output_token = OUTPUT.set(output)
+        registry_token = REGISTRY.set(registry(env))
+        try:
+            return await tree.aeval(env)
+        except Exception as e:
+            output.flush()
+            report_error(e, env)
+            raise
+        finally:
+            output.flush()
+            REGISTRY.reset(registry_token)
+            OUTPUT.reset(output_token)
+            METER.reset(meter_token)
+            SCHEDULER.reset(token)
+
+
+def global_ctx(env: Ctx | dict[str, Value] | None) -> Ctx:
+    if env is None:
+        return Ctx.from_dict({})
+    if not isinstance(env, Ctx):
+        return Ctx.from_dict(env)
+    return env
+
+
+def start_output(env: Ctx) -> Output:
+    """
+    Cria a saída de uma execução. Se ela começa dentro de outra (ex.: numa
+    função nativa), a saída externa é escrita antes, para manter a ordem.
+    """
+    outer = OUTPUT.get()
+    if outer is not None:
+        outer.flush()
+    return Output.from_ctx(env)
+
+
+def registry(env: Ctx) -> _Builtins | None:
+    """
+    Registro de funções nativas do contexto, que guarda o estado do
+    interpretador usado durante a execução (veja `lox.runtime.REGISTRY`).
+    """
+    builtins = env.builtins()
+    return builtins if isinstance(builtins, _Builtins) else None
+
+
+def report_error(error: Exception, env: Ctx) -> None:
+    stdout = env.stdout()
+    print(f"Programa terminou com um erro: {error}", file=stdout)
+    print("Variáveis:", env, file=stdout)
@@ -1,10 +1,19 @@
+import asyncio
 import builtins
-from dataclasses import dataclass
+import math
+import sys
+import time
+from collections import OrderedDict
+from contextvars import ContextVar
+from dataclasses import dataclass, field
 from operator import neg
-from typing import TYPE_CHECKING
-from types import BuiltinFunctionType, FunctionType
+from reprlib import recursive_repr
+from typing import TYPE_CHECKING, Callable, Iterable, Iterator, NamedTuple, Sequence, TextIO
+from types import BuiltinFunctionType, FunctionType, NoneType
 
-from .ctx import Ctx
+from .ctx import OUTPUT_BUFFER_SIZE, Ctx, _Builtins
+from .errors import LoxError
+from .natives import Array, List, Map
 
 if TYPE_CHECKING:
     from .ast import Stmt, Value
@@ -25,8 +34,16 @@ __all__ = [
     "sub",
     "truthy",
     "truediv",
+    "Budget",
+    "BudgetExceeded",
+    "CacheInfo",
     "LoxClass",
     "LoxInstance",
+    "MemoizedFunction",
+    "Meter",
+    "Output",
+    "Rope",
+    "Scheduler",
 ]
 
 
@@ -42,6 +59,9 @@ class LoxClass:
 
     def __call__(self, *args):
         """Permite instanciar objetos Lox chamando a classe."""
+        meter = METER.get()
+        if meter is not None:
+            meter.allocate()
         instance = LoxInstance(self)
         try:
             initializer = self.get_method("init")
@@ -53,6 +73,23 @@ class LoxClass:
         bound_init(*args)
         return instance
 
+    async def acall(self, args: list["Value"]) -> "LoxInstance":
+        """
+        Versão assíncrona de `__call__`, que executa o `init` com `aeval`.
+        """
+        meter = METER.get()
+        if meter is not None:
+            meter.allocate()
+        instance = LoxInstance(self)
+        try:
+            initializer = self.get_method("init")
+        except LoxError:
+            if args:
+                raise LoxError(f"Expected 0 arguments but got {len(args)}.")
+            return instance
+        await initializer.bind(instance).acall(args)
+        return instance
+
     def get_method(self, name: str) -> "LoxFunction":
         if name in self.methods:
             return self.methods[name]
@@ -81,6 +118,11 @@ class LoxInstance:
         except LoxError:
             raise AttributeError(attr)
 
+    def __setstate__(self, state: dict) -> None:
+        # Definido explicitamente para que o pickle não consulte __getattr__
+        # antes de a classe da instância ser restaurada.
+        self.__dict__.update(state)
+
     def init(self, *args):
         try:
             initializer = self.__cls.get_method("init")
@@ -110,6 +152,9 @@ class LoxFunction:
 
     def call(self, args: list["Value"]):
         env = dict(zip(self.params, args, strict=True))
+        meter = METER.get()
+        if meter is not None:
+            meter.enter()
         ctx = self.ctx.push(env)
         try:
             for stmt in self.body:
@@ -118,14 +163,520 @@ class LoxFunction:
             return e.value
         finally:
             ctx.pop()
+            if meter is not None:
+                meter.depth -= 1
 
     def __call__(self, *args):
         return self.call(list(args))
 
+    async def acall(self, args: list["Value"]):
+        """
+        Versão assíncrona de `call`, usada por `lox.eval_async()`.
+
+        Cada chamada é um ponto de preempção (veja `Scheduler`).
+        """
+        scheduler = SCHEDULER.get()
+        if scheduler is not None and scheduler.tick():
+            await asyncio.sleep(0)
+        env = dict(zip(self.params, args, strict=True))
+        meter = METER.get()
+        if meter is not None:
+            meter.enter()
+        ctx = self.ctx.push(env)
+        try:
+            for stmt in self.body:
+                await stmt.aeval(ctx)
+        except LoxReturn as e:
+            return e.value
+        finally:
+            ctx.pop()
+            if meter is not None:
+                meter.depth -= 1
+
+    def call_many(self, rows: Iterable[Sequence["Value"]]) -> Iterator["Value"]:
+        """
+        Chama a função com cada sequência de argumentos de `rows` e produz os
+        resultados à medida que são calculados.
+
+        Se o corpo não declara funções nem classes, nada pode guardar uma
+        referência ao escopo da chamada. Neste caso, um único escopo é
+        reaproveitado por todas as chamadas e um `return` no final do corpo é
+        avaliado sem levantar `LoxReturn`. Strings longas são entregues como
+        `str`, nunca como ropes.
+        """
+        n = len(self.params)
+        if type(self) is not LoxFunction or not self.reuses_frame():
+            for row in rows:
+                if len(row) != n:
+                    raise LoxError(f"Expected {n} arguments but got {len(row)}.")
+                yield flatten(self.call(list(row)))
+            return
+
+        from .ast import Return  # import tardio: ast depende deste módulo
+
+        params = self.params
+        env: dict[str, "Value"] = {}
+        ctx = self.ctx.push(env)
+        body = self.body
+        last = body[-1] if body else None
+        if type(last) is Return:
+            body = body[:-1]
+            result_expr = last.value
+        else:
+            result_expr = None
+
+        for row in rows:
+            if len(row) != n:
+                raise LoxError(f"Expected {n} arguments but got {len(row)}.")
+            env.clear()
+            env.update(zip(params, row))
+            try:
+                for stmt in body:
+                    stmt.eval(ctx)
+                result = None if result_expr is None else result_expr.eval(ctx)
+            except LoxReturn as e:
+                result = e.value
+            yield flatten(result)
+
+    def map(self, values: Iterable["Value"]) -> Iterator["Value"]:
+        """
+        Aplica uma função de um argumento a cada valor (veja `call_many`).
+        """
+        if len(self.params) != 1:
+            raise LoxError(f"Expected 1 arguments but function takes {len(self.params)}.")
+        return self.call_many((value,) for value in values)
+
+    def reuses_frame(self) -> bool:
+        """
+        Verifica se o escopo de uma chamada pode ser reaproveitado pela
+        próxima, ou seja, se o corpo não cria closures.
+        """
+        from .ast import Class, Function
+
+        return not any(
+            isinstance(node, (Function, Class))
+            for stmt in self.body
+            for node in stmt.descendants()
+        )
+
     def __str__(self) -> str:
         return f"<fn {self.name}>"
 
 
+# Número padrão de pontos de preempção entre duas devoluções de controle ao
+# laço de eventos
+YIELD_INTERVAL = 1000
+
+
+class Scheduler:
+    """
+    Conta os pontos de preempção de uma execução assíncrona.
+
+    Laços (a cada iteração) e chamadas de funções Lox são pontos de
+    preempção. A cada `interval` pontos, a execução devolve o controle ao
+    laço de eventos do asyncio. Cada tarefa tem o seu próprio contador em
+    `SCHEDULER`, definido por `lox.execute_async()`.
+
+    Antes de ceder o controle, a saída bufferizada da execução é escrita,
+    para que a saída de programas concorrentes não fique fora de ordem.
+    """
+
+    __slots__ = ("interval", "left", "output")
+
+    def __init__(self, interval: int = YIELD_INTERVAL, output: "Output | None" = None):
+        self.interval = interval
+        self.left = interval
+        self.output = output
+
+    def tick(self) -> bool:
+        """
+        Registra um ponto de preempção e diz se é hora de ceder o controle.
+        """
+        self.left -= 1
+        if self.left > 0:
+            return False
+        self.left = self.interval
+        if self.output is not None:
+            self.output.flush()
+        return True
+
+
+# Só existe dentro de `execute_async`; fora dela, a execução nunca cede o
+# controle.
+SCHEDULER: ContextVar[Scheduler | None] = ContextVar("SCHEDULER", default=None)
+
+
+# Número de passos entre duas consultas ao relógio quando há limite de tempo
+CLOCK_INTERVAL = 1000
+
+
+class BudgetExceeded(LoxError):
+    """
+    Erro de execução levantado quando um programa esgota o seu orçamento.
+    """
+
+
+@dataclass(frozen=True)
+class Budget:
+    """
+    Limites de recursos de uma execução. None desabilita o limite.
+
+    Args:
+        steps:
+            Número máximo de passos, contados a cada iteração de laço e a
+            cada chamada de função Lox, inclusive as expandidas pelo
+            otimizador.
+        depth:
+            Profundidade máxima de chamadas de funções Lox aninhadas.
+        instances:
+            Número máximo de instâncias de classes Lox criadas.
+        seconds:
+            Tempo máximo de execução. O relógio é consultado a cada
+            `CLOCK_INTERVAL` passos, portanto funções nativas demoradas
+            podem ultrapassar o limite.
+    """
+
+    steps: int | None = None
+    depth: int | None = None
+    instances: int | None = None
+    seconds: float | None = None
+
+    def meter(self) -> "Meter":
+        return Meter(self)
+
+
+class Meter:
+    """
+    Consumo de um `Budget` durante uma execução.
+
+    A execução corrente guarda o seu medidor em `METER`. Laços consultam a
+    variável uma única vez e chamam `step()` a cada iteração. `step()` só
+    decrementa um contador: o limite de passos e o relógio são verificados
+    em `refuel()`, a cada `CLOCK_INTERVAL` passos no máximo.
+    """
+
+    __slots__ = (
+        "budget",
+        "fuel",
+        "left",
+        "depth",
+        "max_depth",
+        "instances",
+        "max_instances",
+        "deadline",
+    )
+
+    def __init__(self, budget: Budget):
+        self.budget = budget
+        self.fuel = budget.steps
+        self.left = 0
+        self.depth = 0
+        self.instances = 0
+        # Limites ausentes viram valores inatingíveis, para que as
+        # verificações sejam uma única comparação
+        self.max_depth = sys.maxsize if budget.depth is None else budget.depth
+        self.max_instances = sys.maxsize if budget.instances is None else budget.instances
+        self.deadline = None
+        if budget.seconds is not None:
+            self.deadline = time.monotonic() + budget.seconds
+
+    def step(self) -> None:
+        self.left -= 1
+        if self.left < 0:
+            self.refuel()
+
+    def refuel(self) -> None:
+        """
+        Verifica os limites de passos e de tempo e libera o próximo lote de
+        passos, já descontando o passo atual.
+        """
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise BudgetExceeded(f"Limite de tempo de {self.budget.seconds:g}s excedido.")
+        if self.fuel is None:
+            self.left = CLOCK_INTERVAL - 1
+        elif self.fuel == 0:
+            self.left = 0
+            raise BudgetExceeded(f"Limite de {self.budget.steps} passos excedido.")
+        else:
+            chunk = min(self.fuel, CLOCK_INTERVAL)
+            self.fuel -= chunk
+            self.left = chunk - 1
+
+    def enter(self) -> None:
+        """
+        Registra o início de uma chamada de função Lox, que também conta como
+        um passo. Quem chama deve decrementar `depth` ao final da chamada.
+        """
+        self.left -= 1
+        if self.left < 0:
+            self.refuel()
+        if self.depth >= self.max_depth:
+            raise BudgetExceeded(f"Limite de {self.max_depth} chamadas aninhadas excedido.")
+        self.depth += 1
+
+    def allocate(self) -> None:
+        """
+        Registra a criação de uma instância.
+        """
+        self.instances += 1
+        if self.instances > self.max_instances:
+            raise BudgetExceeded(f"Limite de {self.max_instances} instâncias excedido.")
+
+
+METER: ContextVar[Meter | None] = ContextVar("METER", default=None)
+
+
+class Output:
+    """
+    Saída bufferizada dos comandos `print` de uma execução.
+
+    Os textos são acumulados e escritos no fluxo de uma só vez quando passam
+    de `buffer_size` caracteres, ao final da execução, antes da mensagem de
+    erro e quando o programa chama `flush()`. Com `line_buffering`, cada
+    linha é escrita imediatamente, como convém a um terminal. Um fluxo None
+    indica o sys.stdout do momento da escrita.
+
+    A execução corrente guarda a sua saída em `OUTPUT`.
+    """
+
+    __slots__ = ("stream", "limit", "parts", "size")
+
+    def __init__(
+        self,
+        stream: TextIO | None = None,
+        buffer_size: int = OUTPUT_BUFFER_SIZE,
+        line_buffering: bool = False,
+    ):
+        self.stream = stream
+        self.limit = 0 if line_buffering else buffer_size
+        self.parts: list[str] = []
+        self.size = 0
+
+    @classmethod
+    def from_ctx(cls, ctx: Ctx) -> "Output":
+        """
+        Saída com o fluxo e as opções do registro de funções nativas do
+        contexto (veja `Ctx.stdout`).
+        """
+        builtins = ctx.builtins()
+        return cls(
+            getattr(builtins, "stdout", None),
+            getattr(builtins, "buffer_size", OUTPUT_BUFFER_SIZE),
+            getattr(builtins, "line_buffering", False),
+        )
+
+    def write(self, text: str) -> None:
+        self.parts.append(text)
+        self.size += len(text)
+        if self.size >= self.limit:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self.parts:
+            return
+        stream = self.stream or sys.stdout
+        stream.write("".join(self.parts))
+        self.parts.clear()
+        self.size = 0
+        stream.flush()
+
+
+OUTPUT: ContextVar[Output | None] = ContextVar("OUTPUT", default=None)
+
+# Registro de funções nativas do interpretador que executa o programa
+# corrente. Guarda a política de internação de strings e os caches de `show`
+# (veja `_Builtins`). Fora de uma execução, nada é internado nem guardado.
+REGISTRY: ContextVar[_Builtins | None] = ContextVar("REGISTRY", default=None)
+
+
+class CacheInfo(NamedTuple):
+    """Estatísticas do cache de uma função memoizada."""
+
+    hits: int
+    misses: int
+    evictions: int
+    maxsize: int
+    currsize: int
+
+
+# Tipos de argumentos aceitos como chave do cache. Booleanos ficam de fora
+# pois True == 1.0 no Python e as chaves colidiriam.
+MEMO_KEY_TYPES = (float, str, type(None))
+
+
+@dataclass
+class MemoizedFunction(LoxFunction):
+    """
+    Função Lox pura cujos resultados são guardados num cache LRU limitado,
+    indexado pela tupla de argumentos.
+
+    Chamadas com argumentos que não podem servir de chave (instâncias,
+    booleanos, zeros negativos, etc.) são executadas normalmente.
+    """
+
+    maxsize: int = 128
+    cache: OrderedDict = field(default_factory=OrderedDict, repr=False)
+    hits: int = field(default=0, repr=False)
+    misses: int = field(default=0, repr=False)
+    evictions: int = field(default=0, repr=False)
+
+    def call(self, args: list["Value"]):
+        key = memo_key(args)
+        if key is None:
+            return super().call(args)
+
+        cache = self.cache
+        try:
+            result = cache[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            cache.move_to_end(key)
+            return result
+
+        self.misses += 1
+        result = super().call(args)
+        cache[key] = result
+        if len(cache) > self.maxsize:
+            cache.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    async def acall(self, args: list["Value"]):
+        key = memo_key(args)
+        if key is None:
+            return await super().acall(args)
+
+        cache = self.cache
+        try:
+            result = cache[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            cache.move_to_end(key)
+            return result
+
+        self.misses += 1
+        result = await super().acall(args)
+        cache[key] = result
+        if len(cache) > self.maxsize:
+            cache.popitem(last=False)
+            self.evictions += 1
+        return result
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(
+            self.hits, self.misses, self.evictions, self.maxsize, len(self.cache)
+        )
+
+    def cache_clear(self) -> None:
+        self.cache.clear()
+        self.hits = self.misses = self.evictions = 0
+
+    def __getstate__(self) -> dict:
+        # Cópias serializadas começam com o cache vazio.
+        state = self.__dict__.copy()
+        state.update(cache=OrderedDict(), hits=0, misses=0, evictions=0)
+        return state
+
+
+def memo_key(args: list["Value"]) -> tuple | None:
+    """
+    Cria a chave de cache para uma lista de argumentos ou retorna None caso
+    algum argumento não possa ser usado como chave.
+    """
+    for arg in args:
+        if type(arg) not in MEMO_KEY_TYPES:
+            return None
+        # 0.0 e -0.0 são iguais, mas 1 / x distingue os dois
+        if arg == 0.0 and math.copysign(1.0, arg) < 0:
+            return None
+    return tuple(args)
+
+
+class Rope:
+    """
+    Representação preguiçosa de strings longas produzidas por concatenação.
+
+    Guarda os pedaços numa lista (um "join buffer") que só é juntada quando a
+    string é observada por `show`, `eq`, `print` ou por uma função nativa.
+    Várias ropes podem compartilhar a mesma lista: cada uma enxerga apenas os
+    `size` primeiros pedaços. Acrescentar um pedaço à rope mais recente
+    reaproveita a lista, de modo que o padrão `s = s + pedaço` custa O(1)
+    amortizado em vez de copiar a string inteira a cada passo.
+
+    Para o código Lox, uma rope é indistinguível de uma string comum.
+    """
+
+    __slots__ = ("parts", "size", "length", "flat")
+
+    def __init__(self, parts: list[str], size: int, length: int):
+        self.parts = parts
+        self.size = size
+        self.length = length
+        self.flat: str | None = None
+
+    @classmethod
+    def concat(cls, a: "str | Rope", b: "str | Rope") -> "Rope":
+        if type(a) is Rope:
+            parts = a.parts
+            if len(parts) != a.size:
+                # Outra rope já estendeu a lista compartilhada
+                parts = parts[: a.size]
+            length = a.length
+        else:
+            parts = [a]
+            length = len(a)
+        if type(b) is Rope:
+            b = b.flatten()
+        parts.append(b)
+        return cls(parts, len(parts), length + len(b))
+
+    def flatten(self) -> str:
+        """
+        Junta os pedaços numa string do Python.
+        """
+        if self.flat is None:
+            parts = self.parts
+            if len(parts) != self.size:
+                parts = parts[: self.size]
+            self.flat = "".join(parts)
+            self.parts = [self.flat]
+            self.size = 1
+        return self.flat
+
+    def __str__(self) -> str:
+        return self.flatten()
+
+    def __repr__(self) -> str:
+        return repr(self.flatten())
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, (str, Rope)):
+            return self.flatten() == str(other)
+        return NotImplemented
+
+    def __hash__(self) -> int:
+        return hash(self.flatten())
+
+
+# Tamanho a partir do qual a concatenação de strings produz uma rope
+ROPE_THRESHOLD = 1024
+
+def flatten(value: "Value") -> "Value":
+    """
+    Converte ropes em strings comuns e retorna os outros valores intactos.
+    """
+    if type(value) is Rope:
+        return value.flatten()
+    return value
+
+
 class LoxReturn(Exception):
     """Exceção para retornar de uma função Lox."""
 
@@ -134,10 +685,6 @@ class LoxReturn(Exception):
         super().__init__()
 
 
-class LoxError(Exception):
-    """Exceção para erros de execução Lox."""
-
-
 
 #Utilidades e saída
 
@@ -147,36 +694,100 @@ inf = float("inf")
 
 def print(value: "Value"):
     """Imprime um valor lox."""
-    builtins.print(show(value))
+    output = OUTPUT.get()
+    if output is None:
+        builtins.print(show(value))
+    else:
+        output.write(show(value) + "\n")
 
 
 def show(value: "Value") -> str:
     """Converte valor lox para string."""
-    if isinstance(value, LoxClass):
-        return str(value)
-    if isinstance(value, LoxInstance):
-        return str(value)
-    if value is None:
-        return "nil"
-    if value is True:
-        return "true"
-    if value is False:
-        return "false"
-    if isinstance(value, float):
-        text = str(value)
-        return text.removesuffix(".0")
-    if isinstance(value, LoxFunction):
-        return str(value)
-    if isinstance(value, type):
-        return value.__name__
-    if isinstance(value, (FunctionType, BuiltinFunctionType)):
-        return "<native fn>"
-    return str(value)
+    function = SHOW.get(type(value))
+    if function is None:
+        function = show_function(type(value))
+    return function(value)
+
+
+def show_function(cls: type) -> Callable[["Value"], str]:
+    """
+    Procura a conversão de uma subclasse dos tipos em `SHOW` e a guarda no
+    registro do interpretador corrente. Tipos desconhecidos são convertidos
+    com `str`.
+    """
+    registry = REGISTRY.get()
+    if registry is not None:
+        function = registry.show_functions.get(cls)
+        if function is not None:
+            return function
+    function = next((SHOW[base] for base in cls.__mro__ if base in SHOW), str)
+    if registry is not None:
+        registry.show_functions[cls] = function
+    return function
+
+
+# Número máximo de textos de floats inteiros (ex.: 3.0 -> "3") guardados por
+# interpretador
+INTEGRAL_CACHE_SIZE = 4096
+
+
+def show_float(value: float) -> str:
+    registry = REGISTRY.get()
+    if registry is None:
+        return str(value).removesuffix(".0")
+    cache = registry.integral_floats
+    text = cache.get(value)
+    if text is not None:
+        return text
+    text = str(value).removesuffix(".0")
+    # O zero fica de fora, pois 0.0 == -0.0 e os dois seriam a mesma chave
+    if value and value.is_integer() and len(cache) < INTEGRAL_CACHE_SIZE:
+        cache[value] = text
+    return text
+
+
+def show_array(value: Array) -> str:
+    return "[" + ", ".join(map(show, value.data)) + "]"
+
+
+# Coleções que contêm a si mesmas são mostradas como "[...]" e "{...}"
+@recursive_repr("[...]")
+def show_list(value: List) -> str:
+    return "[" + ", ".join(map(show_repr, value.items)) + "]"
+
+
+@recursive_repr("{...}")
+def show_map(value: Map) -> str:
+    pairs = zip(value.keys(), value.items.values())
+    return "{" + ", ".join(f"{show_repr(k)}: {show_repr(v)}" for k, v in pairs) + "}"
+
+
+def show_native(value: "Value") -> str:
+    return "<native fn>"
+
+
+# Conversão de cada tipo de valor para string, usada por `show`
+SHOW: dict[type, Callable[["Value"], str]] = {
+    float: show_float,
+    str: str,
+    bool: lambda value: "true" if value else "false",
+    NoneType: lambda value: "nil",
+    Rope: str,
+    LoxClass: str,
+    LoxInstance: str,
+    LoxFunction: str,
+    type: lambda value: value.__name__,
+    FunctionType: show_native,
+    BuiltinFunctionType: show_native,
+    Array: show_array,
+    List: show_list,
+    Map: show_map,
+}
 
 
 def show_repr(value: "Value") -> str:
     """Mostra um valor lox, mas coloca aspas em strings."""
-    if isinstance(value, str):
+    if isinstance(value, (str, Rope)):
         return f'"{value}"'
     return show(value)
 
@@ -204,7 +815,15 @@ def add(a: "Value", b: "Value") -> "Value":
     if isinstance(a, float) and isinstance(b, float):
         return a + b
     if isinstance(a, str) and isinstance(b, str):
-        return a + b
+        if len(a) + len(b) < ROPE_THRESHOLD:
+            text = a + b
+            registry = REGISTRY.get()
+            if registry is not None and len(text) <= registry.intern_max_length:
+                return sys.intern(text)
+            return text
+        return Rope.concat(a, b)
+    if isinstance(a, (str, Rope)) and isinstance(b, (str, Rope)):
+        return Rope.concat(a, b)
     raise LoxError("Operands must be two numbers or two strings")
 
 
@@ -227,13 +846,54 @@ def truediv(a: "Value", b: "Value") -> float:
 
 
 def eq(a: "Value", b: "Value") -> bool:
-    if type(a) is not type(b):
+    if a is b:
+        # NaN é o único valor diferente de si mesmo
+        return type(a) is not float or a == a
+    cls = type(a)
+    if cls is not type(b):
+        if cls is Rope or type(b) is Rope:
+            return isinstance(a, (str, Rope)) and isinstance(b, (str, Rope)) and str(a) == str(b)
         return False
+    if cls is str or cls is float:
+        return a == b
     if isinstance(a, LoxFunction):
-        return a is b
+        # Funções são iguais somente a si mesmas
+        return False
+    if cls is List or cls is Map:
+        return eq_collections(a, b, set())
+    if cls is Array:
+        return a.data == b.data
     return a == b
 
 
+def eq_collections(a: List | Map, b: List | Map, seen: set[tuple[int, int]]) -> bool:
+    """
+    Compara duas listas ou dois maps elemento a elemento.
+
+    `seen` guarda os pares de coleções em comparação. Um par que reaparece
+    dentro de si mesmo é considerado igual, de modo que coleções que contêm a
+    si mesmas não recursam indefinidamente.
+    """
+    pair = (id(a), id(b))
+    if pair in seen:
+        return True
+    seen.add(pair)
+    if type(a) is List:
+        return len(a.items) == len(b.items) and all(
+            eq_items(x, y, seen) for x, y in zip(a.items, b.items)
+        )
+    return a.items.keys() == b.items.keys() and all(
+        eq_items(value, b.items[key], seen) for key, value in a.items.items()
+    )
+
+
+def eq_items(a: "Value", b: "Value", seen: set[tuple[int, int]]) -> bool:
+    cls = type(a)
+    if (cls is List or cls is Map) and cls is type(b) and a is not b:
+        return eq_collections(a, b, seen)
+    return eq(a, b)
+
+
 def ne(a: "Value", b: "Value") -> bool:
     return not eq(a, b)
 
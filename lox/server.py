@@ -0,0 +1,250 @@
+"""
+Servidor que executa scripts Lox num pool de processos pré-aquecidos.
+
+Iniciar um processo Python por script custa a inicialização do interpretador,
+a importação do `lark` e a construção do parser. `lox serve` mantém um pool
+de processos com tudo isso já pronto e recebe scripts por um socket Unix:
+
+    $ lox serve --workers 4 &
+    $ lox run --server programa.lox
+
+Cada script roda num contexto novo, com stdout e stderr capturados e um
+limite de tempo. Se não houver servidor escutando, `run_remote()` retorna
+None e `lox run --server` executa o script no próprio processo.
+
+O protocolo é uma linha JSON por requisição, com as chaves "source",
+"optimize" e "timeout", e uma linha JSON por resposta (veja `Response`).
+"""
+
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeout
+from concurrent.futures.process import BrokenProcessPool
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from dataclasses import asdict, dataclass
+from typing import Iterator
+
+from . import program
+from .errors import LoxError
+from .optimizer import Options
+from .parser import get_parser
+
+DEFAULT_SOCKET = os.path.join(tempfile.gettempdir(), f"lox-{os.getuid()}.sock")
+
+# Limite de tempo padrão de cada script, em segundos
+DEFAULT_TIMEOUT = 30.0
+
+# Tempo extra que o servidor espera além do limite antes de desistir de um
+# processo que não respondeu ao alarme
+GRACE_PERIOD = 5.0
+
+
+@dataclass
+class Response:
+    """
+    Resultado da execução de um script.
+
+    `status` segue a convenção dos processos: 0 indica sucesso.
+    """
+
+    stdout: str
+    stderr: str
+    status: int = 0
+
+
+def run_script(source: str, optimize: bool = False, timeout: float | None = None) -> Response:
+    """
+    Executa um script num contexto isolado, capturando a saída.
+
+    Executado pelos processos do pool. O limite de tempo usa SIGALRM e,
+    portanto, só funciona na thread principal.
+    """
+    stdout, stderr = io.StringIO(), io.StringIO()
+    status = 0
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            with time_limit(timeout):
+                compiled = program.compile(source, Options.full() if optimize else None)
+                compiled.run()
+        except (Exception, TimeLimitExceeded) as e:
+            print(f"{type(e).__name__}: {e}", file=sys.stderr)
+            status = 1
+    return Response(stdout.getvalue(), stderr.getvalue(), status)
+
+
+class TimeLimitExceeded(BaseException):
+    """
+    Levantado pelo alarme de `time_limit`.
+
+    Assim como `KeyboardInterrupt`, não é subclasse de `Exception`, para que
+    o interpretador, que trata alguns `LoxError` internamente, não o
+    intercepte.
+    """
+
+
+@contextmanager
+def time_limit(seconds: float | None) -> Iterator[None]:
+    """
+    Interrompe o bloco com `TimeLimitExceeded` se demorar mais que `seconds`.
+
+    O alarme é repetido a cada `seconds` até o fim do bloco, caso o erro seja
+    descartado por algum código que intercepta todas as exceções.
+    """
+    if not seconds:
+        yield
+        return
+
+    def on_alarm(signum, frame):
+        raise TimeLimitExceeded(f"Tempo limite de {seconds:g}s excedido.")
+
+    previous = signal.signal(signal.SIGALRM, on_alarm)
+    signal.setitimer(signal.ITIMER_REAL, seconds, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class Server(socketserver.ThreadingUnixStreamServer):
+    """
+    Aceita conexões num socket Unix e repassa os scripts ao pool.
+
+    Cada conexão é atendida por uma thread, que espera o resultado do
+    processo do pool. Se um processo morrer, o pool é recriado.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, path: str, workers: int | None = None, timeout: float = DEFAULT_TIMEOUT):
+        self.workers = workers or os.cpu_count() or 1
+        self.time_limit = timeout
+        self.lock = threading.Lock()
+        self.pool = self.start_pool()
+        super().__init__(path, _Handler)
+
+    def start_pool(self) -> ProcessPoolExecutor:
+        pool = ProcessPoolExecutor(self.workers, initializer=_warm_up)
+        for future in [pool.submit(_ready) for _ in range(self.workers)]:
+            future.result()
+        return pool
+
+    def run(self, request: dict) -> Response:
+        try:
+            source = request["source"]
+            optimize = bool(request.get("optimize", False))
+            timeout = min(float(request.get("timeout") or self.time_limit), self.time_limit)
+        except (KeyError, TypeError, ValueError) as e:
+            return Response("", f"Requisição inválida: {e!r}\n", 2)
+
+        pool = self.pool
+        try:
+            future = pool.submit(run_script, source, optimize, timeout)
+            return future.result(timeout + GRACE_PERIOD)
+        except FutureTimeout:
+            return Response("", f"Tempo limite de {timeout:g}s excedido.\n", 1)
+        except BrokenProcessPool:
+            with self.lock:
+                if self.pool is pool:
+                    self.pool = self.start_pool()
+            return Response("", "Processo do servidor terminou inesperadamente.\n", 1)
+
+    def server_close(self) -> None:
+        super().server_close()
+        self.pool.shutdown(cancel_futures=True)
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    server: Server
+
+    def handle(self) -> None:
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+            except ValueError as e:
+                response = Response("", f"Requisição inválida: {e}\n", 2)
+            else:
+                response = self.server.run(request)
+            self.wfile.write(json.dumps(asdict(response)).encode() + b"\n")
+            self.wfile.flush()
+
+
+def _warm_up() -> None:
+    get_parser()
+
+
+def _ready() -> None:
+    pass
+
+
+def serve(
+    path: str = DEFAULT_SOCKET,
+    workers: int | None = None,
+    timeout: float = DEFAULT_TIMEOUT,
+) -> None:
+    """
+    Inicia o servidor e atende requisições até receber SIGINT ou SIGTERM.
+    """
+    if os.path.exists(path):
+        if is_listening(path):
+            raise LoxError(f"Já existe um servidor escutando em {path}.")
+        os.unlink(path)
+
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    with Server(path, workers, timeout) as server:
+        print(f"Servidor Lox escutando em {path} ({server.workers} processos)", file=sys.stderr)
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            os.unlink(path)
+
+
+def is_listening(path: str) -> bool:
+    """
+    Verifica se há um servidor aceitando conexões no socket.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+    return True
+
+
+def run_remote(
+    source: str,
+    path: str = DEFAULT_SOCKET,
+    optimize: bool = False,
+    timeout: float | None = None,
+) -> Response | None:
+    """
+    Executa o script no servidor escutando em `path`.
+
+    Retorna None se não houver servidor, para que o chamador possa executar
+    o script localmente.
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(path)
+    except (FileNotFoundError, ConnectionRefusedError):
+        sock.close()
+        return None
+
+    request = {"source": source, "optimize": optimize, "timeout": timeout}
+    with sock, sock.makefile("rwb") as file:
+        file.write(json.dumps(request).encode() + b"\n")
+        file.flush()
+        line = file.readline()
+    if not line:
+        raise ConnectionError(f"O servidor em {path} encerrou a conexão.")
+    return Response(**json.loads(line))
@@ -0,0 +1,232 @@
+"""
+Gerador de programas Lox sintéticos.
+
+Os exemplos de `exemplos/` têm poucas dezenas de linhas e não mostram como
+o frontend (análise léxica, sintática, validação, etc.) se comporta com
+arquivos grandes. `generate` cria programas válidos de tamanho arbitrário,
+com classes, herança, funções, laços e condicionais aninhados:
+
+    >>> src = generate(lines=10_000, depth=4, classes=20, expr_length=6)
+
+O resultado é determinístico para uma mesma semente. Os programas também
+podem ser executados: todo laço tem um número fixo de iterações e funções
+só chamam funções "folha", que não chamam outras funções, de modo que o
+tempo de execução cresce linearmente com o tamanho.
+"""
+
+from dataclasses import dataclass, field
+from random import Random
+
+ARITHMETIC = ["+", "-", "*"]
+COMPARISON = ["<", "<=", ">", ">=", "==", "!="]
+LOGICAL = ["and", "or"]
+
+# Número de iterações dos laços gerados
+LOOP_COUNT = 3
+
+# Uma a cada LEAF_EVERY funções é uma folha
+LEAF_EVERY = 4
+
+
+def generate(
+    lines: int = 1000,
+    depth: int = 3,
+    classes: int = 5,
+    expr_length: int = 4,
+    seed: int = 0,
+) -> str:
+    """
+    Gera um programa Lox com aproximadamente `lines` linhas.
+
+    Args:
+        lines:
+            Número mínimo de linhas. O gerador para após a primeira função
+            que ultrapassa o limite.
+        depth:
+            Profundidade máxima de blocos aninhados dentro das funções.
+        classes:
+            Número de classes. Metade delas herda da classe anterior.
+        expr_length:
+            Número de operandos das expressões aritméticas.
+        seed:
+            Semente do gerador de números aleatórios.
+    """
+    generator = Generator(Random(seed), depth, expr_length)
+    for _ in range(classes):
+        generator.klass()
+    while len(generator.lines) < lines:
+        generator.function()
+    generator.main()
+    return "\n".join(generator.lines) + "\n"
+
+
+@dataclass
+class Generator:
+    """
+    Estado do gerador: linhas emitidas e declarações visíveis no nível
+    global.
+    """
+
+    random: Random
+    depth: int
+    expr_length: int
+    lines: list[str] = field(default_factory=list)
+    functions: list[tuple[str, int]] = field(default_factory=list)
+    leaves: list[tuple[str, int]] = field(default_factory=list)
+    classes: list[tuple[str, list[str], list[str]]] = field(default_factory=list)
+    counter: int = 0
+
+    def emit(self, indent: int, text: str) -> None:
+        self.lines.append("  " * indent + text)
+
+    def fresh(self, prefix: str) -> str:
+        self.counter += 1
+        return f"{prefix}{self.counter}"
+
+    def number(self) -> str:
+        return str(self.random.randint(0, 99))
+
+    def operand(self, names: list[str], calls: bool) -> str:
+        choice = self.random.random()
+        if names and choice < 0.5:
+            return self.random.choice(names)
+        if calls and self.leaves and choice < 0.6:
+            name, arity = self.random.choice(self.leaves)
+            args = ", ".join(self.operand(names, False) for _ in range(arity))
+            return f"{name}({args})"
+        return self.number()
+
+    def expr(self, names: list[str], calls: bool = True) -> str:
+        """
+        Expressão aritmética com `expr_length` operandos e alguns
+        parênteses.
+        """
+        out = self.operand(names, calls)
+        for _ in range(self.expr_length - 1):
+            op = self.random.choice(ARITHMETIC)
+            right = self.operand(names, calls)
+            if self.random.random() < 0.2:
+                out = f"({out})"
+            out = f"{out} {op} {right}"
+        return out
+
+    def condition(self, names: list[str]) -> str:
+        left = f"{self.expr(names)} {self.random.choice(COMPARISON)} {self.number()}"
+        if self.random.random() < 0.3:
+            right = f"{self.operand(names, False)} {self.random.choice(COMPARISON)} {self.number()}"
+            return f"{left} {self.random.choice(LOGICAL)} {right}"
+        return left
+
+    def block(
+        self,
+        indent: int,
+        names: list[str],
+        depth: int,
+        size: int,
+        counters: tuple[str, ...] = (),
+    ) -> None:
+        """
+        Emite `size` comandos. `names` são as variáveis numéricas visíveis;
+        novas variáveis são visíveis apenas no próprio bloco. Os contadores
+        dos laços envolventes podem ser lidos, mas nunca são atribuídos.
+        """
+        names = list(names)
+        for _ in range(size):
+            choice = self.random.random()
+            readable = [*names, *counters]
+            if choice < 0.3 or not names:
+                name = self.fresh("v")
+                self.emit(indent, f"var {name} = {self.expr(readable)};")
+                names.append(name)
+            elif choice < 0.5:
+                self.emit(indent, f"{self.random.choice(names)} = {self.expr(readable)};")
+            elif choice < 0.6:
+                self.emit(indent, f'print "{self.fresh("linha ")}: " + "ok";')
+            elif depth <= 0:
+                self.emit(indent, f"print {self.expr(readable)};")
+            elif choice < 0.75:
+                self.emit(indent, f"if ({self.condition(readable)}) {{")
+                self.block(indent + 1, names, depth - 1, self.random.randint(1, 4), counters)
+                self.emit(indent, "} else {")
+                self.block(indent + 1, names, depth - 1, self.random.randint(1, 3), counters)
+                self.emit(indent, "}")
+            elif choice < 0.9:
+                i = self.fresh("i")
+                self.emit(indent, f"for (var {i} = 0; {i} < {LOOP_COUNT}; {i} = {i} + 1) {{")
+                body = self.random.randint(1, 4)
+                self.block(indent + 1, names, depth - 1, body, (*counters, i))
+                self.emit(indent, "}")
+            else:
+                n = self.fresh("n")
+                self.emit(indent, f"var {n} = 0;")
+                self.emit(indent, f"while ({n} < {LOOP_COUNT}) {{")
+                body = self.random.randint(1, 3)
+                self.block(indent + 1, names, depth - 1, body, (*counters, n))
+                self.emit(indent, f"{n} = {n} + 1;")
+                self.emit(indent, "}")
+                counters = (*counters, n)
+
+    def function(self) -> None:
+        name = self.fresh("f")
+        params = [self.fresh("p") for _ in range(self.random.randint(0, 4))]
+        leaf = len(self.functions) % LEAF_EVERY == 0
+        self.emit(0, f"fun {name}({', '.join(params)}) {{")
+        if leaf:
+            self.emit(1, f"return {self.expr(params, calls=False)};")
+        else:
+            self.block(1, params, self.depth, self.random.randint(3, 8))
+            self.emit(1, f"return {self.expr(params)};")
+        self.emit(0, "}")
+        self.emit(0, "")
+        self.functions.append((name, len(params)))
+        if leaf:
+            self.leaves.append((name, len(params)))
+
+    def klass(self) -> None:
+        """
+        Emite uma classe com campos, um inicializador e alguns métodos.
+        Metade das classes herda da anterior e sobrescreve um método usando
+        `super`.
+        """
+        name = self.fresh("C")
+        base = self.classes[-1] if self.classes and self.random.random() < 0.5 else None
+        fields = [self.fresh("x") for _ in range(self.random.randint(1, 4))]
+        methods = [self.fresh("m") for _ in range(self.random.randint(1, 4))]
+        if base is not None:
+            methods.append(self.random.choice(base[2]))
+
+        self.emit(0, f"class {name} < {base[0]} {{" if base else f"class {name} {{")
+        self.emit(1, f"init({', '.join(fields)}) {{")
+        if base is not None:
+            self.emit(2, f"super.init({', '.join(self.number() for _ in base[1])});")
+        for field_name in fields:
+            self.emit(2, f"this.{field_name} = {field_name};")
+        self.emit(1, "}")
+        attrs = [f"this.{field_name}" for field_name in fields]
+        for method in methods:
+            self.emit(1, f"{method}(k) {{")
+            self.block(2, ["k"], min(self.depth, 2), self.random.randint(1, 4))
+            result = self.expr([*attrs, "k"])
+            if base is not None and method in base[2]:
+                result = f"super.{method}(k) + {result}"
+            self.emit(2, f"return {result};")
+            self.emit(1, "}")
+        self.emit(0, "}")
+        self.emit(0, "")
+        inherited = [m for m in base[2] if m not in methods] if base else []
+        self.classes.append((name, fields, methods + inherited))
+
+    def main(self) -> None:
+        """
+        Código no nível global que instancia todas as classes e chama todas
+        as funções.
+        """
+        for name, fields, methods in self.classes:
+            obj = self.fresh("o")
+            args = ", ".join(self.number() for _ in fields)
+            self.emit(0, f"var {obj} = {name}({args});")
+            for method in methods:
+                self.emit(0, f"print {obj}.{method}({self.number()});")
+        for name, arity in self.functions:
+            args = ", ".join(self.number() for _ in range(arity))
+            self.emit(0, f"print {name}({args});")
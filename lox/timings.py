@@ -0,0 +1,92 @@
+"""
+Tempo gasto em cada fase da execução de um script.
+
+`lox.eval()`, `lox.compile()` e a linha de comando executam várias fases
+em sequência. Passando um objeto `Timings`, cada fase é medida com
+`perf_counter_ns` e acumulada no campo correspondente:
+
+    >>> timings = Timings()
+    >>> lox.eval(src, timings=timings)
+    >>> timings.as_dict()
+    {'read': 0, 'lex': 181204, 'parse': 402113, ..., 'total': 1702332}
+
+Sem um `Timings`, as fases não são medidas e a análise sintática segue o
+caminho normal, em que a transformação da árvore acontece durante o LALR.
+Com medição, o parser produz a árvore do Lark e a transformação é feita
+depois, para que as duas fases possam ser separadas. A análise léxica é
+intercalada com o LALR e medida pelo tempo gasto produzindo os tokens.
+"""
+
+from contextlib import AbstractContextManager, contextmanager, nullcontext
+from dataclasses import asdict, dataclass, fields
+from time import perf_counter_ns
+from typing import Iterator
+
+# Nomes das fases mostrados na tabela
+LABELS = {
+    "read": "leitura",
+    "lex": "análise léxica",
+    "parse": "análise sintática (LALR)",
+    "transform": "transformação",
+    "validate": "validação",
+    "desugar": "remoção de açúcar",
+    "optimize": "otimização",
+    "eval": "execução",
+}
+
+
+@dataclass
+class Timings:
+    """
+    Tempo de cada fase, em nanossegundos.
+
+    Fases executadas mais de uma vez (ex.: a validação, feita por `parse` e
+    por `eval`) acumulam os tempos.
+    """
+
+    read: int = 0
+    lex: int = 0
+    parse: int = 0
+    transform: int = 0
+    validate: int = 0
+    desugar: int = 0
+    optimize: int = 0
+    eval: int = 0
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """
+        Mede o bloco e soma o tempo à fase `name`, mesmo que ele termine com
+        uma exceção.
+        """
+        start = perf_counter_ns()
+        try:
+            yield
+        finally:
+            setattr(self, name, getattr(self, name) + perf_counter_ns() - start)
+
+    @property
+    def total(self) -> int:
+        return sum(getattr(self, f.name) for f in fields(self))
+
+    def as_dict(self) -> dict[str, int]:
+        """
+        Tempos por fase e o total, em nanossegundos.
+        """
+        return {**asdict(self), "total": self.total}
+
+    def __str__(self) -> str:
+        total = self.total or 1
+        out = []
+        for f in fields(self):
+            ns = getattr(self, f.name)
+            out.append(f"{LABELS[f.name]:<26} {ns / 1e6:10.2f} ms {ns / total:7.1%}")
+        out.append(f"{'total':<26} {self.total / 1e6:10.2f} ms")
+        return "\n".join(out)
+
+
+def phase(timings: Timings | None, name: str) -> AbstractContextManager:
+    """
+    Mede o bloco na fase `name` de `timings`, se houver.
+    """
+    return nullcontext() if timings is None else timings.phase(name)
@@ -0,0 +1,358 @@
+"""
+Ganchos de execução para depuradores, cobertura e outras ferramentas.
+
+Um `Tracer` recebe eventos da execução de um programa Lox. Basta
+sobrescrever os métodos dos eventos de interesse:
+
+    >>> class Lines(Tracer):
+    ...     def on_line(self, line, node):
+    ...         print("linha", line)
+    >>> lox.eval(src, tracer=Lines())
+
+Eventos:
+
+- `on_call(function, args)`: início de uma chamada de função Lox, inclusive
+  métodos e inicializadores;
+- `on_return(function, value)`: fim da chamada. Também é emitido quando a
+  chamada termina com um erro, com `value` igual a None, de modo que as
+  chamadas e os retornos sempre se equilibram;
+- `on_line(line, node)`: antes de cada comando, a cada vez que ele é
+  executado, e antes de outros nós numa linha diferente da anterior, como
+  expressões usadas como comandos ou a condição de um laço;
+- `on_loop_backedge(node)`: ao final de cada iteração de um laço;
+- `on_error(error, node)`: quando um erro é levantado, uma única vez, no nó
+  mais interno onde ele apareceu.
+
+Uma execução com tracer avalia uma cópia da árvore (veja `instrument`), na
+qual cada nó é de uma subclasse instrumentada do seu tipo original. As
+funções e classes definidas por essa cópia também criam `LoxFunction`
+instrumentadas, que emitem `on_call` e `on_return`. Chamadas expandidas pelo
+otimizador voltam a ser chamadas comuns nessa cópia. As classes originais não
+são modificadas: execuções sem tracer, inclusive em outras threads, seguem
+os mesmos caminhos de sempre. Funções definidas por outras execuções, como
+as anteriores de um `Interpreter`, não emitem eventos.
+
+Os laços já avisam o medidor do orçamento (veja `lox.runtime.Meter`) a cada
+iteração. Com tracer, a execução usa um `TracingMeter`, que também emite
+`on_loop_backedge`.
+"""
+
+import copy
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from .ast import (
+    Block,
+    Class,
+    CountedLoop,
+    Expr,
+    Function,
+    Program,
+    Stmt,
+    SubstitutedCall,
+    Value,
+    While,
+)
+from .node import Node
+from .runtime import Budget, LoxClass, LoxFunction, LoxReturn, Meter
+
+# Nós cujas iterações emitem `on_loop_backedge`
+LOOPS = (While, CountedLoop)
+
+# Nós que agrupam comandos e não emitem `on_line`
+CONTAINERS = (Program, Block)
+
+# Nós que definem funções Lox, instrumentadas ao serem criadas
+DEFINITIONS = (Function, Class)
+
+# Implementações padrão de `aeval`, que apenas chamam `eval` e não precisam
+# ser instrumentadas
+DEFAULT_AEVAL = (Expr.aeval, Stmt.aeval)
+
+
+class Tracer:
+    """
+    Recebe os eventos de uma execução. Os métodos padrão não fazem nada.
+    """
+
+    def on_call(self, function: LoxFunction, args: list[Value]) -> None:
+        pass
+
+    def on_return(self, function: LoxFunction, value: Value) -> None:
+        pass
+
+    def on_line(self, line: int, node: Stmt) -> None:
+        pass
+
+    def on_loop_backedge(self, node: Stmt) -> None:
+        pass
+
+    def on_error(self, error: Exception, node: Node) -> None:
+        pass
+
+
+class Coverage(Tracer):
+    """
+    Conta quantas vezes cada linha foi executada.
+    """
+
+    def __init__(self):
+        self.lines: dict[int, int] = {}
+
+    def on_line(self, line: int, node: Stmt) -> None:
+        self.lines[line] = self.lines.get(line, 0) + 1
+
+
+class TracingMeter(Meter):
+    """
+    Medidor de uma execução com tracer. Além de controlar o orçamento, guarda
+    o estado dos eventos: os laços em execução, para que `step()` saiba qual
+    laço completou uma iteração, a linha do último `on_line` e o último erro
+    emitido.
+    """
+
+    __slots__ = ("tracer", "loops", "line", "delegated", "error")
+
+    def __init__(self, budget: Budget, tracer: Tracer):
+        super().__init__(budget)
+        self.tracer = tracer
+        self.loops: list[Stmt] = []
+        self.line: int | None = None
+        self.delegated: Node | None = None
+        self.error: Exception | None = None
+
+    def step(self) -> None:
+        self.tracer.on_loop_backedge(self.loops[-1])
+        super().step()
+
+    def begin(self, node: Node, line: bool, stmt: bool, loop: bool) -> None:
+        """
+        Início da avaliação de um nó. Comandos sempre emitem `on_line`;
+        outros nós, apenas se estiverem numa linha diferente da anterior.
+        """
+        if line and node.line is not None and (stmt or node.line != self.line):
+            self.line = node.line
+            self.tracer.on_line(node.line, node)
+        if loop:
+            self.loops.append(node)
+
+    def fail(self, error: Exception, node: Node) -> None:
+        """
+        Emite `on_error`, se o erro ainda não foi emitido por um nó mais
+        interno. `LoxReturn` não é um erro e é ignorado.
+        """
+        if error is not self.error and not isinstance(error, LoxReturn):
+            self.error = error
+            self.tracer.on_error(error, node)
+
+
+TRACING: ContextVar[TracingMeter | None] = ContextVar("TRACING", default=None)
+
+
+@contextmanager
+def tracing(tracer: Tracer | None, budget: Budget | None) -> Iterator[Meter | None]:
+    """
+    Produz o medidor da execução: um `TracingMeter`, se houver tracer, ou o
+    medidor comum do orçamento.
+
+    A árvore avaliada dentro do bloco deve ter passado por `instrument`.
+    """
+    if tracer is None:
+        yield None if budget is None else budget.meter()
+        return
+
+    meter = TracingMeter(budget or Budget(), tracer)
+    token = TRACING.set(meter)
+    try:
+        yield meter
+    finally:
+        TRACING.reset(token)
+
+
+#
+# Instrumentação
+#
+def instrument(tree: Node) -> Node:
+    """
+    Copia a árvore trocando o tipo de cada nó pela sua versão instrumentada.
+
+    A troca é feita em todos os nós copiados, inclusive os guardados fora dos
+    campos da árvore, como a expressão de um `InlinedCall`.
+    """
+    memo: dict[int, object] = {}
+    tree = copy.deepcopy(tree, memo)
+    for obj in memo.values():
+        if isinstance(obj, Node):
+            obj.__class__ = traced_node_class(type(obj))
+    return tree
+
+
+# Versões instrumentadas já criadas, indexadas pelo tipo original. Os valores
+# também são tipos originais, para que nós e funções já instrumentados sejam
+# mantidos.
+traced_classes: dict[type, type] = {}
+
+
+def traced_node_class(cls: type) -> type:
+    """
+    Subclasse de um tipo de nó que emite os eventos de `eval` e `aeval`.
+    """
+    traced = traced_classes.get(cls)
+    if traced is not None:
+        return traced
+    namespace = {}
+    if issubclass(cls, SubstitutedCall):
+        # A chamada original emite `on_call` e `on_return`
+        namespace["eval"] = traced_eval(cls, cls.eval_call)
+        namespace["aeval"] = traced_aeval(cls, cls.aeval_call)
+        return define(cls, namespace)
+    if hasattr(cls, "eval"):
+        namespace["eval"] = traced_eval(cls, cls.eval)
+    if getattr(cls, "aeval", DEFAULT_AEVAL[0]) not in DEFAULT_AEVAL:
+        namespace["aeval"] = traced_aeval(cls, cls.aeval)
+    return define(cls, namespace)
+
+
+def traced_function_class(cls: type) -> type:
+    """
+    Subclasse de `LoxFunction` que emite `on_call` e `on_return`. Métodos
+    ligados a uma instância continuam instrumentados.
+    """
+    traced = traced_classes.get(cls)
+    if traced is not None:
+        return traced
+    bind = cls.bind
+
+    def traced_bind(self, obj):
+        method = bind(self, obj)
+        method.__class__ = traced_function_class(type(method))
+        return method
+
+    namespace = {
+        "call": traced_call(cls.call),
+        "acall": traced_acall(cls.acall),
+        "bind": traced_bind,
+    }
+    return define(cls, namespace)
+
+
+def define(cls: type, namespace: dict) -> type:
+    # O nome é o mesmo do tipo original, que aparece em mensagens e relatórios
+    namespace["__qualname__"] = cls.__qualname__
+    namespace["__module__"] = cls.__module__
+    traced = type(cls.__name__, (cls,), namespace)
+    traced = traced_classes.setdefault(cls, traced)
+    traced_classes[traced] = traced
+    return traced
+
+
+def trace_definition(value: Value) -> None:
+    """
+    Instrumenta a função ou os métodos da classe criados por um nó da árvore
+    instrumentada.
+    """
+    if isinstance(value, LoxFunction):
+        value.__class__ = traced_function_class(type(value))
+    elif isinstance(value, LoxClass):
+        for method in value.methods.values():
+            method.__class__ = traced_function_class(type(method))
+
+
+# Vários `aeval` chamam `eval` quando a subárvore não tem pontos de
+# preempção; o nó fica marcado em `delegated` e o `eval` não repete os
+# eventos.
+
+
+def traced_eval(cls: type, eval):
+    line = not issubclass(cls, CONTAINERS)
+    stmt = issubclass(cls, Stmt)
+    loop = issubclass(cls, LOOPS)
+    definition = issubclass(cls, DEFINITIONS)
+
+    def traced(self, ctx):
+        meter = TRACING.get()
+        if meter is None:
+            return eval(self, ctx)
+        if meter.delegated is self:
+            meter.delegated = None
+            return eval(self, ctx)
+        meter.begin(self, line, stmt, loop)
+        try:
+            value = eval(self, ctx)
+        except Exception as error:
+            meter.fail(error, self)
+            raise
+        finally:
+            if loop:
+                meter.loops.pop()
+        if definition:
+            trace_definition(value)
+        return value
+
+    return traced
+
+
+def traced_aeval(cls: type, aeval):
+    line = not issubclass(cls, CONTAINERS)
+    stmt = issubclass(cls, Stmt)
+    loop = issubclass(cls, LOOPS)
+    definition = issubclass(cls, DEFINITIONS)
+
+    async def traced(self, ctx):
+        meter = TRACING.get()
+        if meter is None:
+            return await aeval(self, ctx)
+        meter.begin(self, line, stmt, loop)
+        meter.delegated = self
+        try:
+            value = await aeval(self, ctx)
+        except Exception as error:
+            meter.fail(error, self)
+            raise
+        finally:
+            if meter.delegated is self:
+                meter.delegated = None
+            if loop:
+                meter.loops.pop()
+        if definition:
+            trace_definition(value)
+        return value
+
+    return traced
+
+
+def traced_call(call):
+    def traced(self, args):
+        meter = TRACING.get()
+        if meter is None:
+            return call(self, args)
+        line = meter.line
+        meter.tracer.on_call(self, args)
+        value = None
+        try:
+            value = call(self, args)
+            return value
+        finally:
+            meter.line = line
+            meter.tracer.on_return(self, value)
+
+    return traced
+
+
+def traced_acall(acall):
+    async def traced(self, args):
+        meter = TRACING.get()
+        if meter is None:
+            return await acall(self, args)
+        line = meter.line
+        meter.tracer.on_call(self, args)
+        value = None
+        try:
+            value = await acall(self, args)
+            return value
+        finally:
+            meter.line = line
+            meter.tracer.on_return(self, value)
+
+    return traced
@@ -7,12 +7,14 @@ A resolução de vários exercícios requer a modificação ou implementação d
 métodos desta classe.
 """
 
+import sys
 from typing import Callable
 from lark import Transformer, v_args
 
 from . import runtime as op
 from .ast import *
 from .ast import UnaryOp
+from .node import Node
 
 
 def op_handler(op: Callable):
@@ -27,27 +29,53 @@ def op_handler(op: Callable):
     return method
 
 
-@v_args(inline=True)
+def inline_with_line(method: Callable, _data, children: list, _meta):
+    """
+    Chama o método com os filhos como argumentos, como `v_args(inline=True)`,
+    e marca o nó produzido com a linha do primeiro filho que a conhece.
+    """
+    node = method(*children)
+    if isinstance(node, Node) and node.line is None:
+        for child in children:
+            line = getattr(child, "line", None)
+            if line is not None:
+                node.line = line
+                break
+    return node
+
+
+def at(token, node: Node) -> Node:
+    """
+    Marca o nó com a linha do token.
+    """
+    node.line = token.line
+    return node
+
+
+@v_args(wrapper=inline_with_line)
 class LoxTransformer(Transformer):
 
     #Literais e Variáveis
+    # Nomes e literais de string são internados: valores iguais passam a ser o
+    # mesmo objeto, o que acelera buscas no contexto e comparações com `==`.
+    # Os métodos dos terminais recebem o token diretamente e marcam a linha.
     def VAR(self, token):
-        name = str(token)
-        return Var(name)
+        name = sys.intern(str(token))
+        return at(token, Var(name))
 
     def NUMBER(self, token):
         num = float(token)
-        return Literal(num)
+        return at(token, Literal(num))
 
     def STRING(self, token):
-        text = str(token)[1:-1]
-        return Literal(text)
+        text = sys.intern(str(token)[1:-1])
+        return at(token, Literal(text))
 
-    def NIL(self, _):
-        return Literal(None)
+    def NIL(self, token):
+        return at(token, Literal(None))
 
     def BOOL(self, token):
-        return Literal(token == "true")
+        return at(token, Literal(token == "true"))
 
     #Agrupamento
     def grouping(self, expr: Expr):
@@ -71,7 +99,7 @@ class LoxTransformer(Transformer):
         return UnaryOp(op=op.not_, operand=value)
 
     def neg(self, value):
-        return UnaryOp(op=lambda x: -x, operand=value)
+        return UnaryOp(op=op.neg, operand=value)
 
     def and_(self, left: Expr, right: Expr):
         return And(left=left, right=right)
@@ -89,11 +117,13 @@ class LoxTransformer(Transformer):
 
     #Acesso e chamadas
     def call(self, callee: Expr, *suffixes):
+        line = callee.line
         for kind, value in suffixes:
             if kind == "args":
                 callee = Call(callee, value)
             elif kind == "attr":
                 callee = Getattr(callee, value)
+            callee.line = line
         return callee
 
     def args(self, params: list):
@@ -145,7 +175,9 @@ class LoxTransformer(Transformer):
 
     def for_cmd(self, init: Stmt, cond: Expr, incr: Expr, body: Stmt):
         loop_body = Block([body, incr])
+        loop_body.line = body.line
         while_stmt = While(cond=cond, body=loop_body)
+        while_stmt.line = cond.line or init.line
         return Block([init, while_stmt])
 
     #Funções e métodos
@@ -1,3 +1,5 @@
+import contextlib
+import io
 import re
 from pathlib import Path
 from types import SimpleNamespace
@@ -7,6 +9,7 @@ import pytest
 from lark import Tree
 
 import lox
+from lox import Ctx, Options
 from lox.ast import Expr, Program
 
 pytest.register_assert_rewrite("lox.testing")
@@ -95,6 +98,21 @@ def mod_loader(exercises_folder: Path):
     return loader
 
 
+@pytest.fixture
+def run() -> Callable[..., tuple[Ctx, str]]:
+    """
+    Executa o programa num contexto novo e retorna o contexto e a saída.
+    """
+
+    def run(src: str, env: dict | None = None, options: Options | None = None):
+        ctx = Ctx.from_dict(env or {})
+        with contextlib.redirect_stdout(io.StringIO()) as fd:
+            lox.eval(src, ctx, optimize=options)
+        return ctx, fd.getvalue()
+
+    return run
+
+
 @pytest.fixture
 def parser(expr: bool):
     def parser(src: str) -> Expr | Program:
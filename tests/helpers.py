@@ -0,0 +1,50 @@
+"""
+Funções auxiliares compartilhadas pelos testes.
+"""
+
+from pathlib import Path
+
+import lox.testing
+
+EXAMPLES_PATH = Path(__file__).parent.parent / "exemplos"
+
+
+def examples():
+    yield from lox.testing.load_examples("")
+
+    excluded_mods = {"benchmark", "scanning", "limit", "expressions"}
+    excluded_tests = {
+        # Sem limites arbitrários
+        "method": {
+            "too_many_arguments",
+            "too_many_parameters",
+        },
+        "function": {
+            "too_many_arguments",
+            "too_many_parameters",
+            "local_mutual_recursion",
+        },
+        # Py-lox não realiza o early binding
+        "closure": {
+            "close_over_method_parameter",
+            "assign_to_shadowed_later",
+        },
+        "variable": {
+            "early_bound",
+        },
+    }
+
+    for subdir in sorted(EXAMPLES_PATH.iterdir()):
+        if not subdir.is_dir() or (mod := subdir.name) in excluded_mods:
+            continue
+
+        exclude = excluded_tests.get(mod, set())
+        yield from lox.testing.load_examples(mod, exclude=exclude)
+
+
+def get_id(example: Path):
+    """
+    Gera um ID para o exemplo.
+    """
+    path = example.relative_to(EXAMPLES_PATH)
+    return str(path).removesuffix(".lox").replace("\\", "/")
@@ -0,0 +1,125 @@
+import asyncio
+import io
+
+import pytest
+
+import lox
+from lox import *
+from lox.runtime import SCHEDULER, LoxError
+
+PROGRAM = """
+class Acc {
+    init(n) { this.n = n; }
+    add(x) { this.n = this.n + x; return this; }
+}
+fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+var acc = Acc(0);
+for (var i = 0; i < 50; i = i + 1) acc.add(i);
+var k = 0;
+while (k < 10 and !(k > 20)) k = k + 1;
+print fib(12) + acc.n + k;
+"""
+
+
+def run(coroutine):
+    return asyncio.run(coroutine)
+
+
+class TestEvalAsync:
+    @pytest.mark.parametrize("options", [None, Options.full()])
+    def test_mesmo_resultado_que_eval(self, options, capsys):
+        sync_env, async_env = {}, {}
+        lox.eval(PROGRAM, sync_env, optimize=options)
+        expected = capsys.readouterr().out
+        run(lox.eval_async(PROGRAM, async_env, optimize=options))
+        assert capsys.readouterr().out == expected == "1379\n"
+        assert async_env["acc"].n == sync_env["acc"].n == 1225.0
+
+    def test_erros(self, capsys):
+        with pytest.raises(TypeError):
+            run(lox.eval_async('print 1; print -"a";'))
+        out = capsys.readouterr().out
+        assert out.startswith("1\nPrograma terminou com um erro:")
+
+    def test_laços_infinitos_não_bloqueiam(self):
+        async def main():
+            out = io.StringIO()
+            interp = Interpreter(stdout=out)
+            task = asyncio.create_task(interp.eval_async("while (true) {}", interval=10))
+            for _ in range(3):
+                await asyncio.sleep(0)
+            task.cancel()
+            await interp.eval_async('print "ok";')
+            with pytest.raises(asyncio.CancelledError):
+                await task
+            return out.getvalue()
+
+        assert run(main()) == "ok\n"
+
+    def test_programas_intercalados(self):
+        src = "for (var i = 0; i < 3; i = i + 1) log(tag);"
+
+        async def main():
+            interp = Interpreter()
+            events = []
+            interp.register("log", types=(str,))(events.append)
+            await asyncio.gather(
+                interp.eval_async(src, {"tag": "a"}, interval=1),
+                interp.eval_async(src, {"tag": "b"}, interval=1),
+            )
+            return events
+
+        events = run(main())
+        assert sorted(events) == ["a"] * 3 + ["b"] * 3
+        assert events != sorted(events)
+
+    def test_funções_chamadas_fora_da_execução(self):
+        env = {}
+        lox.eval("fun f(n) { while (n > 0) n = n - 1; return n; }", env)
+        assert SCHEDULER.get() is None
+        assert run(env["f"].acall([3.0])) == 0.0
+
+
+class TestNativasAssíncronas:
+    def make_interpreter(self, calls):
+        interp = Interpreter(stdout=io.StringIO())
+
+        @interp.register(types=(float,))
+        async def wait(seconds):
+            calls.append(seconds)
+            await asyncio.sleep(seconds)
+            return seconds * 2
+
+        return interp
+
+    def test_são_aguardadas(self):
+        calls = []
+        interp = self.make_interpreter(calls)
+        src = "var total = 0; for (var i = 0; i < 3; i = i + 1) total = total + wait(0.001);"
+        env = {}
+        run(interp.eval_async(src, env))
+        assert calls == [0.001] * 3
+        assert env["total"] == 0.006
+
+    def test_executam_concorrentemente(self):
+        calls = []
+        interp = self.make_interpreter(calls)
+
+        async def main():
+            loop = asyncio.get_running_loop()
+            start = loop.time()
+            await asyncio.gather(*[interp.eval_async("wait(0.05);") for _ in range(10)])
+            return loop.time() - start
+
+        assert run(main()) < 0.4
+        assert len(calls) == 10
+
+    def test_verificam_tipos(self):
+        interp = self.make_interpreter([])
+        with pytest.raises(LoxError):
+            run(interp.eval_async('wait("x");'))
+
+    def test_erro_na_execução_síncrona(self):
+        interp = self.make_interpreter([])
+        with pytest.raises(LoxError, match="função assíncrona"):
+            interp.eval("wait(0.01);")
@@ -0,0 +1,95 @@
+import json
+
+import pytest
+
+from lox import bench
+from lox.bench import Result, compare, compare_engines, find_benchmarks
+from lox.cli import main
+from lox.errors import LoxError
+
+SRC = """\
+var total = 0;
+for (var i = 0; i < 100; i = i + 1) total = total + i;
+print total;
+"""
+
+
+@pytest.fixture
+def script(tmp_path):
+    path = tmp_path / "soma.lox"
+    path.write_text(SRC)
+    return path
+
+
+class TestResult:
+    def test_estatísticas(self):
+        result = Result("fib", "ast", [1.0, 2.0, 6.0], 1024)
+        assert result.mean == 3.0
+        assert result.median == 2.0
+        assert result.stdev == pytest.approx(2.6457, abs=1e-4)
+        assert Result("fib", "ast", [1.0]).stdev == 0.0
+
+    def test_json(self):
+        result = Result("fib", "ast", [1.0, 3.0], 1024)
+        data = result.to_json()
+        assert data["median"] == 2.0
+        assert Result.from_json(data) == result
+
+
+class TestCompare:
+    def test_entre_execuções(self):
+        base = [Result("a", "ast", [1.0]), Result("b", "ast", [1.0]), Result("c", "ast", [1.0])]
+        new = [Result("a", "ast", [1.2]), Result("b", "ast", [0.5]), Result("c", "ast", [1.01])]
+        verdicts = {item.new.name: item.verdict for item in compare(base, new, threshold=5)}
+        assert verdicts == {"a": "regressão", "b": "melhora", "c": "igual"}
+
+    def test_ignora_benchmarks_ausentes(self):
+        assert compare([Result("a", "ast", [1.0])], [Result("a", "opt", [1.0])]) == []
+
+    def test_entre_motores(self):
+        results = [Result("a", "ast", [2.0]), Result("a", "opt", [1.0]), Result("b", "opt", [1.0])]
+        [item] = compare_engines(results, "ast", "opt")
+        assert item.change == -50.0
+        assert item.verdict == "melhora"
+
+
+def test_find_benchmarks(tmp_path, script):
+    assert find_benchmarks([str(tmp_path)]) == [script]
+    with pytest.raises(LoxError, match="não encontrado"):
+        find_benchmarks([str(tmp_path / "nada.lox")])
+
+
+def test_measure(script):
+    seconds, memory = bench.measure(script, "opt", warmup=0)
+    assert 0 < seconds < 10
+    assert memory > 2**20
+
+
+def test_measure_erro(tmp_path):
+    path = tmp_path / "erro.lox"
+    path.write_text("print nada;")
+    with pytest.raises(LoxError, match="falhou no motor ast"):
+        bench.measure(path, "ast")
+
+
+def test_cli(tmp_path, script, capsys):
+    out = tmp_path / "resultados.json"
+    engines = ["--engine", "ast", "--engine", "async", "--threshold", "1000"]
+    main(["bench", str(script), "-n", "2", *engines, "--json", str(out)])
+    data = json.loads(out.read_text())
+    assert data["repeat"] == 2
+    assert [(item["name"], item["engine"]) for item in data["results"]] == [
+        ("soma", "ast"),
+        ("soma", "async"),
+    ]
+    assert all(len(item["times"]) == 2 for item in data["results"])
+    assert "ast→async" in capsys.readouterr().out
+
+
+def test_cli_regressão(tmp_path, script, capsys):
+    base = tmp_path / "base.json"
+    bench.save(str(base), [Result("soma", "ast", [1e-9])], 1, 0)
+    with pytest.raises(SystemExit) as exit:
+        main(["bench", str(script), "-n", "1", "--compare", str(base)])
+    assert exit.value.code == 1
+    assert "regressão" in capsys.readouterr().out
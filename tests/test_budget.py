@@ -0,0 +1,114 @@
+import asyncio
+import io
+import time
+
+import pytest
+
+import lox
+from lox import *
+from lox.cli import main
+from lox.runtime import METER, LoxError
+
+LOOPS = {
+    "while": "var i = 0; while (true) { i = i + 1; }",
+    "for": "var i = 0; for (var k = 0; k < 1000000000; k = k + 1) { i = i + 1; }",
+    "for -O": "var i = 0; for (var k = 0; k < 1000000000; k = k + 1) { i = i + 1; }",
+    "while -O": "var i = 0; while (i >= 0 and true) { i = i + 1; }",
+    "funções": "var i = 0; fun inc() { i = i + 1; } while (true) inc();",
+}
+
+
+def run(src: str, budget: Budget, options: Options | None = None) -> dict:
+    env = {}
+    with pytest.raises(BudgetExceeded) as error:
+        lox.eval(src, env, optimize=options, budget=budget)
+    env["error"] = str(error.value)
+    return env
+
+
+class TestBudget:
+    @pytest.mark.parametrize("name", LOOPS)
+    def test_passos(self, name, capsys):
+        options = Options.full() if name.endswith("-O") else None
+        env = run(LOOPS[name], Budget(steps=2500, depth=10**4), options)
+        assert env["error"] == "Limite de 2500 passos excedido."
+        assert 1250 <= env["i"] <= 2501
+        assert "Programa terminou com um erro" in capsys.readouterr().out
+
+    def test_passos_suficientes(self, capsys):
+        env = {}
+        lox.eval("var i = 0; while (i < 100) i = i + 1;", env, budget=Budget(steps=100))
+        assert env["i"] == 100.0
+        with pytest.raises(BudgetExceeded):
+            lox.eval("var i = 0; while (i < 101) i = i + 1;", budget=Budget(steps=100))
+
+    @pytest.mark.parametrize("options", [None, Options.full()], ids=["sem -O", "-O"])
+    @pytest.mark.parametrize(
+        "src",
+        [
+            "fun f(x) { return x + 1; }",
+            # expandida com guarda, pois a variável é reatribuída
+            "fun f(x) { return x + 1; } f = f;",
+            "class A { f(x) { return x + 1; } } var a = A(); fun f(x) { return a.f(x); }",
+        ],
+    )
+    def test_chamadas_expandidas_contam_passos(self, src, options, capsys):
+        calls = "f(1);" * 10
+        lox.eval(src + calls, optimize=options, budget=Budget(steps=25))
+        with pytest.raises(BudgetExceeded):
+            lox.eval(src + calls, optimize=options, budget=Budget(steps=9))
+
+    def test_chamadas_expandidas_contam_profundidade(self, capsys):
+        src = "fun f(x) { return x + 1; } fun g(x) { return f(x) * 2; } print g(1);"
+        assert "corpo de f substituído" in str(lox.compile(src, Options.full()).report)
+        lox.eval(src, optimize=Options.full(), budget=Budget(depth=2))
+        with pytest.raises(BudgetExceeded, match="chamadas aninhadas"):
+            lox.eval(src, optimize=Options.full(), budget=Budget(depth=1))
+
+    def test_profundidade(self, capsys):
+        src = "var depth = 0; fun f(n) { depth = n; return f(n + 1) + 1; } f(1);"
+        env = run(src, Budget(depth=50))
+        assert env["error"] == "Limite de 50 chamadas aninhadas excedido."
+        assert env["depth"] == 50.0
+
+    def test_profundidade_não_acumula_entre_chamadas(self):
+        src = "fun f(n) { if (n < 1) return 0; return f(n - 1); } for (var i = 0; i < 100; i = i + 1) f(20);"
+        lox.eval(src, budget=Budget(depth=21))
+
+    def test_instâncias(self, capsys):
+        src = "class A {} var xs = list(); while (true) list_push(xs, A());"
+        env = run(src, Budget(instances=100))
+        assert env["error"] == "Limite de 100 instâncias excedido."
+        assert len(env["xs"]) == 100
+
+    def test_tempo(self, capsys):
+        start = time.monotonic()
+        env = run(LOOPS["while"], Budget(seconds=0.1))
+        assert env["error"] == "Limite de tempo de 0.1s excedido."
+        assert time.monotonic() - start < 2
+
+    def test_execuções_independentes(self, capsys):
+        program = lox.compile("var i = 0; while (i < 50) i = i + 1;")
+        budget = Budget(steps=60)
+        for _ in range(3):
+            program.run(budget=budget)
+        assert METER.get() is None
+
+    def test_interpretador_e_async(self, capsys):
+        interp = Interpreter(stdout=io.StringIO())
+        with pytest.raises(BudgetExceeded):
+            interp.eval("fun f() { f(); } f();", budget=Budget(depth=30))
+        with pytest.raises(BudgetExceeded, match="passos"):
+            asyncio.run(interp.eval_async(LOOPS["for"], budget=Budget(steps=100)))
+
+    def test_é_um_erro_lox(self):
+        assert issubclass(BudgetExceeded, LoxError)
+
+
+def test_cli(tmp_path, capsys):
+    script = tmp_path / "loop.lox"
+    script.write_text(LOOPS["while"])
+    with pytest.raises(SystemExit) as exit:
+        main(["run", "--max-steps", "1000", str(script)])
+    assert exit.value.code == 1
+    assert "Limite de 1000 passos excedido." in capsys.readouterr().out
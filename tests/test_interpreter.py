@@ -0,0 +1,136 @@
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import lox
+from lox import *
+from lox.ctx import BUILTINS
+
+
+class TestInterpreter:
+    def test_saída_própria(self, capsys):
+        out = io.StringIO()
+        Interpreter(stdout=out).eval('print "oi"; print 1 + 2;')
+        assert out.getvalue() == "oi\n3\n"
+        assert capsys.readouterr().out == ""
+
+    def test_erros_na_saída_do_interpretador(self, capsys):
+        out = io.StringIO()
+        with pytest.raises(TypeError):
+            Interpreter(stdout=out).eval('print -"a";')
+        assert out.getvalue().startswith("Programa terminou com um erro:")
+        assert capsys.readouterr().out == ""
+
+    def test_funções_chamadas_do_python_usam_a_saída_do_interpretador(self):
+        out = io.StringIO()
+        interp = Interpreter(stdout=out)
+        env = interp.globals()
+        interp.eval("fun hello(x) { print x; }", env)
+        env["hello"]("oi")
+        assert out.getvalue() == "oi\n"
+
+    def test_registro_não_vaza(self):
+        a, b = Interpreter(), Interpreter(stdout=io.StringIO())
+
+        @a.register(types=(str,))
+        def shout(text):
+            return text.upper()
+
+        env = {"x": None}
+        a.eval('x = shout("oi");', env)
+        assert env["x"] == "OI"
+        assert "shout" not in BUILTINS
+        assert "shout" not in b.builtins
+        with pytest.raises(NameError):
+            b.eval('shout("oi");')
+
+    def test_contextos_globais_copiam_o_registro(self):
+        ctx = Ctx()
+        ctx.parent.scope["extra"] = 1.0
+        assert ctx.parent.scope is not BUILTINS
+        assert "extra" not in BUILTINS
+        assert Ctx.from_dict({}).parent.scope is not BUILTINS
+
+    def test_cache_de_programas(self):
+        interp = Interpreter(cache_size=2)
+        program = interp.compile("print 1;")
+        assert interp.compile("print 1;") is program
+        assert interp.compile("print 1;", Options.full()) is not program
+        interp.compile("print 2;")
+        assert interp.compile("print 1;") is not program
+
+    def test_aceita_programas_compilados(self):
+        out = io.StringIO()
+        Interpreter(stdout=out).eval(lox.compile("print x;"), {"x": 42.0})
+        assert out.getvalue() == "42\n"
+
+    def test_memoização_usa_o_registro_do_interpretador(self):
+        out = io.StringIO()
+        interp = Interpreter(stdout=out)
+        calls = []
+
+        @interp.register("sqrt", arity=1)
+        def counter(x):
+            calls.append(x)
+            return float(len(calls))
+
+        interp.eval(
+            "fun t(x) { return sqrt(x); } print t(1); print t(1);",
+            optimize=Options(memoize=True),
+        )
+        assert out.getvalue() == "1\n2\n"
+        assert calls == [1.0, 1.0]
+
+    def test_registro_descarta_programas_compilados(self):
+        interp = Interpreter()
+        program = interp.compile("print 1;")
+        interp.register("extra")(lambda: None)
+        assert interp.compile("print 1;") is not program
+
+
+SCRIPT = """
+class Acc {
+    init(n) { this.n = n; }
+    add(x) { this.n = this.n + x; return this; }
+}
+var acc = Acc(ident());
+for (var i = 0; i < 200; i = i + 1) acc.add(1);
+var xs = list();
+for (var i = 0; i < 10; i = i + 1) list_push(xs, ident());
+print "script " + tag;
+print acc.n;
+print list_len(xs);
+"""
+
+
+def run_isolated(i: int) -> str:
+    out = io.StringIO()
+    interp = Interpreter(stdout=out)
+    interp.register("ident", arity=0)(lambda: float(i))
+    options = Options.full() if i % 2 else None
+    interp.eval(SCRIPT, {"tag": str(i)}, optimize=options)
+    return out.getvalue()
+
+
+def test_64_scripts_em_threads():
+    with ThreadPoolExecutor(16) as executor:
+        outputs = list(executor.map(run_isolated, range(64)))
+    assert outputs == [f"script {i}\n{i + 200}\n10\n" for i in range(64)]
+
+
+def test_interpretador_compartilhado_entre_threads():
+    out = io.StringIO()
+    interp = Interpreter(stdout=out)
+    interp.register("ident", arity=0)(lambda: 0.0)
+
+    def run(i):
+        env = {"tag": str(i)}
+        interp.eval(SCRIPT, env, optimize=Options.full())
+        return env["acc"].n
+
+    with ThreadPoolExecutor(8) as executor:
+        assert list(executor.map(run, range(64))) == [200.0] * 64
+    assert out.getvalue().count("\n") == 64 * 3
+    assert len(interp.programs) == 1
+
@@ -0,0 +1,102 @@
+import pytest
+
+from lox import *
+from lox.analysis import pure_functions
+from lox.optimizer import memo_stats
+from lox.runtime import MemoizedFunction
+
+
+FIB = """
+fun fib(n) {
+  if (n < 2) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+"""
+
+
+class TestPurityAnalysis:
+    def test_função_recursiva_é_pura(self):
+        assert pure_functions(parse(FIB)) == {"fib"}
+
+    def test_função_com_variáveis_locais_é_pura(self):
+        src = """
+        fun f(n) {
+            var acc = 0;
+            for (var i = 0; i < n; i = i + 1) acc = acc + sqrt(i);
+            return acc;
+        }
+        """
+        assert pure_functions(parse(src)) == {"f"}
+
+    @pytest.mark.parametrize(
+        "body",
+        [
+            "print x;",
+            "global = x;",
+            "x.field = 1;",
+            "return x.field;",
+            "return clock();",
+            "return impure(x);",
+            "return mutable;",
+            "fun g() {} return g;",
+            "y = 1; var y = 2; return y;",
+        ],
+    )
+    def test_detecta_funções_impuras(self, body):
+        src = f"""
+        var global = 0;
+        var mutable = 1;
+        mutable = 2;
+        fun impure(x) {{ print x; }}
+        fun f(x) {{ {body} }}
+        """
+        assert "f" not in pure_functions(parse(src))
+
+    def test_impureza_se_propaga_entre_funções(self):
+        src = """
+        fun a(x) { return b(x); }
+        fun b(x) { return c(x); }
+        fun c(x) { print x; }
+        fun d(x) { return d(x - 1); }
+        """
+        assert pure_functions(parse(src)) == {"d"}
+
+    def test_builtin_redefinida_não_é_pura(self):
+        src = """
+        fun sqrt(x) { print x; return x; }
+        fun f(x) { return sqrt(x); }
+        """
+        assert pure_functions(parse(src)) == set()
+
+
+class TestMemoize:
+    def test_memoização_é_opcional(self, run):
+        ctx, _ = run(FIB + "var x = fib(10);")
+        assert not isinstance(ctx["fib"], MemoizedFunction)
+
+    def test_resultado_igual_ao_original(self, run):
+        ctx, out = run(FIB + "print fib(30);", options=Options(memoize=True))
+        assert out == "832040\n"
+        info = ctx["fib"].cache_info()
+        assert info.misses == 31
+        assert info.hits == 28
+
+    def test_cache_lru_limitado(self, run):
+        src = "fun sq(x) { return x * x; } for (var i = 0; i < 10; i = i + 1) sq(i); sq(9);"
+        ctx, _ = run(src, options=Options(memoize=True, memo_size=4))
+        info = memo_stats(ctx)["sq"]
+        assert info.currsize == 4
+        assert info.evictions == 6
+        assert info.hits == 1
+
+    def test_argumentos_não_hasheáveis_ignoram_cache(self, run):
+        src = "fun id(x) { return x; } print id(0); print id(-0); print id(-0); print id(true);"
+        ctx, out = run(src, options=Options(memoize=True))
+        assert out == "0\n-0\n-0\ntrue\n"
+        assert ctx["id"].cache_info().misses == 1
+
+    def test_função_impura_não_é_memoizada(self, run):
+        src = "fun f(x) { print x; } f(1); f(1);"
+        ctx, out = run(src, options=Options(memoize=True))
+        assert out == "1\n1\n"
+        assert memo_stats(ctx) == {}
@@ -0,0 +1,69 @@
+import lox
+from lox.ast import Var
+from lox.cli import main
+from lox.memstats import OUTSIDE, MemoryStats
+from lox.runtime import LoxFunction, LoxInstance
+
+SRC = """\
+class P {
+  init(x) { this.x = x; }
+  get() { return this.x; }
+}
+var keep = list();
+for (var i = 0; i < 100; i = i + 1) {
+  var p = P(i);
+  p.get();
+  if (i < 10) list_push(keep, p);
+}
+print list_len(keep);
+"""
+
+
+class TestMemoryStats:
+    def test_contagens(self, capsys):
+        with MemoryStats() as stats:
+            lox.eval(SRC)
+        assert capsys.readouterr().out == "10\n"
+        assert stats.allocations["LoxInstance"] == 100
+        assert 10 <= stats.peak["LoxInstance"] < 100
+        assert stats.live["LoxInstance"] <= 10
+        # init e get ligados à instância a cada iteração
+        assert stats.allocations["LoxFunction"] >= 200
+        assert stats.peak_memory > 0
+
+    def test_linhas(self, capsys):
+        with MemoryStats() as stats:
+            lox.eval(SRC)
+        assert stats.lines[7, "LoxInstance"] == 100
+        assert stats.lines[8, "LoxFunction"] == 100
+        assert stats.lines[OUTSIDE, "Var"] > 0
+
+    def test_remove_ganchos(self, capsys):
+        init = Var.__init__
+        with MemoryStats():
+            assert Var.__init__ is not init
+        assert Var.__init__ is init
+        assert "__init__" in LoxInstance.__dict__
+        assert "__del__" not in LoxFunction.__dict__
+        lox.eval(SRC)
+        assert capsys.readouterr().out == "10\n"
+
+    def test_relatório(self, capsys):
+        with MemoryStats() as stats:
+            lox.eval(SRC)
+        report = stats.report(SRC)
+        assert "LoxInstance" in report
+        assert "var p = P(i);" in report
+        assert "fora da execução" in report
+        assert "lox/" in report
+        assert "memstats.py" not in report
+
+
+def test_cli(tmp_path, capsys):
+    script = tmp_path / "script.lox"
+    script.write_text(SRC)
+    main(["run", "--mem-stats", str(script)])
+    captured = capsys.readouterr()
+    assert captured.out == "10\n"
+    assert "Pico de memória" in captured.err
+    assert "LoxInstance" in captured.err
@@ -0,0 +1,278 @@
+import contextlib
+import io
+
+import pytest
+
+import lox
+from lox import *
+from lox.analysis import pure_natives
+from lox.ast import NativeCall1
+from lox.ctx import BUILTINS
+from lox.natives import Array, List, Map, NativeFunction
+from lox.runtime import LoxError
+
+
+class TestArray:
+    def test_criação_e_acesso(self, run):
+        ctx, out = run("""
+        var a = array(3);
+        array_set(a, 1, 4);
+        print array_get(a, 1);
+        print array_len(a);
+        print a;
+        """)
+        assert type(ctx["a"]) is Array
+        assert ctx["a"].data.typecode == "d"
+        assert out == "4\n3\n[0, 4, 0]\n"
+
+    def test_valor_inicial(self, run):
+        _, out = run("print array(2, 1.5);")
+        assert out == "[1.5, 1.5]\n"
+
+    def test_operações_em_lote(self, run):
+        _, out = run("""
+        var a = array(3, 2);
+        var b = array(3, 4);
+        print array_sum(a);
+        print array_dot(a, b);
+        print array_scale(a, 0.5);
+        print array_add(a, b);
+        print array_map(b, sqrt);
+        print array_fill(b, 7);
+        """)
+        assert out == "6\n24\n[1, 1, 1]\n[5, 5, 5]\n[2, 2, 2]\n[7, 7, 7]\n"
+
+    def test_igualdade_compara_elementos(self, run):
+        _, out = run("var a = array(1); print a == a; print a == array(1); print a == array(1, 2);")
+        assert out == "true\ntrue\nfalse\n"
+
+    @pytest.mark.parametrize(
+        "src",
+        [
+            "array(-1);",
+            "array(1.5);",
+            'array("x");',
+            "array_get(array(2), 2);",
+            "array_get(array(2), -1);",
+            "array_get(array(2), 0.5);",
+            'array_set(array(2), 0, "x");',
+            "array_sum(nil);",
+            "array_dot(array(2), array(3));",
+            "array_add(array(2), array(3));",
+            "fun f(x) { return x; } array_map(array(2), f);",
+            "array_map(array(2), is_even);",
+            "array(2).x;",
+        ],
+    )
+    def test_erros(self, src, run):
+        with pytest.raises(LoxError):
+            run(src)
+
+
+class TestList:
+    def test_operações_básicas(self, run):
+        ctx, out = run("""
+        var xs = list(1, "a");
+        list_push(xs, nil);
+        list_set(xs, 0, 2);
+        print list_len(xs);
+        print list_get(xs, 0);
+        print list_pop(xs);
+        print xs;
+        """)
+        assert type(ctx["xs"]) is List
+        assert out == '3\n2\nnil\n[2, "a"]\n'
+
+    def test_iteração(self, run):
+        _, out = run("""
+        fun square(x) { return x * x; }
+        fun show(x) { print x; }
+        var xs = list_map(list(1, 2, 3), square);
+        list_each(xs, show);
+        list_each(list_map(xs, sqrt), show);
+        """)
+        assert out == "1\n4\n9\n1\n2\n3\n"
+
+    def test_igualdade_segue_semântica_do_lox(self, run):
+        _, out = run("""
+        print list(1, "a") == list(1, "a");
+        print list(1) == list(true);
+        print list(1) == list(1, 2);
+        print list(list()) == list(list());
+        """)
+        assert out == "true\nfalse\nfalse\ntrue\n"
+
+    def test_lista_que_contém_a_si_mesma(self, run):
+        _, out = run("""
+        var a = list(1);
+        list_push(a, a);
+        var b = list(1);
+        list_push(b, b);
+        print a == b;
+        print a == a;
+        var m = map("m", 1);
+        map_set(m, "m", m);
+        list_push(a, m);
+        list_push(b, map("m", 2));
+        print a;
+        print m;
+        print a == b;
+        """)
+        assert out == 'true\ntrue\n[1, [...], {"m": {...}}]\n{"m": {...}}\nfalse\n'
+
+
+class TestMap:
+    def test_operações_básicas(self, run):
+        ctx, out = run("""
+        var m = map("a", 1);
+        map_set(m, "b", 2);
+        print map_get(m, "a");
+        print map_get(m, "c");
+        print map_get(m, "c", 0);
+        print map_has(m, "b");
+        print map_delete(m, "b");
+        print map_has(m, "b");
+        print map_len(m);
+        print m;
+        """)
+        assert type(ctx["m"]) is Map
+        assert out == '1\nnil\n0\ntrue\ntrue\nfalse\n1\n{"a": 1}\n'
+
+    def test_booleanos_e_números_são_chaves_distintas(self, run):
+        _, out = run("""
+        var m = map(1, "um", true, "verdadeiro", 0, "zero", false, "falso");
+        print map_len(m);
+        print map_get(m, true);
+        print map_keys(m);
+        print map_values(m);
+        """)
+        assert out == '4\nverdadeiro\n[1, true, 0, false]\n["um", "verdadeiro", "zero", "falso"]\n'
+
+    def test_igualdade(self, run):
+        _, out = run("""
+        print map("a", 1, "b", 2) == map("b", 2, "a", 1);
+        print map("a", 1) == map("a", true);
+        print map("a", 1) == map("b", 1);
+        """)
+        assert out == "true\nfalse\nfalse\n"
+
+
+@pytest.mark.parametrize("value", ["array(1)", "list()", "map()"])
+def test_valores_nativos_não_têm_propriedades(value, run):
+    for src in [f"{value}.x;", f"{value}.x = 1;", f"{value}.data;"]:
+        with pytest.raises(LoxError, match="valor nativo"):
+            run(src)
+
+
+@pytest.mark.parametrize(
+    "src",
+    [
+        "list_get(list(), 0);",
+        "list_pop(list());",
+        "list_push(map(), 1);",
+        "list_map(list(1), 1);",
+        'map("a");',
+        "fun f() {} map_set(map(), f, 1);",
+        "map(list(), 1);",
+        "map_get(map(), map());",
+        "map_has(map(), array(1));",
+        "map_get(list(), 1);",
+    ],
+)
+def test_erros_em_coleções(src, run):
+    with pytest.raises(LoxError):
+        run(src)
+
+
+class TestNativeFunction:
+    def test_aridade_deduzida_da_assinatura(self):
+        def f(a, b, c=1):
+            return a
+
+        native = NativeFunction(f)
+        assert (native.name, native.min_args, native.max_args) == ("f", 2, 3)
+        assert NativeFunction(lambda *args: 0, "g").max_args is None
+
+    @pytest.mark.parametrize(
+        "src, msg",
+        [
+            ("sqrt();", "Expected 1 arguments but got 0."),
+            ("clock(1);", "Expected 0 arguments but got 1."),
+            ("max(1);", "Expected at least 2 arguments but got 1."),
+            ("array(1, 2, 3);", "Expected 1 to 2 arguments but got 3."),
+            ('sqrt("x");', "sqrt: argumento 1 deve ser um número."),
+            ('max(1, 2, "x");', "max: argumento 3 deve ser um número."),
+            ("array_get(list(), 0);", "array_get: argumento 1 deve ser um array."),
+        ],
+    )
+    def test_valida_argumentos(self, src, msg):
+        for options in [None, Options.full()]:
+            with pytest.raises(LoxError, match=msg):
+                lox.eval(src, {}, optimize=options)
+
+    def test_mostra_como_função_nativa(self, run):
+        _, out = run("print sqrt;")
+        assert out == "<native fn>\n"
+        assert repr(BUILTINS["sqrt"]) == "<native fn sqrt>"
+
+    def test_pureza_vem_do_registro(self):
+        assert {"sqrt", "max", "is_even"} <= pure_natives()
+        assert "clock" not in pure_natives()
+        assert "array_get" not in pure_natives()
+
+
+class TestRegistry:
+    def test_registro_por_interpretador(self):
+        natives = BUILTINS.copy()
+
+        @natives.register(types=(str,), pure=True)
+        def shout(text):
+            return text.upper()
+
+        assert "shout" not in BUILTINS
+        ctx = Ctx.from_dict({}, builtins=natives)
+        with contextlib.redirect_stdout(io.StringIO()) as fd:
+            lox.eval('print shout("oi"); print sqrt(4);', ctx)
+        assert fd.getvalue() == "OI\n2\n"
+        assert shout("a") == "A"
+        assert "shout" in pure_natives(natives)
+
+    def test_ropes_são_convertidas(self):
+        natives = BUILTINS.copy()
+        received = []
+        natives.register("keep", types=(str,))(received.append)
+        ctx = Ctx.from_dict({}, builtins=natives)
+        src = 'var s = ""; for (var i = 0; i < 100; i = i + 1) s = s + "0123456789abcdef"; keep(s);'
+        for options in [None, Options.full()]:
+            lox.eval(src, ctx, optimize=options)
+        assert [type(x) for x in received] == [str, str]
+
+
+class TestNativeCall:
+    def test_chamadas_a_nomes_livres_são_especializadas(self):
+        tree = parse("var x = sqrt(4); fun f(max) { return max(1, 2); } print is_even(2);")
+        report = optimize(tree, Options(native_calls=True))
+        assert str(report) == "[native] chamada nativa sqrt\n[native] chamada nativa is_even"
+        assert type(tree.stmts[0].value) is NativeCall1
+
+    def test_guarda_recorre_a_chamada_comum(self):
+        env = {"f": lambda x: x + 1}
+        tree = parse("print f(1); print clock() > 0; print max(1, 3, 2);")
+        optimize(tree, Options(native_calls=True))
+        with contextlib.redirect_stdout(io.StringIO()) as fd:
+            lox.eval(tree, env)
+        assert fd.getvalue() == "2\ntrue\n3\n"
+
+    def test_nó_se_especializa_novamente(self):
+        natives = BUILTINS.copy()
+        natives.register("f")(lambda x: x)
+        ctx = Ctx.from_dict({}, builtins=natives)
+        tree = parse("print f(1);")
+        optimize(tree, Options(native_calls=True))
+        call = tree.stmts[0].expr
+        with contextlib.redirect_stdout(io.StringIO()) as fd:
+            lox.eval(tree, ctx)
+            natives.register("f")(lambda x: -x)
+            lox.eval(tree, ctx)
+        assert fd.getvalue() == "1\n-1\n"
+        assert call.cache[0] is natives["f"]
@@ -0,0 +1,265 @@
+import contextlib
+import io
+from pathlib import Path
+
+import pytest
+
+import lox
+from lox import *
+from lox import testing
+from lox.ast import *
+from lox.optimizer import optimize
+
+from helpers import examples, get_id
+
+
+def optimized(src: str, options: Options | None = None) -> Program:
+    tree = parse(src)
+    optimize(tree, options or Options.full())
+    return tree
+
+
+class OptimizedExample(testing.Example):
+    def eval(self):
+        stdout = io.StringIO()
+        with contextlib.redirect_stdout(stdout) as stdout:
+            ctx = Ctx.from_dict({})
+            try:
+                lox.eval(self.src, ctx, optimize=Options.full())
+            except Exception as e:
+                if self.error is not None and self.error.runtime:
+                    return ctx, "", str(e)
+                raise
+        return ctx, stdout.getvalue(), None
+
+
+@pytest.mark.full_suite
+@pytest.mark.parametrize(
+    "path", exs := [*examples()], ids=map(get_id, exs)
+)
+def test_exemplos_otimizados(path: Path):
+    src = path.read_text(encoding="utf-8")
+    OptimizedExample(src, path).test_example()
+
+
+class TestInline:
+    def test_substitui_corpo_de_função_global(self):
+        tree = optimized("fun sq(x) { return x * x; } print sq(3);")
+        assert tree.stmts[1].expr.expr == BinOp(Literal(3.0), Literal(3.0), ops.mul)
+
+    @pytest.mark.parametrize(
+        "src",
+        [
+            # parâmetros fora de ordem
+            "fun sub(a, b) { return b - a; } print sub(f(1), f(2));",
+            # parâmetro usado duas vezes
+            "fun sq(x) { return x * x; } print sq(f(3));",
+            # função definida depois do ponto de chamada
+            "fun g() { return sq(f(3)); } fun sq(x) { return x; }",
+        ],
+    )
+    def test_usa_guarda_quando_substituição_não_é_segura(self, src):
+        src = "fun f(x) { print x; return x; }" + src
+        tree = optimized(src)
+        assert any(isinstance(n, InlinedCall) for n in tree.descendants())
+
+    def test_não_expande_funções_recursivas(self):
+        src = """
+        fun a(n) { return b(n); }
+        fun b(n) { return a(n); }
+        fun c(n) { return c(n); }
+        print a(1) + c(1);
+        """
+        tree = optimized(src)
+        assert not any(isinstance(n, InlinedCall) for n in tree.descendants())
+
+    def test_respeita_orçamento_de_tamanho(self):
+        src = "fun f(x) { return x + x + x + x; } print f(1);"
+        tree = optimized(src, Options(inline=True, inline_max_size=3))
+        assert isinstance(tree.stmts[1].expr, Call)
+        tree = optimized(src, Options(inline=True, inline_max_growth=3))
+        assert isinstance(tree.stmts[1].expr, InlinedCall)
+
+    def test_guarda_falha_quando_função_é_sombreada(self, run):
+        src = """
+        fun f(x) { return x + 1; }
+        fun g(f) { return f(1); }
+        fun h(x) { return x * 10; }
+        print g(h);
+        print g(f);
+        """
+        _, out = run(src, options=Options.full())
+        assert out == "10\n2\n"
+
+    def test_método_expandido_com_guarda_de_classe(self, run):
+        src = """
+        class A { init() { this.x = 1; } get() { return this.x; } }
+        class B { get2() { return 2; } }
+        class C < A {}
+        fun get(obj) { return obj.get(); }
+        var a = A();
+        print get(a);
+        print get(C());
+        a.get = B().get2;
+        print get(a);
+        """
+        tree = optimized(src)
+        assert any(isinstance(n, InlinedMethodCall) for n in tree.descendants())
+        _, out = run(src, options=Options.full())
+        assert out == "1\n1\n2\n"
+
+    def test_método_em_não_instância_mantém_erro(self, run):
+        src = "class A { get() { return 1; } } var x = 1; x.get();"
+        with pytest.raises(LoxError, match="Somente instâncias"):
+            run(src, options=Options.full())
+
+
+class TestCountedLoop:
+    def counted_loops(self, src: str) -> list[CountedLoop]:
+        tree = optimized(src, Options(counted_loops=True))
+        return [n for n in tree.descendants() if isinstance(n, CountedLoop)]
+
+    @pytest.mark.parametrize(
+        "header",
+        [
+            "var i = 0; i < 3; i = i + 1",
+            "var i = 0; i <= 2; i = 1 + i",
+            "var i = 2; i >= 0; i = i - 1",
+            "var i = 2; i > -1; i = i - 1",
+        ],
+    )
+    def test_reconhece_laços_canônicos(self, header, run):
+        src = f"for ({header}) print i;"
+        [loop] = self.counted_loops(src)
+        assert loop.name == "i"
+        _, out = run(src, options=Options(counted_loops=True))
+        assert sorted(out.split()) == ["0", "1", "2"]
+
+    @pytest.mark.parametrize(
+        "src",
+        [
+            "for (var i = 0; i < 3; i = i + 1) i = i + 1;",
+            "for (var i = 0; i < 3; i = i + 1) { fun f() { return i; } }",
+            "for (var i = 0; i < 3; i = i * 2) print i;",
+            "for (var i = 0; i == 3; i = i + 1) print i;",
+            "for (var i = 0; j < 3; i = i + 1) print i;",
+            "var i = 0; for (i = 0; i < 3; i = i + 1) print i;",
+        ],
+    )
+    def test_ignora_laços_não_canônicos(self, src):
+        assert self.counted_loops(src) == []
+
+    @pytest.mark.parametrize("decl", ["var x = i * 2;", "fun f() {}", "class A {}"])
+    def test_declaração_no_corpo_do_while(self, decl, run):
+        # Sem um bloco em volta, cada iteração declara o nome de novo no
+        # escopo do while
+        src = f"{{ var i = 0; while (i < 3) {{ {decl} i = i + 1; }} }}"
+        assert self.counted_loops(src) == []
+        run(src, options=Options(counted_loops=True))
+
+    def test_limite_atribui_o_contador(self, run):
+        src = "for (var i = 0; i < (i = i + 2) - i + 10; i = i + 1) print i;"
+        assert self.counted_loops(src) == []
+        assert run(src, options=Options(counted_loops=True))[1].split() == ["2", "5", "8", "11"]
+
+    def test_limite_reavaliado_a_cada_iteração(self, run):
+        src = "var n = 5; for (var i = 0; i < n; i = i + 1) { n = n - 1; print i; }"
+        _, out = run(src, options=Options(counted_loops=True))
+        assert out == "0\n1\n2\n"
+
+    def test_mantém_erro_de_tipos(self, run):
+        src = 'for (var i = 0; i < "3"; i = i + 1) print i;'
+        with pytest.raises(LoxError, match="Operação requer números"):
+            run(src, options=Options(counted_loops=True))
+
+
+class TestFusedBranches:
+    def test_reescreve_condições(self):
+        src = "var x = 1; if (x > 0 and !(x == 2) or nil) print x; while (x < 1) x = x + 1;"
+        tree = optimized(src, Options(fused_branches=True))
+        if_, while_ = tree.stmts[1:]
+        assert isinstance(if_, BranchIf)
+        assert isinstance(if_.cond, OrTest)
+        assert isinstance(if_.cond.left, AndTest)
+        assert isinstance(if_.cond.left.right, NotTest)
+        assert isinstance(if_.cond.right, Literal)
+        assert isinstance(while_, BranchWhile)
+        assert isinstance(while_.cond, CompareTest)
+
+    def test_preserva_curto_circuito(self, run):
+        src = """
+        fun f(x) { print x; return x; }
+        if (f(false) and f(1)) print "a"; else print "b";
+        if (f(1) or f(2)) print "c";
+        if (f(nil) or f("x") == "x") print "d";
+        """
+        _, out = run(src, options=Options(fused_branches=True))
+        assert out == "false\nb\n1\nc\nnil\nx\nd\n"
+
+    @pytest.mark.parametrize(
+        "cond, msg",
+        [
+            ('1 < "a"', "Operação requer números"),
+            ("nil >= 1", "Operação requer números"),
+            ("true and 1 > false", "Operação requer números"),
+        ],
+    )
+    def test_preserva_erros_de_tipos(self, cond, msg, run):
+        with pytest.raises(LoxError, match=msg):
+            run(f"if ({cond}) print 1;", options=Options(fused_branches=True))
+
+    def test_compara_valores_de_tipos_diferentes(self, run):
+        src = 'var x = "1"; if (x == 1) print "a"; if (x != 1) print "b"; if (nil == nil) print "c";'
+        _, out = run(src, options=Options(fused_branches=True))
+        assert out == "b\nc\n"
+
+
+class TestDeadCode:
+    def test_remove_comandos_após_return(self):
+        src = "fun f() { print 1; return 2; print 3; print 4; }"
+        report = Report()
+        tree = parse(src, report)
+        assert len(tree.stmts[0].body.stmts) == 2
+        assert "2 comando(s) inalcançável(is)" in str(report)
+
+    def test_remove_comandos_após_if_que_sempre_retorna(self):
+        src = "fun f(x) { if (x) return 1; else { return 2; } print 3; }"
+        tree = parse(src)
+        assert isinstance(tree.stmts[0].body.stmts[-1], If)
+
+    def test_desvios_constantes(self):
+        tree = parse('if (nil) print "a"; else print "b"; while (false) print "c"; if (1) print "d";')
+        assert tree.stmts == [Print(Literal("b")), Print(Literal("d"))]
+
+    def test_expressões_sem_efeitos(self):
+        tree = parse('1; "a"; nil == !true; print 2;')
+        assert tree.stmts == [Print(Literal(2.0))]
+
+    def test_incremento_vazio_do_for(self):
+        tree = parse("for (var i = 0; i < 3;) i = i + 1;")
+        loop = tree.stmts[0].stmts[1]
+        assert len(loop.body.stmts) == 1
+
+    def test_variáveis_locais_não_usadas(self):
+        src = """
+        fun f() {
+            var a = 1;
+            var b = nil;
+            var c = g();
+            var d = 2;
+            fun h() { return d; }
+            return h;
+        }
+        """
+        tree = parse(src)
+        names = [s.name for s in tree.stmts[0].body.stmts if isinstance(s, (VarDef, Function))]
+        assert names == ["c", "d", "h"]
+
+    def test_variáveis_globais_são_mantidas(self):
+        tree = parse("var a = 1;")
+        assert tree.stmts == [VarDef("a", Literal(1.0))]
+
+    def test_mantém_expressões_com_efeitos(self):
+        tree = parse("fun f() { x; -1; f(); } 1 + nil;")
+        assert len(tree.stmts[0].body.stmts) == 3
+        assert len(tree.stmts) == 2
@@ -0,0 +1,192 @@
+import asyncio
+import io
+import math
+
+import pytest
+
+import lox
+from lox import *
+from lox.cli import main
+from lox.errors import LoxError
+from lox.runtime import SHOW, MemoizedFunction, Output, Rope, show
+
+
+class TestShow:
+    @pytest.mark.parametrize(
+        "value, text",
+        [
+            (3.0, "3"),
+            (2.5, "2.5"),
+            (-0.0, "-0"),
+            (1e16, "1e+16"),
+            (math.inf, "inf"),
+            (math.nan, "nan"),
+            ("abc", "abc"),
+            (True, "true"),
+            (False, "false"),
+            (None, "nil"),
+            (float, "float"),
+            (len, "<native fn>"),
+        ],
+    )
+    def test_valores(self, value, text):
+        assert show(value) == text
+
+    def test_cache_de_inteiros(self):
+        out = io.StringIO()
+        interp = Interpreter(stdout=out)
+        interp.eval("print 42; print 42; print 0; print -0; print 0.5;")
+        assert out.getvalue() == "42\n42\n0\n-0\n0.5\n"
+        assert interp.builtins.integral_floats == {42.0: "42"}
+        assert Interpreter().builtins.integral_floats == {}
+
+    def test_cache_de_subclasses(self):
+        out = io.StringIO()
+        interp = Interpreter(stdout=out)
+        interp.eval("fun f(x) { return x; } print f;", optimize=Options(memoize=True))
+        assert out.getvalue() == "<fn f>\n"
+        assert MemoizedFunction in interp.builtins.show_functions
+        assert MemoizedFunction not in SHOW
+
+    def test_valores_lox(self, capsys):
+        src = """\
+class A {}
+class B < A { m() {} }
+fun f() {}
+var l = list();
+list_push(l, "a");
+list_push(l, 1);
+var m = map();
+map_set(m, "k", B());
+print A; print B(); print f; print B().m; print l; print m; print array(2);
+"""
+        lox.eval(src, optimize=Options(memoize=True))
+        assert capsys.readouterr().out.splitlines() == [
+            "A",
+            "B instance",
+            "<fn f>",
+            "<fn m>",
+            '["a", 1]',
+            '{"k": B instance}',
+            "[0, 0]",
+        ]
+
+    def test_subclasses(self):
+        class Number(float):
+            pass
+
+        assert show(Rope.concat("a" * 600, "b" * 600)) == "a" * 600 + "b" * 600
+        assert show(Number(2.0)) == "2"
+
+
+class TestOutput:
+    def test_buffer(self):
+        out = io.StringIO()
+        output = Output(out, buffer_size=6)
+        output.write("ab\n")
+        assert out.getvalue() == ""
+        output.write("cd\n")
+        assert out.getvalue() == "ab\ncd\n"
+        output.write("e\n")
+        output.flush()
+        assert out.getvalue() == "ab\ncd\ne\n"
+
+    def test_line_buffering(self):
+        out = io.StringIO()
+        output = Output(out, line_buffering=True)
+        output.write("ab\n")
+        assert out.getvalue() == "ab\n"
+
+    def test_sys_stdout_do_momento_da_escrita(self, capsys):
+        output = Output()
+        output.write("oi\n")
+        output.flush()
+        assert capsys.readouterr().out == "oi\n"
+
+
+class TestInterpreter:
+    def test_saída_escrita_ao_final(self):
+        out = io.StringIO()
+        interp = Interpreter(stdout=out)
+
+        @interp.register(arity=0)
+        def seen():
+            return out.getvalue()
+
+        interp.eval('print 1; print seen() == "";')
+        assert out.getvalue() == "1\ntrue\n"
+
+    def test_flush(self):
+        out = io.StringIO()
+        interp = Interpreter(stdout=out)
+
+        @interp.register(arity=0)
+        def seen():
+            return out.getvalue()
+
+        interp.eval("print 1; flush(); print seen();")
+        assert out.getvalue() == "1\n1\n\n"
+
+    def test_line_buffering(self):
+        out = io.StringIO()
+        interp = Interpreter(stdout=out, line_buffering=True)
+
+        @interp.register(arity=0)
+        def seen():
+            return out.getvalue()
+
+        interp.eval("print 1; print seen();")
+        assert out.getvalue() == "1\n1\n\n"
+
+    def test_buffer_cheio(self):
+        out = io.StringIO()
+        interp = Interpreter(stdout=out, buffer_size=4)
+
+        @interp.register(arity=0)
+        def seen():
+            return out.getvalue()
+
+        interp.eval('print "abc"; print "d"; print seen();')
+        assert out.getvalue() == "abc\nd\nabc\n\n"
+
+    def test_erro_depois_da_saída(self):
+        out = io.StringIO()
+        with pytest.raises(TypeError):
+            Interpreter(stdout=out).eval('print "antes"; print -"a";')
+        assert out.getvalue().startswith("antes\nPrograma terminou com um erro:")
+
+    def test_execução_aninhada_mantém_a_ordem(self):
+        out = io.StringIO()
+        interp = Interpreter(stdout=out)
+
+        @interp.register(arity=0)
+        def inner():
+            interp.eval('print "dentro";')
+
+        interp.eval('print "antes"; inner(); print "depois";')
+        assert out.getvalue() == "antes\ndentro\ndepois\n"
+
+    def test_assíncrono(self):
+        out = io.StringIO()
+        interp = Interpreter(stdout=out)
+
+        async def run():
+            src = "for (var i = 0; i < 3; i = i + 1) print {};"
+            await asyncio.gather(
+                interp.eval_async(src.format('"a"'), interval=1),
+                interp.eval_async(src.format('"b"'), interval=1),
+            )
+
+        asyncio.run(run())
+        assert out.getvalue().count("a\n") == 3
+        assert out.getvalue().count("b\n") == 3
+        assert out.getvalue() != "a\na\na\nb\nb\nb\n"
+
+
+def test_cli_line_buffered(tmp_path, capsys):
+    script = tmp_path / "script.lox"
+    script.write_text("print 1;\nprint nil + 1;")
+    with pytest.raises(LoxError):
+        main(["run", "--line-buffered", str(script)])
+    out = capsys.readouterr().out
+    assert out.startswith("1\nPrograma terminou com um erro:")
@@ -0,0 +1,141 @@
+import pickle
+
+import pytest
+
+import lox
+from lox import *
+from lox.ast import NativeCall1
+from lox.ctx import BUILTINS
+from lox.parallel import snapshot
+from lox.runtime import LoxError, LoxInstance, MemoizedFunction
+
+
+def load(src: str, options: Options | None = None) -> Ctx:
+    ctx = Ctx.from_dict({})
+    lox.eval(src, ctx, optimize=options)
+    return ctx
+
+
+def roundtrip(value):
+    return pickle.loads(pickle.dumps(value))
+
+
+CLASSES = """
+var K = 3;
+class P {
+    init(x) { this.x = x; }
+    get() { return this.x * K; }
+}
+class Q < P {
+    get() { return super.get() + 1; }
+}
+var q = Q(2);
+"""
+
+
+class TestPickle:
+    def test_árvore_sintática(self):
+        tree = parse("fun f(x) { return -x * 2 + sqrt(x); } print !f(4) or -1 < 2;")
+        assert roundtrip(tree) == tree
+
+    def test_árvore_otimizada_descarta_especialização(self):
+        ctx = load("fun f(x) { return sqrt(x); }", Options.full())
+        ctx["f"](4.0)
+        call = next(
+            node
+            for stmt in ctx["f"].body
+            for node in stmt.descendants()
+            if isinstance(node, NativeCall1)
+        )
+        assert call.cache[0] is BUILTINS["sqrt"]
+        copy = roundtrip(call)
+        assert "cache" not in copy.__dict__
+        assert copy.cache == NativeCall1.cache
+
+    def test_funções_nativas_do_registro_mantêm_identidade(self):
+        assert roundtrip(BUILTINS["is_even"]) is BUILTINS["is_even"]
+        assert roundtrip(BUILTINS) is BUILTINS
+
+    def test_funções_nativas_fora_do_registro(self):
+        builtins = BUILTINS.copy()
+        builtins.register("dobro", types=(float,))(float.__mul__)
+        copy = roundtrip(builtins["dobro"])
+        assert copy is not builtins["dobro"]
+        assert copy.types == (float,)
+        with pytest.raises(LoxError):
+            copy("x", 2.0)
+
+    def test_funções_classes_e_instâncias(self):
+        ctx = load(CLASSES + "fun f(n) { if (n < 2) return n; return f(n - 1) + f(n - 2); }")
+        f, Q, q = roundtrip((ctx["f"], ctx["Q"], ctx["q"]))
+        assert f(10.0) == 55.0
+        assert Q(5.0).get() == 16.0
+        assert isinstance(q, LoxInstance)
+        assert q.x == 2.0 and q.get() == 7.0
+
+    def test_memoização_começa_com_cache_vazio(self):
+        ctx = load("fun sq(x) { return x * x; } var y = sq(3);", Options(memoize=True))
+        copy = roundtrip(ctx["sq"])
+        assert isinstance(copy, MemoizedFunction)
+        assert ctx["sq"].cache_info().currsize == 1
+        assert copy.cache_info().currsize == 0
+        assert copy(3.0) == 9.0
+
+
+class TestSnapshot:
+    def test_captura_apenas_nomes_lidos(self):
+        ctx = load(CLASSES + "var xs = list(); fun f(x) { var q = x; return Q(q).get(); }")
+        copy = snapshot(ctx["f"])
+        assert copy.ctx.scope.keys() == {"Q"}
+        assert copy.ctx.parent.scope is ctx.parent.scope
+        assert copy(1.0) == ctx["f"](1.0) == 4.0
+
+    def test_preserva_recursão(self):
+        ctx = load("fun f(n) { if (n < 1) return 0; return n + f(n - 1); }")
+        copy = snapshot(ctx["f"])
+        assert copy.ctx["f"] is copy
+        assert copy(4.0) == 10.0
+
+    def test_closures(self):
+        ctx = load("fun make(k) { fun add(x) { return x + k; } return add; } var add = make(2);")
+        copy = snapshot(ctx["add"])
+        assert copy.ctx.scope == {"k": 2.0}
+        assert copy(1.0) == 3.0
+
+    @pytest.mark.parametrize(
+        "src, message",
+        [
+            ("var xs = list(); fun f(x) { return list_len(xs); }", "captura o valor mutável 'xs'"),
+            ("var n = 0; fun f(x) { n = n + x; }", "atribui a variável externa 'n'"),
+            (CLASSES + "fun f(x) { return q.get(); }", "captura o valor mutável 'q'"),
+            ("var a = array(2); fun g(x) { return a; } fun f(x) { return g(x); }", "'a'"),
+            (CLASSES + "var f = q.get;", "captura o valor mutável 'this'"),
+        ],
+    )
+    def test_rejeita_estado_mutável(self, src, message):
+        ctx = load(src)
+        with pytest.raises(LoxError, match=message):
+            snapshot(ctx["f"])
+
+
+class TestParallelMap:
+    def test_resultado_igual_ao_map(self):
+        ctx = load(CLASSES + "fun f(x) { return Q(x).get() + sqrt(x); }", Options.full())
+        values = [float(i) for i in range(50)]
+        expected = list(ctx["f"].map(values))
+        assert lox.parallel_map(ctx["f"], values, workers=2, chunksize=7) == expected
+
+    def test_consome_iteradores(self):
+        ctx = load('fun f(x) { return "n" + x; }')
+        values = (str(i) for i in range(5))
+        assert lox.parallel_map(ctx["f"], values, workers=1) == ["n0", "n1", "n2", "n3", "n4"]
+
+    def test_erro_no_processo_filho(self):
+        ctx = load("fun f(x) { return -x; }")
+        with pytest.raises(TypeError):
+            lox.parallel_map(ctx["f"], [1.0, "a"], workers=1)
+
+    def test_aridade(self):
+        ctx = load("fun f(x, y) { return x; }")
+        with pytest.raises(LoxError, match="Expected 1 arguments"):
+            lox.parallel_map(ctx["f"], [1.0])
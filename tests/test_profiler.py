@@ -0,0 +1,161 @@
+import re
+import signal
+import sys
+
+import pytest
+
+import lox
+from lox import *
+from lox.ast import Call, CountedLoop, Function, Return, While
+from lox.cli import main
+from lox.profiler import SCRIPT, Profiler, SamplingProfiler
+
+SRC = """\
+fun fib(n) {
+  if (n < 2) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+class P {
+  init(x) { this.x = x; }
+}
+var total = 0;
+for (var i = 0; i < 5; i = i + 1) {
+  total = total + P(i).x;
+}
+print fib(10) + total;
+"""
+
+
+def nodes(tree, cls):
+    return [node for node in tree.descendants() if isinstance(node, cls)]
+
+
+class TestPositions:
+    def test_nós_guardam_a_linha(self):
+        tree = parse(SRC)
+        assert [f.line for f in nodes(tree, Function)] == [1, 6]
+        assert [r.line for r in nodes(tree, Return)] == [2, 3]
+        assert [c.line for c in nodes(tree, Call)] == [3, 3, 10, 12]
+        assert [w.line for w in nodes(tree, While)] == [9]
+
+    def test_expressões_em_várias_linhas(self):
+        tree = parse("print\n  1 +\n  x;")
+        assert tree.stmts[0].expr.line == 2
+        assert tree.stmts[0].expr.right.line == 3
+
+    def test_otimizador_preserva_a_linha(self):
+        tree = parse(SRC)
+        optimize(tree, Options.full())
+        assert [loop.line for loop in nodes(tree, CountedLoop)] == [9]
+
+    def test_linha_não_participa_da_igualdade(self):
+        assert parse("\n\nprint 1;") == parse("print 1;")
+
+
+class TestProfiler:
+    @pytest.fixture
+    def profiler(self, capsys):
+        program = lox.compile(SRC)
+        with Profiler() as profiler:
+            program.run()
+        assert capsys.readouterr().out == "65\n"
+        return profiler
+
+    def test_funções(self, profiler):
+        fib = profiler.functions["fib"]
+        assert fib.calls == 177
+        assert fib.evals > fib.calls
+        assert 0 < fib.exclusive <= fib.inclusive
+        assert profiler.functions["P.init"].calls == 5
+        script = profiler.functions[SCRIPT]
+        assert script.inclusive >= fib.inclusive
+
+    def test_linhas(self, profiler):
+        assert profiler.lines[2].calls == 177
+        assert profiler.lines[3].calls == 88
+        assert profiler.lines[10].calls == 5
+        assert profiler.line_functions[3] == "fib"
+        assert profiler.lines[12].inclusive >= profiler.functions["fib"].inclusive
+
+    def test_relatório(self, profiler):
+        report = profiler.report(SRC)
+        assert "fib" in report
+        assert "return fib(n - 2) + fib(n - 1);" in report
+
+    def test_pilhas_colapsadas(self, profiler):
+        lines = list(profiler.collapsed())
+        assert lines
+        assert all(re.fullmatch(r"<script>(;[\w.]+)* \d+", line) for line in lines)
+        assert any(line.startswith("<script>;fib;fib ") for line in lines)
+
+    def test_remove_o_gancho(self, profiler):
+        assert sys.getprofile() is None
+
+
+class TestSamplingProfiler:
+    @pytest.fixture
+    def profiler(self, capsys):
+        program = lox.compile(SRC.replace("fib(10)", "fib(18)"))
+        with SamplingProfiler(0.0005) as profiler:
+            program.run()
+        assert capsys.readouterr().out == "2594\n"
+        return profiler
+
+    def test_amostras(self, profiler):
+        assert profiler.total > 0
+        for stack in profiler.samples:
+            assert stack[0][0] == SCRIPT
+            assert {name for name, _ in stack[1:]} <= {"fib", "P.init"}
+        deepest = max(profiler.samples, key=len)
+        assert deepest[0] == (SCRIPT, 12)
+        assert all(frame == ("fib", 3) for frame in deepest[1:-1])
+
+    def test_relatório(self, profiler):
+        report = profiler.report(SRC)
+        assert "sinais" in report
+        assert "fib" in report
+
+    def test_pilhas_colapsadas(self, profiler):
+        lines = list(profiler.collapsed())
+        assert sum(int(line.rsplit(" ", 1)[1]) for line in lines) == profiler.total
+        assert all(re.fullmatch(r"<script>:\d+(;[\w.]+(:\d+)?)* \d+", line) for line in lines)
+
+    def test_restaura_o_sinal(self, profiler):
+        assert signal.getsignal(signal.SIGPROF) in (signal.SIG_DFL, None)
+        assert signal.getitimer(signal.ITIMER_PROF) == (0.0, 0.0)
+
+    def test_ignora_código_fora_do_lox(self):
+        with SamplingProfiler(0.0005) as profiler:
+            sum(i * i for i in range(200_000))
+        assert profiler.total == 0
+
+
+def test_cli(tmp_path, capsys):
+    script = tmp_path / "script.lox"
+    script.write_text(SRC)
+    out = tmp_path / "perfil.collapsed"
+    main(["run", "--profile", "--profile-out", str(out), str(script)])
+    captured = capsys.readouterr()
+    assert captured.out == "65\n"
+    assert "fib" in captured.err
+    assert out.read_text().startswith("<script>")
+
+
+def test_cli_otimizado(tmp_path, capsys):
+    script = tmp_path / "script.lox"
+    script.write_text("fun f(x) { return x + 1; }\nvar t = 0;\nfor (var i = 0; i < 10; i = i + 1) t = f(t);\nprint t;")
+    main(["run", "-O", "--profile", "--profile-out", str(tmp_path / "perfil.collapsed"), str(script)])
+    captured = capsys.readouterr()
+    assert captured.out == "10\n"
+    assert re.search(r"^\s*10\s.*\sf$", captured.err, re.M)
+
+
+def test_cli_amostragem(tmp_path, capsys):
+    script = tmp_path / "script.lox"
+    script.write_text(SRC)
+    out = tmp_path / "amostras.collapsed"
+    main(["run", "--sample-profile", "--sample-interval", "0.5", "--profile-out", str(out), str(script)])
+    captured = capsys.readouterr()
+    assert captured.out == "65\n"
+    assert "sinais a cada 0.5 ms" in captured.err
+    assert out.exists()
@@ -0,0 +1,148 @@
+import asyncio
+import contextlib
+import io
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import lox
+from lox import *
+from lox.ast import While
+from lox.runtime import LoxError
+
+
+def output(func, *args) -> str:
+    with contextlib.redirect_stdout(io.StringIO()) as fd:
+        func(*args)
+    return fd.getvalue()
+
+
+SCRIPT = """
+class Counter {
+    init(n) { this.n = n; }
+    get() { return this.n; }
+}
+fun fib(n) { if (n < 2) return n; return fib(n - 1) + fib(n - 2); }
+var c = Counter(x);
+var total = 0;
+for (var i = 0; i < c.get(); i = i + 1) total = total + sqrt(i * i);
+result = fib(x) + total;
+"""
+
+
+class TestCompile:
+    def test_resultado_igual_ao_eval(self):
+        program = lox.compile(SCRIPT, optimize=Options.full(memoize=True))
+        for x in [0.0, 5.0, 10.0]:
+            expected = {"x": x, "result": None}
+            lox.eval(SCRIPT, expected)
+            env = {"x": x, "result": None}
+            program.run(env)
+            assert env["result"] == expected["result"]
+
+    def test_programa_é_imutável(self):
+        program = lox.compile("print 1;")
+        with pytest.raises(AttributeError):
+            program.tree = None  # type: ignore[misc]
+
+    def test_não_modifica_árvore_original(self):
+        tree = parse("for (var i = 0; i < 3; i = i + 1) print i;")
+        before = tree.pretty()
+        program = lox.compile(tree, optimize=Options.full())
+        assert tree.pretty() == before
+        assert output(program.run) == "0\n1\n2\n"
+
+    def test_eval_não_modifica_árvore_original(self):
+        tree = parse("var i = 0; while (i < 3) i = i + 1;")
+        before = tree.pretty()
+        lox.eval(tree, optimize=Options.full())
+        asyncio.run(lox.eval_async(tree, optimize=Options.full()))
+        assert tree.pretty() == before
+        assert type(tree.stmts[1]) is While
+
+    def test_relatório_do_otimizador(self):
+        program = lox.compile("var x = sqrt(4);", optimize=Options.full())
+        assert "[native] chamada nativa sqrt" in str(program.report)
+
+    def test_erros_são_repassados(self):
+        program = lox.compile("1 + nil;")
+        with pytest.raises(LoxError):
+            output(program.run)
+        with pytest.raises(LoxError):
+            output(program.run, {})
+
+    def test_execuções_concorrentes(self):
+        program = lox.compile(SCRIPT, optimize=Options.full())
+
+        def run(x):
+            env = {"x": float(x), "result": None}
+            program.run(env)
+            return env["result"]
+
+        expected = [run(x % 12) for x in range(48)]
+        with ThreadPoolExecutor(8) as pool:
+            assert list(pool.map(run, [x % 12 for x in range(48)])) == expected
+
+
+class TestCallMany:
+    def functions(self, src: str) -> Ctx:
+        ctx = Ctx.from_dict({})
+        lox.eval(src, ctx)
+        return ctx
+
+    def test_map_e_call_many(self):
+        ctx = self.functions("""
+        fun inc(x) { return x + 1; }
+        fun add(a, b) { var s = a + b; return s; }
+        """)
+        results = ctx["inc"].map([1.0, 2.0, 3.0])
+        assert next(results) == 2.0
+        assert list(results) == [3.0, 4.0]
+        assert list(ctx["add"].call_many([(1.0, 2.0), (3.0, 4.0)])) == [3.0, 7.0]
+
+    def test_resultado_igual_a_chamadas_individuais(self):
+        ctx = self.functions("""
+        fun classify(x) {
+            if (x < 0) return "neg";
+            var k = x * 2;
+            for (var i = 0; i < 2; i = i + 1) k = k + i;
+            if (k > 10) return "big";
+        }
+        """)
+        func = ctx["classify"]
+        values = [-1.0, 1.0, 10.0]
+        assert func.reuses_frame()
+        assert list(func.map(values)) == [func(v) for v in values] == ["neg", None, "big"]
+
+    def test_closures_não_compartilham_escopo(self):
+        ctx = self.functions("""
+        fun make(x) { fun get() { return x; } return get; }
+        """)
+        assert not ctx["make"].reuses_frame()
+        getters = list(ctx["make"].map([1.0, 2.0]))
+        assert [g() for g in getters] == [1.0, 2.0]
+
+    def test_métodos_e_funções_memoizadas(self):
+        ctx = Ctx.from_dict({})
+        src = """
+        class A { init(k) { this.k = k; } scale(x) { return this.k * x; } }
+        var a = A(3);
+        fun sq(x) { return x * x; }
+        """
+        lox.eval(src, ctx, optimize=Options(memoize=True))
+        assert list(ctx["a"].scale.map([1.0, 2.0])) == [3.0, 6.0]
+        assert list(ctx["sq"].map([2.0, 2.0])) == [4.0, 4.0]
+        assert ctx["sq"].cache_info().hits == 1
+
+    def test_aridade(self):
+        ctx = self.functions("fun add(a, b) { return a + b; }")
+        with pytest.raises(LoxError):
+            ctx["add"].map([1.0])
+        with pytest.raises(LoxError):
+            list(ctx["add"].call_many([(1.0, 2.0), (1.0,)]))
+
+    def test_strings_longas_são_entregues_como_str(self):
+        ctx = self.functions("fun rep(s) { var r = s; for (var i = 0; i < 10; i = i + 1) r = r + s; return r; }")
+        (result,) = ctx["rep"].map(["x" * 200])
+        assert type(result) is str
+        assert result == "x" * 2200
@@ -0,0 +1,88 @@
+import threading
+import time
+
+import pytest
+
+from lox.cli import main
+from lox.errors import LoxError
+from lox.server import Server, TimeLimitExceeded, run_remote, run_script, time_limit
+
+
+@pytest.fixture(scope="module")
+def socket_path(tmp_path_factory):
+    path = str(tmp_path_factory.mktemp("lox") / "lox.sock")
+    server = Server(path, workers=1, timeout=1.0)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield path
+    server.shutdown()
+    server.server_close()
+
+
+class TestRunScript:
+    def test_captura_saída(self, capsys):
+        response = run_script("print 1 + 2;")
+        assert (response.stdout, response.stderr, response.status) == ("3\n", "", 0)
+        assert capsys.readouterr().out == ""
+
+    def test_erro(self):
+        response = run_script('print 1; print -"a";')
+        assert response.status == 1
+        assert response.stdout.startswith("1\n")
+        assert response.stderr.startswith("TypeError:")
+
+    def test_limite_de_tempo(self):
+        response = run_script("while (true) {}", timeout=0.1)
+        assert response.status == 1
+        assert "Tempo limite de 0.1s excedido." in response.stderr
+
+    def test_limite_de_tempo_não_é_interceptado(self):
+        # O interpretador trata alguns LoxError internamente, como o de um
+        # `init` ausente em `LoxClass.__call__`
+        with pytest.raises(TimeLimitExceeded):
+            with time_limit(0.05):
+                while True:
+                    try:
+                        time.sleep(1)
+                    except LoxError:
+                        pass
+
+        src = "class A {} var i = 0; while (true) { A(); i = i + 1; }"
+        response = run_script(src, timeout=0.1)
+        assert "Tempo limite de 0.1s excedido." in response.stderr
+
+
+class TestServer:
+    def test_executa_scripts(self, socket_path):
+        response = run_remote("var x = 2; print x * 21;", socket_path, optimize=True)
+        assert (response.stdout, response.status) == ("42\n", 0)
+
+    def test_contextos_isolados(self, socket_path):
+        run_remote("var x = 1;", socket_path)
+        response = run_remote("print x;", socket_path)
+        assert response.status == 1
+        assert "x" in response.stderr
+
+    def test_limite_do_servidor_prevalece(self, socket_path):
+        response = run_remote("while (true) {}", socket_path, timeout=60)
+        assert "Tempo limite de 1s excedido." in response.stderr
+        assert run_remote("print 1;", socket_path).stdout == "1\n"
+
+    def test_sem_servidor(self, tmp_path):
+        assert run_remote("print 1;", str(tmp_path / "nada.sock")) is None
+
+
+class TestCli:
+    def test_run_server(self, socket_path, tmp_path, capsys):
+        script = tmp_path / "script.lox"
+        script.write_text("print 6 * 7;")
+        with pytest.raises(SystemExit) as exit:
+            main(["run", "--server", "--socket", socket_path, str(script)])
+        assert exit.value.code == 0
+        assert capsys.readouterr().out == "42\n"
+
+    def test_run_server_sem_servidor_executa_localmente(self, tmp_path, capsys):
+        script = tmp_path / "script.lox"
+        script.write_text("print 6 * 7;")
+        main(["run", "--server", "--socket", str(tmp_path / "nada.sock"), str(script)])
+        assert capsys.readouterr().out == "42\n"
@@ -0,0 +1,95 @@
+import pytest
+
+from lox import *
+from lox.runtime import ROPE_THRESHOLD, LoxError, Rope, add, eq, show
+
+
+BUILD = """
+var s = "";
+for (var i = 0; i < 100; i = i + 1) s = s + "0123456789abcdef0123456789abcdef";
+"""
+
+
+class TestRope:
+    def test_strings_pequenas_não_viram_rope(self):
+        assert type(add("a", "b")) is str
+
+    def test_strings_grandes_viram_rope(self):
+        big = "x" * ROPE_THRESHOLD
+        rope = add(big, "y")
+        assert type(rope) is Rope
+        assert len(rope) == ROPE_THRESHOLD + 1
+        assert rope == big + "y"
+
+    def test_ropes_compartilhadas_não_se_misturam(self):
+        base = add("x" * ROPE_THRESHOLD, "a")
+        left = add(base, "b")
+        right = add(base, "c")
+        assert str(left).endswith("ab")
+        assert str(right).endswith("ac")
+        assert str(base).endswith("xa")
+
+    def test_construção_em_laço(self, run):
+        ctx, _ = run(BUILD)
+        assert type(ctx["s"]) is Rope
+        assert ctx["s"] == "0123456789abcdef0123456789abcdef" * 100
+
+    def test_indistinguível_de_string(self, run):
+        src = BUILD + """
+        var t = "";
+        for (var i = 0; i < 100; i = i + 1) t = t + "0123456789abcdef0123456789abcdef";
+        print s == t;
+        print s != t + "x";
+        print s == 1;
+        print (s + "!") == (t + "!");
+        """
+        _, out = run(src)
+        assert out == "true\ntrue\nfalse\ntrue\n"
+
+    def test_show_e_eq(self):
+        rope = add("x" * ROPE_THRESHOLD, "y")
+        assert show(rope) == "x" * ROPE_THRESHOLD + "y"
+        assert eq(rope, "x" * ROPE_THRESHOLD + "y")
+        assert eq("x" * ROPE_THRESHOLD + "y", rope)
+        assert not eq(rope, None)
+
+    def test_funções_nativas_recebem_str(self, run):
+        received = []
+        _, _ = run(BUILD + "native(s, 1);", {"native": lambda *args: received.extend(args)})
+        assert type(received[0]) is str
+        assert received[1] == 1
+
+    @pytest.mark.parametrize("src", ["s.x;", "s.x = 1;", "s + 1;", "s < s;"])
+    def test_erros_de_tipo(self, src, run):
+        with pytest.raises(LoxError):
+            run(BUILD + src)
+
+
+class TestIntern:
+    def test_literais_e_nomes_são_internados(self):
+        tree = parse('var nome = "texto"; print nome; print "tex" + "to";')
+        first, second = tree.stmts[0], tree.stmts[1]
+        assert first.value.value is "texto"  # noqa: F632
+        assert second.expr.name is first.name
+
+    def test_eq_compara_identidade_primeiro(self):
+        text = "x" * 100
+        assert eq(text, text)
+        assert eq(None, None)
+        assert not eq(text, None)
+
+    def test_nan_continua_diferente_de_si_mesmo(self, run):
+        nan = float("nan")
+        assert not eq(nan, nan)
+        _, out = run("var x = 0 / 0; print x == x; print x != x;")
+        assert out == "false\ntrue\n"
+
+    def test_política_de_internação(self):
+        src = 'var a = x + "c"; var b = x + "c"; var c = x + "cd"; var d = x + "cd";'
+        env = {"x": "ab"}
+        Interpreter(intern_max_length=3).eval(src, env)
+        assert env["a"] is env["b"]
+        assert env["c"] is not env["d"]
+        Interpreter().eval(src, env)
+        assert env["a"] is not env["b"]
+        assert add("ab", "c") is not add("ab", "c")
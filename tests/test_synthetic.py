@@ -0,0 +1,41 @@
+import io
+
+import pytest
+
+import lox
+from lox.ast import Class, Function
+from lox.synthetic import generate
+
+
+def nodes(tree, cls):
+    return [node for node in tree.descendants() if isinstance(node, cls)]
+
+
+def max_indent(src: str) -> int:
+    return max(len(line) - len(line.lstrip()) for line in src.splitlines())
+
+
+class TestGenerate:
+    @pytest.mark.parametrize("seed", range(5))
+    def test_programas_válidos_e_executáveis(self, seed):
+        src = generate(300, depth=4, classes=4, expr_length=5, seed=seed)
+        out = io.StringIO()
+        lox.Interpreter(stdout=out).eval(src)
+        assert out.getvalue()
+
+    def test_determinístico(self):
+        assert generate(200, seed=1) == generate(200, seed=1)
+        assert generate(200, seed=1) != generate(200, seed=2)
+
+    def test_tamanho(self):
+        for lines in (1000, 5000):
+            assert lines <= generate(lines).count("\n") <= 1.5 * lines
+
+    def test_parâmetros(self):
+        tree = lox.parse(generate(500, depth=2, classes=7, expr_length=3))
+        assert len(nodes(tree, Class)) == 7
+        assert any(cls.base is not None for cls in nodes(tree, Class))
+        assert len(nodes(tree, Function)) > 7
+
+    def test_profundidade(self):
+        assert max_indent(generate(2000, depth=1)) < max_indent(generate(2000, depth=5))
@@ -0,0 +1,88 @@
+import io
+
+import pytest
+
+import lox
+from lox import *
+from lox.cli import main
+from lox.synthetic import generate
+
+SRC = """\
+fun fib(n) {
+  if (n < 2) return n;
+  return fib(n - 2) + fib(n - 1);
+}
+print fib(10);
+"""
+
+PHASES = ["lex", "parse", "transform", "validate", "desugar", "optimize", "eval"]
+
+
+class TestTimings:
+    def test_eval(self, capsys):
+        timings = Timings()
+        lox.eval(SRC, timings=timings)
+        assert capsys.readouterr().out == "55\n"
+        assert timings.read == 0
+        assert all(getattr(timings, name) > 0 for name in PHASES)
+        assert timings.total == sum(getattr(timings, name) for name in PHASES)
+
+    def test_as_dict(self):
+        timings = Timings(lex=1, eval=2)
+        assert timings.as_dict() == {
+            "read": 0,
+            "lex": 1,
+            "parse": 0,
+            "transform": 0,
+            "validate": 0,
+            "desugar": 0,
+            "optimize": 0,
+            "eval": 2,
+            "total": 3,
+        }
+
+    def test_tabela(self):
+        table = str(Timings(lex=2_000_000, eval=6_000_000))
+        assert "análise léxica" in table
+        assert "75.0%" in table
+        assert table.splitlines()[-1].split() == ["total", "8.00", "ms"]
+
+    def test_compile_e_run(self, capsys):
+        timings = Timings()
+        program = lox.compile(SRC, Options.full(), timings=timings)
+        assert timings.eval == 0 and timings.optimize > 0
+        program.run(timings=timings)
+        assert timings.eval > 0
+
+    def test_interpretador_reaproveita_programas(self):
+        interp = Interpreter(stdout=io.StringIO())
+        interp.eval(SRC, timings=Timings())
+        timings = Timings()
+        interp.eval(SRC, timings=timings)
+        assert timings.parse == 0
+        assert timings.eval > 0
+
+    def test_erro_conta_a_fase(self, capsys):
+        timings = Timings()
+        with pytest.raises(Exception):
+            lox.eval("print 1 + nil;", timings=timings)
+        assert timings.eval > 0
+
+    def test_mesma_árvore(self):
+        src = generate(300)
+        tree = parse(src)
+        timed = parse(src, timings=Timings())
+        assert timed == tree
+        assert [node.line for node in timed.descendants()] == [
+            node.line for node in tree.descendants()
+        ]
+
+
+def test_cli(tmp_path, capsys):
+    script = tmp_path / "script.lox"
+    script.write_text(SRC)
+    main(["run", "--timings", str(script)])
+    captured = capsys.readouterr()
+    assert captured.out == "55\n"
+    assert "leitura" in captured.err
+    assert "execução" in captured.err
@@ -0,0 +1,202 @@
+import asyncio
+import threading
+
+import pytest
+
+import lox
+from lox import *
+from lox.ast import BinOp, While
+from lox.errors import LoxError
+from lox.runtime import LoxFunction
+from lox.tracing import Coverage, TRACING, traced_classes
+
+SRC = """\
+fun inc(n) {
+  return n + 1;
+}
+var i = 0;
+while (i < 2) {
+  i = inc(i);
+}
+print i;
+"""
+
+EVENTS = [
+    ("line", 1),
+    ("line", 4),
+    ("line", 5),
+    ("line", 6),
+    ("call", "inc", [0.0]),
+    ("line", 2),
+    ("return", "inc", 1.0),
+    ("backedge", "While"),
+    ("line", 5),
+    ("line", 6),
+    ("call", "inc", [1.0]),
+    ("line", 2),
+    ("return", "inc", 2.0),
+    ("backedge", "While"),
+    ("line", 5),
+    ("line", 8),
+]
+
+
+class Recorder(Tracer):
+    def __init__(self):
+        self.events = []
+
+    def on_call(self, function, args):
+        self.events.append(("call", function.name, args))
+
+    def on_return(self, function, value):
+        self.events.append(("return", function.name, value))
+
+    def on_line(self, line, node):
+        self.events.append(("line", line))
+
+    def on_loop_backedge(self, node):
+        self.events.append(("backedge", type(node).__name__))
+
+    def on_error(self, error, node):
+        self.events.append(("error", str(error), type(node).__name__))
+
+
+class TestTracer:
+    def test_eventos(self, capsys):
+        tracer = Recorder()
+        lox.eval(SRC, tracer=tracer)
+        assert capsys.readouterr().out == "2\n"
+        assert tracer.events == EVENTS
+
+    def test_eventos_assíncronos(self, capsys):
+        tracer = Recorder()
+        asyncio.run(lox.eval_async(SRC, tracer=tracer))
+        assert tracer.events == EVENTS
+
+    def test_erro(self, capsys):
+        tracer = Recorder()
+        with pytest.raises(LoxError):
+            lox.eval("fun f() {\n  return 1 + nil;\n}\nf();", tracer=tracer)
+        assert tracer.events == [
+            ("line", 1),
+            ("line", 4),
+            ("call", "f", []),
+            ("line", 2),
+            ("error", "Operands must be two numbers or two strings", "BinOp"),
+            ("return", "f", None),
+        ]
+
+    def test_return_não_é_erro(self, capsys):
+        tracer = Recorder()
+        lox.eval(SRC, tracer=tracer)
+        assert not [event for event in tracer.events if event[0] == "error"]
+
+    def test_laços_otimizados(self, capsys):
+        tracer = Recorder()
+        src = "var t = 0;\nfor (var i = 0; i < 3; i = i + 1) t = t + i;\nprint t;"
+        lox.eval(src, optimize=Options.full(), tracer=tracer)
+        assert capsys.readouterr().out == "3\n"
+        backedges = [event for event in tracer.events if event[0] == "backedge"]
+        assert backedges == [("backedge", "CountedLoop")] * 3
+
+    def test_métodos_e_memoização(self, capsys):
+        tracer = Recorder()
+        src = """\
+class P { init(x) { this.x = x; } get() { return this.x; } }
+fun sq(n) { return n * n; }
+print P(1).get() + sq(3) + sq(3);
+"""
+        lox.eval(src, optimize=Options(memoize=True), tracer=tracer)
+        assert capsys.readouterr().out == "19\n"
+        calls = [event[1] for event in tracer.events if event[0] == "call"]
+        assert calls == ["init", "get", "sq", "sq"]
+
+    def test_chamadas_expandidas(self, capsys):
+        src = """\
+class P { get() { return 1; } }
+fun sq(n) { return n * n; }
+fun twice(n) { return 2 * n; }
+twice = twice;
+var p = P();
+print sq(3) + twice(p.get());
+"""
+        report = lox.compile(src, Options.full()).report
+        assert len(report) >= 3
+        tracer = Recorder()
+        lox.compile(src, Options.full()).run(tracer=tracer)
+        assert capsys.readouterr().out == "11\n"
+        calls = [event[1] for event in tracer.events if event[0] == "call"]
+        assert calls == ["sq", "get", "twice"]
+
+    def test_orçamento(self):
+        tracer = Recorder()
+        with pytest.raises(BudgetExceeded):
+            lox.eval("while (true) {}", budget=Budget(steps=10), tracer=tracer)
+        assert tracer.events.count(("backedge", "While")) == 11
+
+    def test_programa_compilado_e_interpretador(self, capsys):
+        program = lox.compile(SRC)
+        tracer = Recorder()
+        program.run(tracer=tracer)
+        assert tracer.events == EVENTS
+        tracer = Recorder()
+        Interpreter().eval(SRC, tracer=tracer)
+        assert tracer.events == EVENTS
+
+
+class TestInstrumentação:
+    def test_não_modifica_classes(self, capsys):
+        methods = While.__dict__["eval"], BinOp.__dict__["eval"], LoxFunction.__dict__["call"]
+        lox.eval(SRC, tracer=Tracer())
+        assert (While.__dict__["eval"], BinOp.__dict__["eval"], LoxFunction.__dict__["call"]) == methods
+        assert TRACING.get() is None
+
+    def test_não_modifica_árvore(self, capsys):
+        program = lox.compile(SRC)
+        program.run(tracer=Tracer())
+        traced = set(traced_classes.values())
+        assert traced
+        assert not any(type(node) in traced for node in program.tree.descendants())
+        assert type(program.tree.stmts[2]) is While
+
+    def test_funções_da_execução_instrumentada(self, capsys):
+        tracer = Recorder()
+        ctx = Ctx.from_dict({})
+        lox.eval("fun f() { return 1; }\nprint f();", ctx, tracer=tracer)
+        assert ("call", "f", []) in tracer.events
+        assert type(ctx["f"]) is not LoxFunction
+        # Fora da execução com tracer, a função não emite eventos
+        tracer.events.clear()
+        ctx["f"].call([])
+        assert tracer.events == []
+
+    def test_execuções_sem_tracer_não_emitem_eventos(self, capsys):
+        # Executa um programa sem tracer enquanto outra thread está parada
+        # no meio de uma execução com tracer
+        eval = While.__dict__["eval"]
+        inside, done = threading.Event(), threading.Event()
+
+        class Waiter(Coverage):
+            def on_line(self, line, node):
+                super().on_line(line, node)
+                if line == 2:
+                    inside.set()
+                    done.wait(5)
+
+        tracer = Waiter()
+        src = "var a = 1;\nvar b = 2;\nvar c = 3;"
+        thread = threading.Thread(target=lox.eval, args=(src,), kwargs={"tracer": tracer})
+        thread.start()
+        assert inside.wait(5)
+        assert While.__dict__["eval"] is eval
+        lox.eval("print 1;\nwhile (false) {}\nprint 2;\nprint 3;\nprint 4;")
+        done.set()
+        thread.join()
+        assert tracer.lines == {1: 1, 2: 1, 3: 1}
+        assert capsys.readouterr().out == "1\n2\n3\n4\n"
+
+
+def test_coverage(capsys):
+    coverage = Coverage()
+    lox.eval(SRC, tracer=coverage)
+    assert coverage.lines == {1: 1, 2: 2, 4: 1, 5: 3, 6: 2, 8: 1}